@@ -0,0 +1,10 @@
+"""Daily Planner 성능 측정 (Streamlit 없이 실행)
+
+합성 데이터를 만들고 (benchmarks.generate), 앱이 쓰는 로드/저장/집계 경로를
+planner 패키지로 직접 호출해 시간을 재며 (benchmarks.run), 두 결과 파일을
+비교해 기준보다 느려진 항목을 찾는다 (benchmarks.compare)::
+
+    python -m benchmarks.run --preset small --out before.json
+    python -m benchmarks.run --preset small --out after.json
+    python -m benchmarks.compare before.json after.json --threshold 0.2
+"""
@@ -0,0 +1,52 @@
+"""두 벤치마크 결과 비교
+
+중앙값이 기준보다 threshold 비율 이상, 그리고 min_ms 이상 느려진 항목이
+있으면 종료 코드 1 로 끝난다 (CI 에서 회귀 검사용).
+
+    python -m benchmarks.compare before.json after.json --threshold 0.2
+"""
+import argparse
+import json
+import sys
+
+
+def load_results(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)["results"]
+
+
+def compare(before, after, threshold=0.2, min_ms=0.05):
+    """[(항목, 이전 ms, 이후 ms, 비율, 회귀 여부)] 공통 항목만"""
+    rows = []
+    for name in sorted(set(before) & set(after)):
+        old, new = before[name]["median_ms"], after[name]["median_ms"]
+        ratio = new / old if old else float("inf")
+        regressed = new > old * (1 + threshold) and new - old >= min_ms
+        rows.append((name, old, new, ratio, regressed))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="벤치마크 결과 비교")
+    parser.add_argument("before")
+    parser.add_argument("after")
+    parser.add_argument("--threshold", type=float, default=0.2, help="허용하는 느려짐 비율 (0.2 = 20%%)")
+    parser.add_argument("--min-ms", type=float, default=0.05, help="이보다 작은 차이는 무시")
+    args = parser.parse_args(argv)
+
+    before, after = load_results(args.before), load_results(args.after)
+    rows = compare(before, after, args.threshold, args.min_ms)
+    for name, old, new, ratio, regressed in rows:
+        mark = "  느려짐" if regressed else ""
+        print(f"{name:45s} {old:10.3f} -> {new:10.3f} ms  x{ratio:5.2f}{mark}")
+    for name in sorted(set(before) ^ set(after)):
+        print(f"{name:45s} (한쪽 결과에만 있음)")
+    regressions = [row for row in rows if row[4]]
+    if regressions:
+        print(f"\n{len(regressions)}개 항목이 {args.threshold:.0%} 이상 느려졌습니다.")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
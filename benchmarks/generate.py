@@ -0,0 +1,102 @@
+"""벤치마크용 합성 데이터 생성 (같은 seed 와 크기면 항상 같은 데이터)
+
+- 사용자별 형식 (streamlit_app.py): data_{user}.json / journal / planner.db
+- 날짜별 형식 (web_planner.py): {YYYY-MM-DD}.json + planner_manifest.json
+
+    python -m benchmarks.generate 디렉터리 --layout per-user --users 10 --days 90
+"""
+import argparse
+import os
+import random
+from datetime import date, timedelta
+
+from planner.concurrency import write_json_atomic
+from planner.day import SLOT_COUNT, slot_key
+from planner.manifest import DateManifest
+from planner.sparse import COMPLETED_SUFFIX
+from planner.storage import open_store
+
+START_DATE = date(2020, 1, 1)
+TEXTS = ["운동", "독서", "회의", "코딩", "점심", "산책", "공부", "청소", "장보기", "휴식"]
+COLORS = ["#FF6B6B", "#4ECDC4", "#45B7D1", "#96CEB4", "#FFEAA7"]
+
+
+def date_slot(index):
+    """web_planner.py 의 시간 슬롯 키 ("09:30")"""
+    return f"{index // 2:02d}:{30 * (index % 2):02d}"
+
+
+def make_user_day(rng, fill):
+    tasks = {}
+    for index in range(SLOT_COUNT):
+        if rng.random() < fill:
+            key = slot_key(index)
+            tasks[key] = rng.choice(TEXTS)
+            if rng.random() < 0.6:
+                tasks[key + COMPLETED_SUFFIX] = True
+    blocks = []
+    for _ in range(rng.randrange(3)):
+        start = rng.randrange(6, 20)
+        blocks.append({"name": rng.choice(TEXTS), "start": f"{start:02d}:00",
+                       "end": f"{start + rng.randrange(1, 4):02d}:00",
+                       "color": rng.choice(COLORS), "completed": rng.random() < 0.5})
+    return {"tasks": tasks, "block_tasks": blocks}
+
+
+def make_date_tasks(rng, fill):
+    tasks = {}
+    for index in range(SLOT_COUNT):
+        if rng.random() < fill:
+            tasks[date_slot(index)] = {"text": rng.choice(TEXTS), "done": rng.random() < 0.6,
+                                       "type": "normal"}
+    return tasks
+
+
+def user_names(users):
+    return [f"bench{i:05d}_pw" for i in range(users)]
+
+
+def generate_per_user(data_dir, users, days, backend="json", seed=0, fill=0.3, start=START_DATE):
+    """사용자 users 명 x days 일 기록을 저장하고 사용자 이름 목록 반환"""
+    os.makedirs(data_dir, exist_ok=True)
+    store = open_store(backend, data_dir)
+    names = user_names(users)
+    for number, name in enumerate(names):
+        rng = random.Random(f"{seed}/user/{number}")
+        data = {(start + timedelta(days=i)).isoformat(): make_user_day(rng, fill) for i in range(days)}
+        store.save_user(name, data)
+    return names
+
+
+def generate_per_date(data_dir, days, seed=0, fill=0.3, start=START_DATE):
+    """days 일치 날짜 파일과 날짜 색인을 만들고 날짜 목록 반환"""
+    os.makedirs(data_dir, exist_ok=True)
+    dates = [start + timedelta(days=i) for i in range(days)]
+    for date_obj in dates:
+        tasks = make_date_tasks(random.Random(f"{seed}/date/{date_obj.isoformat()}"), fill)
+        if tasks:
+            write_json_atomic(os.path.join(data_dir, f"{date_obj.isoformat()}.json"), tasks)
+    DateManifest(data_dir).rebuild()
+    return dates
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="벤치마크용 합성 데이터 생성")
+    parser.add_argument("data_dir")
+    parser.add_argument("--layout", choices=["per-user", "per-date"], default="per-user")
+    parser.add_argument("--backend", choices=["json", "journal", "sqlite"], default="json")
+    parser.add_argument("--users", type=int, default=1)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--fill", type=float, default=0.3, help="슬롯이 채워질 확률")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    if args.layout == "per-user":
+        names = generate_per_user(args.data_dir, args.users, args.days, args.backend, args.seed, args.fill)
+        print(f"사용자 {len(names)}명 x {args.days}일 기록을 만들었습니다.")
+    else:
+        dates = generate_per_date(args.data_dir, args.days, args.seed, args.fill)
+        print(f"날짜 파일 {len(dates)}일치를 만들었습니다.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""로드/저장/집계 경로 시간 측정
+
+앱 화면 대신 각 화면이 호출하는 planner 함수를 직접 부른다.
+
+- 사용자별 형식 (streamlit_app.py): load_user_data, save_user_data, 하루 저장,
+  슬롯 하나 저장, 블록 추가 (하루 / 30일), 주간 보기, 통계 탭
+- 날짜별 형식 (web_planner.py): load_tasks, save_tasks, patch_slot,
+  add_block_task (하루 / 30일), 주간 보기, 통계, 30일 범위 읽기
+
+결과는 항목별 중앙값/최솟값(ms)을 JSON 으로 저장한다. 날짜별 형식은
+planner.config 의 DATA_DIR / BACKEND 를 측정용 디렉터리로 바꿔서 실행하므로
+한 프로세스에서 앱과 함께 쓰지 않는다.
+
+    python -m benchmarks.run --preset 1u5y --backend json sqlite --out results.json
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.generate import START_DATE, date_slot, generate_per_date, generate_per_user, open_store
+from planner import config
+from planner.cache import clone, user_cache
+from planner.datefiles import add_block_task, add_block_tasks, load_tasks, load_tasks_range, patch_slot, save_tasks
+from planner.day import user_day_counts
+from planner.journal import clear_documents
+from planner.manifest import get_manifest
+from planner.search import date_index, user_index
+
+# 이름: (사용자 수, 일 수)
+PRESETS = {
+    "small": (3, 90),
+    "1u5y": (1, 5 * 365),
+    "100u1y": (100, 365),
+    "10ku90d": (10000, 90),
+}
+
+
+def measure(fn, repeat, setup=None):
+    """fn(i) 를 repeat 번 실행한 시간 (setup(i) 시간은 제외)"""
+    times = []
+    for i in range(repeat):
+        if setup:
+            setup(i)
+        started = time.perf_counter()
+        fn(i)
+        times.append(time.perf_counter() - started)
+    return {"median_ms": round(statistics.median(times) * 1000, 4),
+            "min_ms": round(min(times) * 1000, 4), "repeat": repeat}
+
+
+def drop_caches(i=None):
+    """프로세스 내 캐시를 비워 디스크에서 다시 읽게 함"""
+    user_cache.clear()
+    clear_documents()
+
+
+def bench_per_user(data_dir, backend, users, days, repeat, sample):
+    names = generate_per_user(data_dir, users, days, backend)[:sample]
+    store = open_store(backend, data_dir)
+    mid = (START_DATE + timedelta(days=days // 2)).isoformat()
+    week = [(START_DATE + timedelta(days=days // 2 + i)).isoformat() for i in range(7)]
+    month = [(START_DATE + timedelta(days=days // 2 + i)).isoformat() for i in range(30)]
+
+    def name(i):
+        return names[i % len(names)]
+
+    def cold(i):
+        # sqlite 저장소의 스레드별 캐시도 비움
+        drop_caches()
+        store.release(name(i))
+
+    loaded = {}
+
+    def load_for_save(i):
+        loaded["data"] = dict(store.load_user(name(i)))
+        loaded["data"][mid] = clone(loaded["data"][mid])
+        loaded["data"][mid]["tasks"]["09:00-09:30"] = f"측정 {i}"
+
+    def weekly(i):
+        data = store.load_user(name(i))
+        [user_day_counts(data[d]) for d in week if d in data]
+
+    def stats(i):
+        rollup = store.load_stats(name(i))
+        rollup.monthly()
+
+    def index_for(i):
+        index = user_index(name(i), store)
+        if not index.exists():
+            index.rebuild()
+
+    return {
+        "load_user_data": measure(lambda i: store.load_user(name(i)), repeat, cold),
+        "load_user_data.cached": measure(lambda i: store.load_user(name(i)), repeat,
+                                         lambda i: store.load_user(name(i))),
+        "save_user_data": measure(lambda i: store.save_user(name(i), loaded["data"]), repeat, load_for_save),
+        "save_day": measure(lambda i: store.save_day(name(i), mid, loaded["data"][mid]), repeat, load_for_save),
+        "set_slot": measure(lambda i: store.set_slot(name(i), mid, "10:00-10:30", f"측정 {i}", i % 2 == 0),
+                            repeat),
+        "add_block": measure(lambda i: store.add_block(name(i), mid, {
+            "name": "측정", "start": "13:00", "end": "14:00", "color": "#FF6B6B", "completed": False}), repeat),
+        "add_blocks.30d": measure(lambda i: store.add_blocks(name(i), month, {
+            "name": "측정", "start": "15:00", "end": "16:00", "color": "#FF6B6B", "completed": False}), repeat),
+        "weekly_view": measure(weekly, repeat, cold),
+        "statistics_tab": measure(stats, repeat, cold),
+        "search": measure(lambda i: user_index(name(i), store).search("장보*"), repeat, index_for),
+    }
+
+
+def bench_per_date(data_dir, backend, days, repeat):
+    config.DATA_DIR, config.BACKEND = data_dir, backend
+    dates = generate_per_date(data_dir, days)
+    mid = dates[len(dates) // 2]
+
+    def edited(i):
+        tasks = load_tasks(mid)
+        tasks[date_slot(18)] = {"text": f"측정 {i}", "done": False, "type": "normal"}
+        return tasks
+
+    def statistics_view(i):
+        entries = get_manifest().range(dates[0], dates[-1])
+        sum(entry["tasks"] for entry in entries.values())
+
+    def index_for(i):
+        if not date_index().exists():
+            date_index().rebuild()
+
+    return {
+        "load_tasks": measure(lambda i: load_tasks(dates[i % len(dates)]), repeat, drop_caches),
+        "save_tasks": measure(lambda i: save_tasks(mid, edited(i)), repeat),
+        "patch_slot": measure(lambda i: patch_slot(mid, date_slot(20), {"done": i % 2 == 0}), repeat),
+        "add_block_task": measure(lambda i: add_block_task(mid, "측정", date_slot(26), date_slot(28)), repeat),
+        "add_block_tasks.30d": measure(lambda i: add_block_tasks([mid + timedelta(days=d) for d in range(30)], "측정",
+                                                                 date_slot(30), date_slot(31)), repeat),
+        "weekly_view": measure(lambda i: get_manifest().range(mid, mid + timedelta(days=6)), repeat),
+        "statistics": measure(statistics_view, repeat),
+        "search": measure(lambda i: date_index().search("장보*"), repeat, index_for),
+        "load_tasks_range.30d": measure(lambda i: load_tasks_range(mid, mid + timedelta(days=29)),
+                                        repeat, drop_caches),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(preset, backends, layouts, repeat, sample, work_dir):
+    users, days = PRESETS[preset]
+    results = {}
+    for backend in backends:
+        if "per-user" in layouts:
+            data_dir = os.path.join(work_dir, f"per-user-{backend}")
+            for op, result in bench_per_user(data_dir, backend, users, days, repeat, sample).items():
+                results[f"per-user/{backend}/{op}"] = result
+        if "per-date" in layouts and backend != "sqlite":
+            data_dir = os.path.join(work_dir, f"per-date-{backend}")
+            for op, result in bench_per_date(data_dir, backend, days, repeat).items():
+                results[f"per-date/{backend}/{op}"] = result
+    return {
+        "meta": {"created": datetime.now().isoformat(timespec="seconds"), "git_commit": git_commit(),
+                 "python": platform.python_version(), "preset": preset, "users": users, "days": days,
+                 "repeat": repeat},
+        "results": results,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Daily Planner 벤치마크")
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="small")
+    parser.add_argument("--backend", nargs="+", choices=["json", "journal", "sqlite"], default=["json"])
+    parser.add_argument("--layout", nargs="+", choices=["per-user", "per-date"], default=["per-user", "per-date"])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--sample", type=int, default=20, help="측정에 쓸 사용자 수")
+    parser.add_argument("--data-dir", help="생성한 데이터를 남길 디렉터리 (기본: 임시 디렉터리)")
+    parser.add_argument("--out", help="결과 JSON 파일 (기본: 표준 출력)")
+    args = parser.parse_args(argv)
+
+    work_dir = args.data_dir or tempfile.mkdtemp(prefix="planner-bench-")
+    try:
+        report = run(args.preset, args.backend, args.layout, args.repeat, args.sample, work_dir)
+    finally:
+        if not args.data_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            f.write(text + "\n")
+        for name, result in report["results"].items():
+            print(f"{name:45s} {result['median_ms']:10.3f} ms")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+"""Daily Planner 데이터 계층 (Streamlit 없이 사용 가능)"""
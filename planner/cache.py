@@ -0,0 +1,139 @@
+"""사용자 데이터 파일 캐시"""
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from planner.metrics import span
+
+DEFAULT_MAX_ENTRIES = 64
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+def clone(obj):
+    """dict/list 구조 복사 (문자열·숫자·bool 은 불변이므로 공유)"""
+    if isinstance(obj, dict):
+        return {k: clone(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [clone(v) for v in obj]
+    return obj
+
+
+def file_stamp(path):
+    """파일 변경 감지용 (mtime_ns, size, inode), 파일이 없으면 None
+
+    파일은 교체(os.replace)로 기록하므로 inode 가 바뀌어 mtime 해상도 안에서
+    다른 프로세스가 같은 크기로 다시 쓴 경우도 구분된다.
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+class UserDataCache:
+    """파싱된 JSON 을 프로세스 전역으로 보관하는 LRU 캐시
+
+    항목은 파일의 (mtime_ns, size) 로 검증되어 파일이 바뀌었을 때만 다시
+    파싱한다. 전체 크기는 원본 파일 바이트 기준으로 max_bytes 를 넘지 않는다.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (stamp, data, nbytes)
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def version(self, key):
+        """key 의 데이터가 바뀔 때마다 증가하는 버전 번호"""
+        with self._lock:
+            return self._versions.get(key, 0)
+
+    def get(self, key, stamp):
+        """stamp 가 일치하는 캐시 데이터 (없으면 None)
+
+        모든 호출자가 공유하는 객체이므로 읽기 전용으로만 쓴다. 고칠 하루만
+        clone 해서 고친다 (전체 기록을 매번 복사하면 파싱을 아낀 의미가 없음).
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != stamp:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def peek(self, key, stamp):
+        """get 과 같지만 적중/실패를 세지 않음"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != stamp:
+                return None
+            return entry[1]
+
+    def put(self, key, stamp, data, nbytes):
+        """데이터 저장 후 예산을 넘는 오래된 항목 제거"""
+        data = clone(data)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.total_bytes -= old[2]
+                if old[0] != stamp:
+                    self._versions[key] = self._versions.get(key, 0) + 1
+            else:
+                self._versions[key] = self._versions.get(key, 0) + 1
+            if nbytes > self.max_bytes:
+                return
+            self._entries[key] = (stamp, data, nbytes)
+            self.total_bytes += nbytes
+            while self._entries and (len(self._entries) > self.max_entries
+                                     or self.total_bytes > self.max_bytes):
+                _, (_, _, size) = self._entries.popitem(last=False)
+                self.total_bytes -= size
+
+    def invalidate(self, key):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self.total_bytes -= entry[2]
+                self._versions[key] = self._versions.get(key, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+
+    def load(self, path):
+        """JSON 파일 로드, 파일이 바뀌지 않았으면 파싱 없이 캐시에서 반환 (읽기 전용)"""
+        stamp = file_stamp(path)
+        if stamp is None:
+            self.invalidate(path)
+            return {}
+        data = self.get(path, stamp)
+        if data is not None:
+            return data
+        try:
+            with span("json.load"), open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        self.put(path, stamp, data, stamp[1])
+        return data
+
+    def remember(self, path, data):
+        """방금 저장한 데이터를 새 stamp 로 등록 (다음 로드에서 재파싱 방지)"""
+        stamp = file_stamp(path)
+        if stamp is None:
+            self.invalidate(path)
+        else:
+            self.put(path, stamp, data, stamp[1])
+
+
+# 모든 세션이 공유하는 캐시
+user_cache = UserDataCache()
@@ -0,0 +1,122 @@
+"""여러 프로세스(앱 복제본)가 같은 데이터를 쓸 때의 잠금과 병합
+
+파일 저장소는 `{경로}.lock` 에 fcntl.flock 으로 배타 잠금을 잡고 읽기-수정-쓰기를
+한다 (잠금 파일은 잡고 있는 동안만 있고 풀 때 지운다). 저장할 때 편집을 시작한 시점의 값(base)을 함께 주면 그 사이 다른
+세션이 기록한 내용과 3-way 병합한다 (compare-and-swap). 서로 다른 슬롯을 고친
+경우는 둘 다 남고, 같은 슬롯을 서로 다르게 고친 경우만 ConflictError 이다.
+
+fcntl 이 없는 환경(Windows)에서는 프로세스 내 잠금만 건다.
+"""
+import json
+import os
+import threading
+from contextlib import contextmanager
+
+from planner.metrics import span
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+_MISSING = object()
+
+
+class ConflictError(Exception):
+    """다른 세션이 같은 항목을 다른 값으로 먼저 고침"""
+
+    def __init__(self, paths):
+        self.paths = [list(path) for path in paths]
+        super().__init__("동시 수정 충돌: " + ", ".join("/".join(map(str, path)) for path in self.paths))
+
+
+_locks = {}
+_locks_guard = threading.Lock()
+_held = threading.local()
+
+
+@contextmanager
+def file_lock(path):
+    """path 에 대한 배타 잠금 (같은 스레드에서 중첩 가능)"""
+    path = os.path.abspath(path)
+    depth = getattr(_held, "depth", None)
+    if depth is None:
+        depth = _held.depth = {}
+    if depth.get(path):
+        depth[path] += 1
+        try:
+            yield
+        finally:
+            depth[path] -= 1
+        return
+    with _locks_guard:
+        lock = _locks.setdefault(path, threading.Lock())
+    with lock:
+        fd = _flock(f"{path}.lock") if fcntl is not None else None
+        depth[path] = 1
+        try:
+            yield
+        finally:
+            depth[path] = 0
+            if fd is not None:
+                # 지운 뒤 풀어야 기다리던 쪽이 지워진 파일임을 알고 다시 잡음
+                os.unlink(f"{path}.lock")
+                fcntl.flock(fd, fcntl.LOCK_UN)
+                os.close(fd)
+
+
+def _flock(lock_path):
+    """lock_path 를 만들어 flock 으로 잡은 fd (잡는 사이 다른 쪽이 지웠으면 다시)"""
+    while True:
+        fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        try:
+            held, current = os.fstat(fd), os.stat(lock_path)
+            if (held.st_dev, held.st_ino) == (current.st_dev, current.st_ino):
+                return fd
+        except FileNotFoundError:
+            pass
+        os.close(fd)
+
+
+def write_json_atomic(path, data, indent=2):
+    """임시 파일에 쓰고 교체 (다른 프로세스가 반쯤 쓴 파일을 읽지 않도록)"""
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with span("json.dump"), open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=indent)
+    os.replace(tmp_path, path)
+
+
+def merge(base, mine, theirs, prefer_mine=False):
+    """base -> mine 변경을 theirs 위에 적용한 결과
+
+    dict 는 키별로 재귀 병합하고 나머지 값(문자열, 목록 등)은 통째로 비교한다.
+    mine 과 theirs 가 같은 값을 서로 다르게 바꿨으면 ConflictError
+    (prefer_mine 이면 mine 의 값을 쓴다).
+    """
+    conflicts = []
+    result = _merge(base, mine, theirs, (), conflicts, prefer_mine)
+    if conflicts:
+        raise ConflictError(conflicts)
+    return {} if result is _MISSING else result
+
+
+def _merge(base, mine, theirs, path, conflicts, prefer_mine):
+    if mine == base or mine == theirs:
+        return theirs
+    if theirs == base:
+        return mine
+    if all(isinstance(value, dict) or value is _MISSING for value in (base, mine, theirs)):
+        base = {} if base is _MISSING else base
+        mine = {} if mine is _MISSING else mine
+        theirs = {} if theirs is _MISSING else theirs
+        result = {}
+        for key in {**theirs, **mine}:
+            value = _merge(base.get(key, _MISSING), mine.get(key, _MISSING), theirs.get(key, _MISSING),
+                           (*path, key), conflicts, prefer_mine)
+            if value is not _MISSING:
+                result[key] = value
+        return result
+    if not prefer_mine:
+        conflicts.append(path)
+    return mine
@@ -0,0 +1,30 @@
+"""환경 변수 기반 설정"""
+import os
+
+# 데이터 파일 위치 (기본: 현재 작업 디렉터리)
+DATA_DIR = os.environ.get("PLANNER_DATA_DIR", ".")
+
+# 데이터 저장 방식: "json" (data_{user}.json / {date}.json), "journal" (json + 추가 전용 저널)
+# 또는 "sqlite" (사용자별 데이터만 해당)
+BACKEND = os.environ.get("PLANNER_BACKEND", "json")
+
+SQLITE_PATH = os.environ.get("PLANNER_SQLITE_PATH", os.path.join(DATA_DIR, "planner.db"))
+
+# journal 저장소: 저널이 이 크기(바이트)를 넘으면 백그라운드에서 스냅샷으로 합침
+JOURNAL_COMPACT_BYTES = int(os.environ.get("PLANNER_JOURNAL_COMPACT_BYTES", 256 * 1024))
+
+# 저널 기록마다 fsync 하여 프로세스/전원 장애에도 기록 보존
+JOURNAL_FSYNC = os.environ.get("PLANNER_JOURNAL_FSYNC", "1") != "0"
+
+# 쓰기 지연: 0 보다 크면 변경을 메모리에 모았다가 최대 이 시간(초) 안에 기록
+# (비정상 종료 시 잃을 수 있는 변경의 최대 시간)
+WRITE_BEHIND_DELAY = float(os.environ.get("PLANNER_WRITE_BEHIND_DELAY", 0))
+
+# 쓰기 지연: 미기록 날짜가 이 개수에 이르면 즉시 기록
+WRITE_BEHIND_MAX_DIRTY = int(os.environ.get("PLANNER_WRITE_BEHIND_MAX_DIRTY", 32))
+
+# 실행 시간 측정: 설정하면 rerun 마다 구간 시간을 이 JSON Lines 파일에 추가
+METRICS_FILE = os.environ.get("PLANNER_METRICS", "")
+
+# 실행 시간 측정: 분위수를 쓰는 Prometheus 텍스트 파일 (기본: METRICS_FILE + ".prom")
+METRICS_PROM_FILE = os.environ.get("PLANNER_METRICS_PROM", "")
@@ -0,0 +1,466 @@
+"""날짜별 파일 구조(web_planner.py)의 읽기/쓰기
+
+하루는 `{YYYY-MM-DD}.json` 하나이며 journal 저장소에서는 `.journal` 이 붙은
+저널 파일이 함께 있다. 여러 날짜는 스레드 풀로 동시에 읽는다.
+
+PLANNER_WRITE_BEHIND_DELAY 가 설정되면 save_tasks 는 쓰기 지연 버퍼에 넣고,
+load_tasks 는 아직 기록되지 않은 값을 먼저 돌려준다.
+
+기록은 날짜 파일마다 파일 잠금 안에서 하고, save_tasks 에 편집 전 값(base)을
+주면 그 사이 다른 세션이 기록한 내용과 슬롯 단위로 병합한다. 슬롯 몇 개만
+고칠 때는 patch_slot / patch_slots 가 잠금 안에서 현재 값을 다시 읽어 해당
+슬롯의 필드만 바꾼다 (journal 저장소는 슬롯마다 저널 한 줄).
+
+블록 작업은 "blocks" 에 구간으로 한 번만 저장하고 화면에서는 expand_blocks 로
+슬롯처럼 펼쳐 본다. 블록 시작/중간/끝을 슬롯마다 저장하던 이전 형식은 그대로
+읽히며, 그 날짜를 고칠 때 또는 `python -m planner.datefiles` 로 구간으로 바뀐다.
+"""
+import json
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+from planner import config
+from planner.cache import clone
+from planner.concurrency import file_lock, merge, write_json_atomic
+from planner.day import BLOCK_END_TEXT, BLOCK_MIDDLE_TEXT, BLOCKS_KEY, Day, slot_time
+from planner.intervals import SLOT_MINUTES, block_index, format_minutes, to_minutes
+from planner.journal import get_document
+from planner.metrics import span, timed
+from planner.recurrence import RULE_KEY, date_book
+from planner.sparse import compact_date_tasks, is_empty_slot
+from planner.writebehind import WriteBehindBuffer
+
+MAX_READ_WORKERS = 8
+EMPTY_TASK = {"text": "", "done": False, "type": "normal"}
+
+
+def get_time_slots():
+    """30분 단위 시간 슬롯 ("00:00" ~ "23:30")"""
+    return [f"{hour:02d}:{minute:02d}" for hour in range(24) for minute in (0, 30)]
+
+
+def get_section_name(hour):
+    """시간대별 섹션 이름"""
+    if 6 <= hour < 12:
+        return "오전"
+    elif 12 <= hour < 18:
+        return "오후"
+    elif 18 <= hour < 24:
+        return "밤"
+    else:
+        return "새벽"
+
+
+def make_block(text, start_time, end_time):
+    """블록 추가 입력 (종료 시간 슬롯 포함) -> 저장할 구간 [start, end)"""
+    if to_minutes(end_time) < to_minutes(start_time):
+        raise ValueError("종료 시간이 시작 시간보다 빠릅니다")
+    return {"text": text, "start": start_time,
+            "end": format_minutes(to_minutes(end_time) + SLOT_MINUTES), "done": False}
+
+
+def expand_blocks(tasks):
+    """저장된 하루 -> 블록을 시작/중간/끝 슬롯으로 펼친 슬롯별 보기 (화면·표 편집용)"""
+    return Day.from_date_tasks(tasks).to_date_tasks()
+
+
+def block_intervals(tasks):
+    """이전 형식: block_start, block_middle..., block_end 로 이어진 슬롯 -> [(시작 분, 끝 분, 시작 슬롯)]"""
+    intervals = []
+    current = None
+    for time_key in sorted(key for key, task in tasks.items() if isinstance(task, dict)):
+        task_type = tasks[time_key].get("type", "normal")
+        minute = to_minutes(time_key)
+        if current is not None and (task_type not in ("block_middle", "block_end") or minute != current[1]):
+            intervals.append(tuple(current))
+            current = None
+        if task_type == "block_start":
+            current = [minute, minute + SLOT_MINUTES, time_key]
+        elif current is not None:
+            current[1] = minute + SLOT_MINUTES
+            if task_type == "block_end":
+                intervals.append(tuple(current))
+                current = None
+    if current is not None:
+        intervals.append(tuple(current))
+    return intervals
+
+
+def collapse_block_chains(tasks):
+    """이전 형식의 블록 슬롯을 blocks 구간으로 바꾼 tasks (이전 형식이 없으면 그대로 반환)
+
+    중간/끝 슬롯에 "→"/"끝" 대신 직접 쓴 내용이 있으면 일반 슬롯으로 남긴다.
+    """
+    chains = block_intervals(tasks)
+    if not chains:
+        return tasks
+    tasks = dict(tasks)
+    blocks = list(tasks.get(BLOCKS_KEY) or [])
+    for start, end, start_key in chains:
+        keys = [slot_time(index) for index in range(start // SLOT_MINUTES, end // SLOT_MINUTES)]
+        slots = [tasks.pop(key) for key in keys]
+        blocks.append({"text": slots[0].get("text", ""), "start": start_key, "end": format_minutes(end),
+                       "done": all(slot.get("done") for slot in slots)})
+        for key, slot in zip(keys[1:], slots[1:]):
+            if slot.get("text") not in ("", BLOCK_MIDDLE_TEXT, BLOCK_END_TEXT):
+                tasks[key] = {"text": slot["text"], "done": bool(slot.get("done")), "type": "normal"}
+    tasks[BLOCKS_KEY] = blocks
+    return tasks
+
+
+def overlapping_blocks(tasks, start_time, end_time):
+    """start_time..end_time (끝 슬롯 포함) 과 겹치는 기존 블록 [(내용, "HH:MM", "HH:MM")]"""
+    blocks = collapse_block_chains(tasks).get(BLOCKS_KEY) or []
+    return [(blocks[i]["text"], blocks[i]["start"], blocks[i]["end"])
+            for i in block_index(blocks).overlapping(to_minutes(start_time), to_minutes(end_time) + SLOT_MINUTES)]
+
+
+def apply_slot_patches(tasks, patches):
+    """{시간: 바꿀 필드} 를 tasks 에 적용
+
+    블록이 덮는 슬롯은 블록에 적용한다: 완료는 블록 전체, 내용은 시작 슬롯에서만
+    (비우면 블록 삭제), 중간/끝 슬롯의 내용은 무시한다.
+    """
+    blocks = tasks.get(BLOCKS_KEY) or []
+    index = block_index(blocks)
+    changed = {}
+    for time_key, fields in patches.items():
+        covering = index.covering(to_minutes(time_key))
+        if covering:
+            # 나중에 추가한 블록이 위에 표시됨
+            position = max(covering)
+            block = changed.setdefault(position, dict(blocks[position]))
+            if "done" in fields:
+                block["done"] = bool(fields["done"])
+            if "text" in fields and time_key == block["start"]:
+                block["text"] = fields["text"]
+            continue
+        task = {**EMPTY_TASK, **tasks.get(time_key, {}), **fields}
+        if is_empty_slot(task):
+            tasks.pop(time_key, None)
+        else:
+            tasks[time_key] = task
+    if changed:
+        tasks[BLOCKS_KEY] = [block for block in (changed.get(i, block) for i, block in enumerate(blocks))
+                             if block.get("text")]
+
+
+def get_tasks_file(date_obj, data_dir=None):
+    data_dir = config.DATA_DIR if data_dir is None else data_dir
+    return os.path.join(data_dir, f"{date_obj.isoformat()}.json")
+
+
+def read_tasks_file(filename):
+    """날짜 파일 하나를 읽음 (없거나 손상되었으면 빈 dict)"""
+    if config.BACKEND == "journal":
+        return get_document(filename).load()
+    if os.path.exists(filename):
+        try:
+            with span("json.load"), open(filename, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    return {}
+
+
+def read_tasks_files(filenames, max_workers=MAX_READ_WORKERS):
+    """여러 날짜 파일을 동시에 읽어 {파일명: tasks} 반환"""
+    filenames = list(filenames)
+    if len(filenames) <= 1:
+        return {filename: read_tasks_file(filename) for filename in filenames}
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(filenames))) as pool:
+        return dict(zip(filenames, pool.map(read_tasks_file, filenames)))
+
+
+@timed()
+def load_tasks(date_obj):
+    """특정 날짜의 작업을 로드 (반복 규칙의 블록 포함)"""
+    return with_occurrences(_load_stored(date_obj), date_book().for_day(date_obj))
+
+
+def _load_stored(date_obj):
+    buffer = get_write_buffer()
+    pending = buffer.get(date_obj.isoformat()) if buffer else None
+    if pending is not None:
+        return clone(pending[0])
+    return read_tasks_file(get_tasks_file(date_obj))
+
+
+def with_occurrences(tasks, occurrences):
+    """저장된 하루에 반복 규칙 블록을 더한 tasks (직접 추가한 블록이 위에 표시됨)"""
+    if not occurrences:
+        return tasks
+    return {**tasks, BLOCKS_KEY: [*clone(occurrences), *(tasks.get(BLOCKS_KEY) or [])]}
+
+
+def without_occurrences(tasks):
+    """반복 규칙 블록을 뺀 저장할 tasks"""
+    blocks = tasks.get(BLOCKS_KEY) or []
+    if not any(RULE_KEY in block for block in blocks):
+        return tasks
+    return {**tasks, BLOCKS_KEY: [block for block in blocks if RULE_KEY not in block]}
+
+
+def _record_exceptions(date_obj, occurrences, tasks):
+    """tasks 의 반복 블록이 occurrences (그 날 펼친 값) 와 다르면 규칙의 그 날 예외로 기록"""
+    edited = {block[RULE_KEY]: block for block in tasks.get(BLOCKS_KEY) or [] if RULE_KEY in block}
+    book = date_book()
+    for original in occurrences:
+        rule_id = original[RULE_KEY]
+        block = edited.get(rule_id)
+        if block is None:
+            book.skip(rule_id, date_obj.isoformat())
+        elif block != original:
+            book.override(rule_id, date_obj.isoformat(),
+                          {key: value for key, value in block.items() if original.get(key) != value})
+
+
+def write_tasks(date_obj, tasks, base=None, prefer_mine=False):
+    """날짜 파일에 바로 기록하고 날짜 색인 갱신, 기록한 tasks 반환
+
+    base 가 현재 파일 내용과 다르면 base -> tasks 변경을 현재 내용에 병합한다.
+    """
+    filename = get_tasks_file(date_obj)
+    with file_lock(filename):
+        if base is not None:
+            current = read_tasks_file(filename)
+            base = compact_date_tasks(base)
+            if current != base:
+                tasks = compact_date_tasks(merge(base, tasks, current, prefer_mine))
+        if config.BACKEND == "journal":
+            # 바뀐 슬롯만 저널에 추가 (빈 날짜는 압축 시 파일 삭제)
+            get_document(filename).save(tasks)
+        else:
+            _write_file(tasks, filename)
+        _record([(date_obj.isoformat(), tasks, filename)])
+    return tasks
+
+
+def _write_file(tasks, filename):
+    if tasks:
+        write_json_atomic(filename, tasks)
+    elif os.path.exists(filename):
+        os.remove(filename)
+
+
+def _record(records, data_dir=None):
+    from planner.manifest import get_manifest
+    from planner.search import date_entries, date_index
+
+    # 날짜 색인 갱신 (주간 보기/통계는 색인만 읽음)
+    get_manifest(data_dir).record_many(records)
+    # 검색 색인은 바뀐 내용만
+    date_index(data_dir).update({date_str: date_entries(tasks) for date_str, tasks, _ in records})
+
+
+def save_tasks(date_obj, tasks, base=None):
+    """작업을 저장하고 저장된 작업(병합 결과) 반환
+
+    base 는 편집을 시작할 때 읽은 값. 같은 슬롯을 다른 세션이 먼저 다르게
+    고쳤으면 ConflictError.
+    """
+    # 기본값(빈 텍스트, 미완료, 일반) 슬롯과 반복 규칙 블록은 저장하지 않음
+    tasks = compact_date_tasks(without_occurrences(tasks))
+    if base is not None:
+        base = without_occurrences(base)
+    buffer = get_write_buffer()
+    if not buffer:
+        return clone(write_tasks(date_obj, tasks, base))
+    date_str = date_obj.isoformat()
+    pending = buffer.get(date_str)
+    if pending is not None:
+        base = pending[1]
+    elif base is None:
+        base = read_tasks_file(get_tasks_file(date_obj))
+    buffer.put(date_str, (clone(tasks), clone(base)))
+    return clone(tasks)
+
+
+def update_tasks(date_obj, change):
+    """change(tasks) 로 저장된 하루를 고치고 적용 후 작업 반환
+
+    파일 잠금 안에서 현재 값을 다시 읽어 고치므로 다른 탭/프로세스가 같은 날의
+    다른 슬롯을 고쳐도 덮어쓰지 않는다 (journal 저장소는 바뀐 키마다 저널 한 줄).
+    이전 형식의 블록 슬롯은 이때 구간으로 바뀐다. change 에는 반복 규칙 블록도
+    들어 있으며, 이를 고치거나 지우면 그 날짜의 규칙 예외로 기록된다.
+    """
+    tasks, record = _update_stored(date_obj, change, date_book().for_day(date_obj))
+    if record:
+        _record([record])
+    return with_occurrences(clone(tasks), date_book().for_day(date_obj))
+
+
+def _update_stored(date_obj, change, occurrences):
+    """update_tasks 의 잠금 안 읽기-고치기-쓰기, (저장된 작업, 날짜 색인에 남길 항목 또는 None) 반환"""
+    filename = get_tasks_file(date_obj)
+    buffer = get_write_buffer()
+    with file_lock(filename):
+        pending = buffer.get(date_obj.isoformat()) if buffer else None
+        current = clone(pending[0]) if pending is not None else read_tasks_file(filename)
+        tasks = with_occurrences(collapse_block_chains(clone(current)), occurrences)
+        change(tasks)
+        _record_exceptions(date_obj, occurrences, tasks)
+        tasks = compact_date_tasks(without_occurrences(tasks))
+        if buffer:
+            base = pending[1] if pending is not None else current
+            buffer.put(date_obj.isoformat(), (clone(tasks), base))
+            return tasks, None
+        if not _write_changes(filename, current, tasks):
+            return tasks, None
+    return tasks, (date_obj.isoformat(), tasks, filename)
+
+
+def _write_changes(filename, current, tasks):
+    """file_lock 안에서 호출: current 에서 tasks 로 바뀐 부분을 기록, 기록했으면 True"""
+    if config.BACKEND == "journal":
+        # 바뀐 슬롯(및 blocks)만 저널에 추가
+        ops = [["set", [key], tasks[key]] if key in tasks else ["del", [key]]
+               for key in sorted({*current, *tasks}) if tasks.get(key) != current.get(key)]
+        if not ops:
+            return False
+        get_document(filename).apply(ops)
+    elif tasks != current:
+        _write_file(tasks, filename)
+    else:
+        return False
+    return True
+
+
+def patch_slots(date_obj, patches):
+    """{시간: 바꿀 필드} 를 저장된 하루에 적용하고 적용 후 작업 반환 (apply_slot_patches)
+
+    지정한 필드만 바꾸므로 다른 탭/프로세스가 같은 날의 다른 슬롯(또는 같은
+    슬롯의 다른 필드)을 고쳐도 덮어쓰지 않는다.
+    """
+    return update_tasks(date_obj, lambda tasks: apply_slot_patches(tasks, patches))
+
+
+def patch_slot(date_obj, time_key, fields):
+    """슬롯 하나의 일부 필드만 저장, 적용 후 하루 작업 반환"""
+    return patch_slots(date_obj, {time_key: fields})
+
+
+def add_block_task(date_obj, text, start_time, end_time):
+    """블록 작업을 구간 하나로 추가 (end_time 슬롯까지), 적용 후 하루 작업 반환"""
+    block = make_block(text, start_time, end_time)
+    return update_tasks(date_obj, lambda tasks: tasks.setdefault(BLOCKS_KEY, []).append(block))
+
+
+@timed()
+def add_block_tasks(dates, text, start_time, end_time, skip_overlapping=False):
+    """같은 블록을 여러 날짜에 추가, (추가한 날짜, 기존 블록과 겹친 날짜) 문자열 목록 반환
+
+    날짜 파일마다 잠금 안에서 한 번 읽고 한 번 기록하며, 반복 규칙은 기간 전체를
+    한 번에 펼치고 날짜 색인은 마지막에 한 번에 갱신한다. skip_overlapping 이면
+    겹친 날짜에는 추가하지 않는다.
+    """
+    block = make_block(text, start_time, end_time)
+    dates = sorted(set(dates))
+    if not dates:
+        return [], []
+    occurrences = date_book().for_range(dates[0], dates[-1])
+    added, overlapped, records = [], [], []
+    for date_obj in dates:
+        date_str = date_obj.isoformat()
+
+        def change(tasks):
+            if overlapping_blocks(tasks, start_time, end_time):
+                overlapped.append(date_str)
+                if skip_overlapping:
+                    return
+            tasks.setdefault(BLOCKS_KEY, []).append(dict(block))
+            added.append(date_str)
+
+        _, record = _update_stored(date_obj, change, occurrences.get(date_str, []))
+        if record:
+            records.append(record)
+    _record(records)
+    return added, overlapped
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_write_buffer():
+    """쓰기 지연이 설정된 경우 날짜 파일용 버퍼, 아니면 None"""
+    global _buffer
+    if config.WRITE_BEHIND_DELAY <= 0:
+        return None
+    with _buffer_lock:
+        if _buffer is None:
+            # 기록 시점의 충돌은 알릴 곳이 없으므로 이 세션의 값으로 정함
+            _buffer = WriteBehindBuffer(
+                lambda date_str, value: write_tasks(date.fromisoformat(date_str), value[0],
+                                                    base=value[1], prefer_mine=True),
+                max_delay=config.WRITE_BEHIND_DELAY,
+                max_dirty=config.WRITE_BEHIND_MAX_DIRTY)
+        return _buffer
+
+
+def pending_tasks():
+    """쓰기 지연 버퍼에서 아직 기록되지 않은 {날짜 문자열: tasks}"""
+    buffer = get_write_buffer()
+    return {date_str: value[0] for date_str, value in buffer.pending().items()} if buffer else {}
+
+
+def flush():
+    """쓰기 지연 버퍼의 미기록 날짜를 모두 기록"""
+    buffer = get_write_buffer()
+    return buffer.flush() if buffer else 0
+
+
+def load_tasks_range(start, end, max_workers=MAX_READ_WORKERS):
+    """start..end (포함) 날짜 -> tasks (반복 규칙 블록 포함)
+
+    날짜 색인에 없는 날짜는 파일을 확인하지 않고 빈 dict 로 채우고, 있는
+    날짜만 동시에 읽는다.
+    """
+    from planner.manifest import get_manifest
+
+    dates = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    pending = pending_tasks()
+    existing = get_manifest().range(start, end)
+    filenames = {date_obj: get_tasks_file(date_obj) for date_obj in dates
+                 if date_obj.isoformat() in existing and date_obj.isoformat() not in pending}
+    loaded = read_tasks_files(filenames.values(), max_workers)
+    occurrences = date_book().for_range(start, end)
+    result = {}
+    for date_obj in dates:
+        if date_obj.isoformat() in pending:
+            tasks = clone(pending[date_obj.isoformat()])
+        else:
+            tasks = loaded[filenames[date_obj]] if date_obj in filenames else {}
+        result[date_obj] = with_occurrences(tasks, occurrences.get(date_obj.isoformat()))
+    return result
+
+
+def migrate_blocks(data_dir=None):
+    """data_dir 의 이전 형식 블록 슬롯을 모두 구간으로 바꾸고 바꾼 날짜 수 반환
+
+    config.DATA_DIR 을 바꾸지 않고 data_dir 의 파일과 색인만 고친다.
+    """
+    from planner.manifest import date_paths
+
+    data_dir = config.DATA_DIR if data_dir is None else data_dir
+    # 쓰기 지연 중인 날짜가 이전 내용으로 덮어쓰지 않도록 먼저 기록
+    flush()
+    records = []
+    for date_str, filename in date_paths(data_dir).items():
+        with file_lock(filename):
+            current = read_tasks_file(filename)
+            if not block_intervals(current):
+                continue
+            tasks = compact_date_tasks(collapse_block_chains(clone(current)))
+            if _write_changes(filename, current, tasks):
+                records.append((date_str, tasks, filename))
+    _record(records, data_dir)
+    return len(records)
+
+
+if __name__ == "__main__":
+    count = migrate_blocks(sys.argv[1] if len(sys.argv) > 1 else None)
+    print(f"날짜 {count}개의 블록을 구간으로 바꿨습니다.")
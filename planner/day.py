@@ -0,0 +1,188 @@
+"""48개 30분 슬롯을 비트마스크로 표현한 하루 데이터
+
+두 저장 형식을 모두 읽을 수 있다.
+
+- 사용자별 형식 (streamlit_app.py): {"09:00-09:30": "운동", "09:00-09:30_completed": True}
+- 날짜별 형식 (web_planner.py): {"09:00": {"text": "운동", "done": True, "type": "normal"}}
+  블록은 "blocks": [{"text", "start", "end", "done"}] 에 구간([start, end))으로 한 번만
+  저장하고, 슬롯으로 볼 때 블록 시작/중간("→")/끝("끝") 슬롯으로 펼친다.
+
+완료/작업 수는 마스크의 popcount 로 계산하므로 통계를 낼 때 슬롯별 dict 를
+만들지 않는다.
+"""
+from array import array
+
+SLOT_COUNT = 48
+ALL_SLOTS = (1 << SLOT_COUNT) - 1
+COMPLETED_SUFFIX = "_completed"
+
+TYPE_NAMES = ("normal", "block_start", "block_middle", "block_end")
+TYPE_CODES = {name: code for code, name in enumerate(TYPE_NAMES)}
+
+BLOCKS_KEY = "blocks"
+BLOCK_MIDDLE_TEXT = "→"
+BLOCK_END_TEXT = "끝"
+
+if hasattr(int, "bit_count"):
+    popcount = int.bit_count
+else:  # Python < 3.10
+    def popcount(value):
+        return bin(value).count("1")
+
+
+def slot_index(key):
+    """"HH:MM" 또는 "HH:MM-HH:MM" -> 0..47"""
+    return int(key[0:2]) * 2 + (1 if int(key[3:5]) >= 30 else 0)
+
+
+def slot_time(index):
+    """0..47 -> "HH:MM" (날짜별 형식의 키)"""
+    return f"{index // 2:02d}:{30 * (index % 2):02d}"
+
+
+def block_slots(block):
+    """날짜별 형식 블록이 차지하는 슬롯 번호 (끝이 슬롯 중간이면 그 슬롯까지)"""
+    end_minutes = int(block["end"][0:2]) * 60 + int(block["end"][3:5])
+    return range(slot_index(block["start"]), min(SLOT_COUNT, (end_minutes + 29) // 30))
+
+
+def slot_key(index):
+    """0..47 -> "HH:MM-HH:MM" (사용자별 형식의 키)"""
+    return f"{slot_time(index)}-{slot_time((index + 1) % SLOT_COUNT)}"
+
+
+class Day:
+    """하루 48슬롯: 내용 마스크, 완료 마스크, 블록 유형 코드, 텍스트 표"""
+
+    __slots__ = ("filled", "done", "types", "texts")
+
+    def __init__(self, filled=0, done=0, types=None, texts=None):
+        self.filled = filled
+        self.done = done
+        # 블록이 없는 날은 유형 배열을 만들지 않음
+        self.types = types
+        self.texts = {} if texts is None else texts
+
+    @classmethod
+    def from_user_tasks(cls, tasks, with_text=True):
+        """사용자별 형식의 tasks dict 에서 생성 (통계만 필요하면 with_text=False)"""
+        day = cls()
+        for key, value in tasks.items():
+            if not value:
+                continue
+            try:
+                index = slot_index(key)
+            except ValueError:
+                continue
+            if key.endswith(COMPLETED_SUFFIX):
+                day.done |= 1 << index
+            else:
+                day.filled |= 1 << index
+                if with_text:
+                    day.texts[index] = value
+        return day
+
+    @classmethod
+    def from_date_tasks(cls, tasks, with_text=True):
+        """날짜별 형식의 tasks dict 에서 생성 (기본값 슬롯은 무시)"""
+        day = cls()
+        for key, task in tasks.items():
+            if not isinstance(task, dict):
+                continue
+            code = TYPE_CODES.get(task.get("type", "normal"), 0)
+            if not (task.get("text") or task.get("done") or code):
+                continue
+            try:
+                index = slot_index(key)
+            except ValueError:
+                continue
+            bit = 1 << index
+            day.filled |= bit
+            if with_text and task.get("text"):
+                day.texts[index] = task["text"]
+            if task.get("done"):
+                day.done |= bit
+            if code:
+                if day.types is None:
+                    day.types = array('B', bytes(SLOT_COUNT))
+                day.types[index] = code
+        # 블록 구간은 슬롯 위에 덮어 표시 (나중 블록이 위)
+        for block in tasks.get(BLOCKS_KEY) or ():
+            slots = block_slots(block)
+            for index in slots:
+                bit = 1 << index
+                day.filled |= bit
+                if block.get("done"):
+                    day.done |= bit
+                else:
+                    day.done &= ~bit
+                if index == slots[0]:
+                    code, text = TYPE_CODES["block_start"], block.get("text", "")
+                elif index == slots[-1]:
+                    code, text = TYPE_CODES["block_end"], BLOCK_END_TEXT
+                else:
+                    code, text = TYPE_CODES["block_middle"], BLOCK_MIDDLE_TEXT
+                if with_text:
+                    day.texts[index] = text
+                if day.types is None:
+                    day.types = array('B', bytes(SLOT_COUNT))
+                day.types[index] = code
+        return day
+
+    def to_user_tasks(self):
+        tasks = {}
+        for index in range(SLOT_COUNT):
+            bit = 1 << index
+            if self.filled & bit and self.texts.get(index):
+                tasks[slot_key(index)] = self.texts[index]
+            if self.done & bit:
+                tasks[slot_key(index) + COMPLETED_SUFFIX] = True
+        return tasks
+
+    def to_date_tasks(self):
+        tasks = {}
+        for index in range(SLOT_COUNT):
+            bit = 1 << index
+            if (self.filled | self.done) & bit:
+                tasks[slot_time(index)] = {
+                    "text": self.texts.get(index, ""),
+                    "done": bool(self.done & bit),
+                    "type": self.type_name(index),
+                }
+        return tasks
+
+    def type_name(self, index):
+        return TYPE_NAMES[self.types[index]] if self.types is not None else "normal"
+
+    @property
+    def task_count(self):
+        """내용이 있는 슬롯 수"""
+        return popcount(self.filled)
+
+    @property
+    def completed_count(self):
+        return popcount(self.done)
+
+    @property
+    def entry_count(self):
+        """내용이 있거나 완료된 슬롯 수 (날짜별 형식의 저장 항목 수)"""
+        return popcount(self.filled | self.done)
+
+    @property
+    def planned_hours(self):
+        return self.task_count * 0.5
+
+    def __repr__(self):
+        return f"Day(filled={self.filled:#014x}, done={self.done:#014x})"
+
+
+def user_day_counts(day_data):
+    """사용자별 형식 하루 -> (작업 수, 완료 수)"""
+    day = Day.from_user_tasks(day_data.get("tasks", {}), with_text=False)
+    return day.task_count, day.completed_count
+
+
+def date_tasks_counts(tasks):
+    """날짜별 형식 하루 -> (항목 수, 완료 수)"""
+    day = Day.from_date_tasks(tasks, with_text=False)
+    return day.entry_count, day.completed_count
@@ -0,0 +1,67 @@
+"""표 편집 모드: 하루 48슬롯을 행 목록으로 만들고 편집 결과와 비교"""
+from planner.day import SLOT_COUNT, slot_key, slot_time
+from planner.sparse import read_slot
+
+TIME_COLUMN = "시간"
+TEXT_COLUMN = "작업"
+DONE_COLUMN = "완료"
+TYPE_COLUMN = "유형"
+BLOCK_COLUMN = "블록"
+
+
+def _cell_text(value):
+    # data_editor 는 비운 셀을 None / NaN 으로 돌려줌
+    return value if isinstance(value, str) else ""
+
+
+def date_grid_rows(tasks):
+    """날짜별 형식 -> 48개 행"""
+    rows = []
+    for index in range(SLOT_COUNT):
+        time_key = slot_time(index)
+        task = tasks.get(time_key, {})
+        rows.append({
+            TIME_COLUMN: time_key,
+            TEXT_COLUMN: task.get("text", ""),
+            DONE_COLUMN: bool(task.get("done", False)),
+            TYPE_COLUMN: task.get("type", "normal"),
+        })
+    return rows
+
+
+def diff_date_grid(tasks, rows):
+    """편집된 행에서 바뀐 슬롯만 {시간: task} 로 반환"""
+    changed = {}
+    for row in rows:
+        time_key = row[TIME_COLUMN]
+        old = tasks.get(time_key, {})
+        text = _cell_text(row[TEXT_COLUMN])
+        done = bool(row[DONE_COLUMN])
+        if text != old.get("text", "") or done != bool(old.get("done", False)):
+            changed[time_key] = {"text": text, "done": done, "type": old.get("type", "normal")}
+    return changed
+
+
+def user_grid_rows(day_tasks, block_names=None):
+    """사용자별 형식 -> 48개 행 (block_names 를 주면 슬롯에 걸친 블록 열 추가, intervals.slot_blocks)"""
+    rows = []
+    for index in range(SLOT_COUNT):
+        key = slot_key(index)
+        text, completed = read_slot(day_tasks, key)
+        row = {TIME_COLUMN: key, TEXT_COLUMN: text, DONE_COLUMN: bool(completed)}
+        if block_names is not None:
+            row[BLOCK_COLUMN] = ", ".join(block_names.get(key, []))
+        rows.append(row)
+    return rows
+
+
+def diff_user_grid(day_tasks, rows):
+    """편집된 행에서 바뀐 슬롯만 [(슬롯, 텍스트, 완료)] 로 반환"""
+    changed = []
+    for row in rows:
+        key = row[TIME_COLUMN]
+        text, completed = _cell_text(row[TEXT_COLUMN]), bool(row[DONE_COLUMN])
+        old_text, old_completed = read_slot(day_tasks, key)
+        if (text, completed) != (old_text, bool(old_completed)):
+            changed.append((key, text, completed))
+    return changed
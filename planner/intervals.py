@@ -0,0 +1,139 @@
+"""블록 작업 구간 색인
+
+블록은 [시작, 끝) 분 단위 구간이다. IntervalIndex 는 구간을 시작 시각 순으로
+정렬한 배열을 균형 이진 트리처럼 보고 (가운데 원소가 루트) 노드마다 하위
+트리의 가장 늦은 끝 시각을 기록해 둔다. 그래서 "이 시각을 덮는 블록",
+"새 블록과 겹치는 블록", "N 분 이상 빈 시간" 을 전체를 훑지 않고
+O(log n + 결과 수) 로 찾는다.
+
+- 하루: block_index(day["block_tasks"]) -> 항목은 block_tasks 의 위치
+- 여러 날: calendar_index(user_data) -> 날짜를 붙인 절대 분, 항목은 (날짜, 위치)
+  (여러 날짜에 한 번에 추가할 때 겹치는 날짜는 overlapping_dates)
+"""
+from bisect import insort
+from datetime import date
+
+from planner.day import SLOT_COUNT, slot_key
+
+MINUTES_PER_DAY = 24 * 60
+SLOT_MINUTES = MINUTES_PER_DAY // SLOT_COUNT
+
+
+def to_minutes(time_str):
+    """"HH:MM" -> 0..1439"""
+    return int(time_str[0:2]) * 60 + int(time_str[3:5])
+
+
+def format_minutes(minutes):
+    """분 -> "HH:MM" (하루의 끝은 "24:00")"""
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+class IntervalIndex:
+    """(시작, 끝, 항목) 구간 색인, 빈 구간(시작 >= 끝)은 무시"""
+
+    def __init__(self, intervals=()):
+        self._items = sorted((start, end, i, item) for i, (start, end, item) in enumerate(intervals)
+                             if start < end)
+        self._build()
+
+    def _build(self):
+        self._max_end = [0] * len(self._items)
+        self._fill(0, len(self._items))
+
+    def _fill(self, lo, hi):
+        if lo >= hi:
+            return None
+        mid = (lo + hi) // 2
+        max_end = self._items[mid][1]
+        for child in (self._fill(lo, mid), self._fill(mid + 1, hi)):
+            if child is not None and child > max_end:
+                max_end = child
+        self._max_end[mid] = max_end
+        return max_end
+
+    def __len__(self):
+        return len(self._items)
+
+    def add(self, start, end, item):
+        """구간 추가 (노드별 끝 시각을 다시 계산하므로 O(n), 블록 수가 적을 때용)"""
+        if start < end:
+            insort(self._items, (start, end, len(self._items), item))
+            self._build()
+
+    def _search(self, start, end, lo, hi, out):
+        if lo >= hi or self._max_end[(lo + hi) // 2] <= start:
+            return
+        mid = (lo + hi) // 2
+        self._search(start, end, lo, mid, out)
+        entry = self._items[mid]
+        if entry[0] < end:
+            if entry[1] > start:
+                out.append(entry)
+            # 오른쪽 하위 트리는 시작이 entry 이후
+            self._search(start, end, mid + 1, hi, out)
+
+    def _overlapping(self, start, end):
+        out = []
+        self._search(start, end, 0, len(self._items), out)
+        return out
+
+    def overlapping(self, start, end):
+        """[start, end) 와 겹치는 구간의 항목 (시작 순)"""
+        return [entry[3] for entry in self._overlapping(start, end)]
+
+    def covering(self, minute):
+        """minute 을 포함하는 구간의 항목"""
+        return self.overlapping(minute, minute + 1)
+
+    def free_gaps(self, start, end, min_length=1):
+        """[start, end) 안에서 어떤 구간도 덮지 않는 min_length 분 이상의 [(시작, 끝)]"""
+        gaps = []
+        cursor = start
+        for entry_start, entry_end, _, _ in self._overlapping(start, end):
+            if entry_start - cursor >= min_length:
+                gaps.append((cursor, entry_start))
+            cursor = max(cursor, entry_end)
+        if end - cursor >= min_length:
+            gaps.append((cursor, end))
+        return gaps
+
+
+def block_index(blocks):
+    """사용자별 형식 하루의 block_tasks -> 항목이 목록 위치인 색인"""
+    return IntervalIndex((to_minutes(block["start"]), to_minutes(block["end"]), i)
+                         for i, block in enumerate(blocks))
+
+
+def calendar_index(user_data):
+    """사용자별 형식 전체 -> 날짜를 붙인 절대 분 색인, 항목은 (날짜, 위치)"""
+    intervals = []
+    for date_str, day in user_data.items():
+        base = day_start(date_str)
+        for i, block in enumerate(day.get("block_tasks", [])):
+            intervals.append((base + to_minutes(block["start"]), base + to_minutes(block["end"]), (date_str, i)))
+    return IntervalIndex(intervals)
+
+
+def overlapping_dates(index, date_strs, start_time, end_time):
+    """calendar_index 에서 start_time..end_time ("HH:MM") 에 블록이 있는 date_strs 날짜"""
+    start, end = to_minutes(start_time), to_minutes(end_time)
+    return [date_str for date_str in date_strs
+            if index.overlapping(day_start(date_str) + start, day_start(date_str) + end)]
+
+
+def day_start(date_str):
+    """calendar_index 에서 날짜의 0시"""
+    return date.fromisoformat(date_str).toordinal() * MINUTES_PER_DAY
+
+
+def slot_blocks(index, blocks):
+    """48개 슬롯 키 -> 그 슬롯에 걸친 블록 이름 목록 (블록이 없는 슬롯은 빠짐)"""
+    names = {}
+    if not len(index):
+        return names
+    for i in range(SLOT_COUNT):
+        covering = index.overlapping(i * SLOT_MINUTES, (i + 1) * SLOT_MINUTES)
+        if covering:
+            names[slot_key(i)] = [blocks[position]["name"] for position in covering]
+    return names
@@ -0,0 +1,284 @@
+"""스냅샷 + 추가 전용 저널 방식의 JSON 문서
+
+변경 사항은 `{path}.journal` 에 한 줄짜리 연산으로 추가되고, 읽을 때는
+스냅샷(`path`) 위에 저널을 재생한다. 저널이 JOURNAL_COMPACT_BYTES 를 넘으면
+백그라운드 스레드가 현재 상태를 새 스냅샷으로 쓰고 저널을 비운다.
+
+연산은 경로 기준 set/del 뿐이라 같은 저널을 여러 번 재생해도 결과가 같다.
+따라서 압축 도중 장애가 나도 (스냅샷 교체 후 저널 정리 전) 안전하게 복구된다.
+
+기록과 압축 교체는 파일 잠금(planner.concurrency.file_lock) 안에서 하므로
+여러 프로세스가 같은 문서에 추가해도 줄이 섞이거나 유실되지 않는다.
+"""
+import json
+import os
+import threading
+
+from planner import config
+from planner.cache import clone, file_stamp
+from planner.concurrency import file_lock
+from planner.metrics import span
+
+
+def apply_op(state, op):
+    """["set", [키...], 값] 또는 ["del", [키...]] 적용"""
+    kind, keys = op[0], op[1]
+    target = state
+    for key in keys[:-1]:
+        child = target.get(key)
+        if not isinstance(child, dict):
+            if kind == "del":
+                return
+            child = target[key] = {}
+        target = child
+    if kind == "set":
+        target[keys[-1]] = clone(op[2])
+    elif kind == "del":
+        target.pop(keys[-1], None)
+    else:
+        raise ValueError(f"알 수 없는 저널 연산: {kind}")
+
+
+def diff_ops(old, new, keys=()):
+    """old 를 new 로 바꾸는 최소 set/del 연산 목록 (dict 는 재귀, 나머지는 통째로 교체)"""
+    ops = []
+    for key in old:
+        if key not in new:
+            ops.append(["del", [*keys, key]])
+    for key, value in new.items():
+        if key not in old:
+            ops.append(["set", [*keys, key], value])
+        elif old[key] != value:
+            if isinstance(value, dict) and isinstance(old[key], dict):
+                ops.extend(diff_ops(old[key], value, (*keys, key)))
+            else:
+                ops.append(["set", [*keys, key], value])
+    return ops
+
+
+class JournaledDocument:
+    """스냅샷 JSON 파일과 저널로 구성된 문서 (프로세스 내 상태 캐시 포함)"""
+
+    def __init__(self, path, compact_bytes=None, fsync=None):
+        self.path = path
+        self.journal_path = f"{path}.journal"
+        self.compact_bytes = config.JOURNAL_COMPACT_BYTES if compact_bytes is None else compact_bytes
+        self.fsync = config.JOURNAL_FSYNC if fsync is None else fsync
+        self._lock = threading.RLock()
+        self._state = None
+        self._stamp = None
+        self._compacting = False
+        self._torn_at = None
+        # 마지막 _read 가 재생한 저널 바이트 수 (압축 시 이 뒤만 남김)
+        self._replayed = 0
+        # view() 로 상태를 내준 뒤에는 기록할 때 고치는 부분만 복사해서 고침
+        self._shared = False
+
+    def _disk_stamp(self):
+        return (file_stamp(self.path), file_stamp(self.journal_path))
+
+    def stamp(self):
+        """스냅샷/저널 파일 상태 (JSON 으로 저장 가능한 형태)"""
+        return [list(stamp) if stamp else None for stamp in self._disk_stamp()]
+
+    def _read(self):
+        state = {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            pass
+        except ValueError:
+            state = {}
+        try:
+            with open(self.journal_path, 'rb') as f:
+                good = 0
+                for line in f:
+                    # 기록 도중 중단된 마지막 줄은 버림
+                    if not line.endswith(b"\n"):
+                        break
+                    try:
+                        op = json.loads(line)
+                    except ValueError:
+                        break
+                    apply_op(state, op)
+                    good += len(line)
+                f.seek(0, os.SEEK_END)
+                # 다른 프로세스가 쓰는 중일 수 있으므로 자르기는 잠금 안에서 (apply)
+                self._torn_at = good if f.tell() > good else None
+                self._replayed = good
+        except FileNotFoundError:
+            self._torn_at = None
+            self._replayed = 0
+        return state
+
+    def _ensure(self):
+        stamp = self._disk_stamp()
+        if self._state is None or stamp != self._stamp:
+            # 읽기 전에 찍은 상태를 남김 (읽는 도중 추가된 기록은 다음 읽기에서 반영)
+            with span("json.load"):
+                self._state = self._read()
+            self._shared = False
+            self._stamp = stamp
+
+    def load(self):
+        with self._lock:
+            self._ensure()
+            return clone(self._state)
+
+    def view(self):
+        """현재 상태를 복사하지 않고 반환 (읽기 전용, 이후 기록은 새 객체에 반영)"""
+        with self._lock:
+            self._ensure()
+            self._shared = True
+            return self._state
+
+    def _unshare(self, ops):
+        """view() 로 내준 상태를 고치지 않도록 최상위와 ops 가 고칠 최상위 값만 복사"""
+        if not self._shared:
+            return
+        self._state = dict(self._state)
+        for key in {op[1][0] for op in ops if len(op[1]) > 1}:
+            if key in self._state:
+                self._state[key] = clone(self._state[key])
+        self._shared = False
+
+    def read(self, *keys):
+        """keys 경로의 값 복사본 (없으면 None)"""
+        with self._lock:
+            self._ensure()
+            value = self._state
+            for key in keys:
+                if not isinstance(value, dict) or key not in value:
+                    return None
+                value = value[key]
+            return clone(value)
+
+    def apply(self, ops):
+        """연산을 저널에 추가하고 메모리 상태에 반영, 기록한 연산 반환"""
+        if not ops:
+            return ops
+        payload = "".join(json.dumps(op, ensure_ascii=False) + "\n" for op in ops).encode('utf-8')
+        with file_lock(self.path), self._lock:
+            self._ensure()
+            self._truncate_torn()
+            with open(self.journal_path, 'ab') as f:
+                f.write(payload)
+                f.flush()
+                if self.fsync:
+                    os.fsync(f.fileno())
+            self._unshare(ops)
+            for op in ops:
+                apply_op(self._state, op)
+            self._stamp = self._disk_stamp()
+            journal_size = self._stamp[1][1] if self._stamp[1] else 0
+            # 잠금 안에서 저널 끝까지 반영했으므로 재생 위치도 끝
+            self._replayed = journal_size
+            if journal_size >= self.compact_bytes and not self._compacting:
+                self._compacting = True
+                threading.Thread(target=self._compact_in_background, daemon=True).start()
+        return ops
+
+    def _truncate_torn(self):
+        """기록 도중 중단된 저널 끝부분을 잘라냄 (file_lock 안에서)"""
+        if self._torn_at is not None:
+            with open(self.journal_path, 'r+b') as f:
+                f.truncate(self._torn_at)
+            self._torn_at = None
+            self._stamp = self._disk_stamp()
+
+    def save(self, data, keys=()):
+        """keys 경로의 값을 data 로 만드는 차이만 저널에 기록, 기록한 연산 반환"""
+        with file_lock(self.path), self._lock:
+            self._ensure()
+            current = self._state
+            for key in keys:
+                current = current.get(key) if isinstance(current, dict) else None
+            if isinstance(current, dict) and isinstance(data, dict):
+                ops = diff_ops(current, data, tuple(keys))
+            elif keys:
+                ops = [] if current == data else [["set", list(keys), data]]
+            else:
+                raise TypeError("문서 최상위 값은 dict 여야 합니다")
+            return self.apply(ops)
+
+    def _compact_in_background(self):
+        try:
+            self.compact()
+        finally:
+            self._compacting = False
+
+    def compact(self):
+        """현재 상태를 새 스냅샷으로 쓰고 반영된 저널 앞부분을 제거"""
+        # 상태와 재생한 저널 위치가 어긋나지 않도록 다른 기록을 막고 읽음
+        with file_lock(self.path), self._lock:
+            self._ensure()
+            self._truncate_torn()
+            state = clone(self._state)
+            snapshot_stamp = self._stamp[0]
+            offset = self._replayed
+        # 스냅샷 쓰기는 잠금 밖에서 (그동안의 기록은 저널 뒤에 계속 추가됨)
+        # 백그라운드 압축과 겹칠 수 있으므로 스레드마다 다른 임시 파일
+        tmp_snapshot = f"{self.path}.{os.getpid()}.{threading.get_ident()}.compact"
+        with open(tmp_snapshot, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        with file_lock(self.path), self._lock:
+            # 그 사이 다른 프로세스가 먼저 압축했으면 이번 스냅샷은 버림
+            journal_stamp = file_stamp(self.journal_path)
+            if (file_stamp(self.path) != snapshot_stamp
+                    or (journal_stamp[1] if journal_stamp else 0) < offset):
+                os.remove(tmp_snapshot)
+                return
+            try:
+                with open(self.journal_path, 'rb') as f:
+                    f.seek(offset)
+                    tail = f.read()
+            except FileNotFoundError:
+                tail = b""
+            if not state and not tail:
+                os.remove(tmp_snapshot)
+                for path in (self.path, self.journal_path):
+                    if os.path.exists(path):
+                        os.remove(path)
+            else:
+                os.replace(tmp_snapshot, self.path)
+                if tail:
+                    tmp_journal = f"{self.journal_path}.tmp"
+                    with open(tmp_journal, 'wb') as f:
+                        f.write(tail)
+                        f.flush()
+                        os.fsync(f.fileno())
+                    os.replace(tmp_journal, self.journal_path)
+                elif os.path.exists(self.journal_path):
+                    os.remove(self.journal_path)
+            # 남긴 저널에는 스냅샷을 쓰는 동안 다른 프로세스가 추가한 기록이 있을 수 있으므로 다시 읽게 함
+            self._stamp = None
+
+
+_documents = {}
+_documents_lock = threading.Lock()
+
+
+def get_document(path):
+    """경로별로 공유되는 JournaledDocument"""
+    with _documents_lock:
+        doc = _documents.get(path)
+        if doc is None:
+            doc = _documents[path] = JournaledDocument(path)
+        return doc
+
+
+def release_document(path):
+    """공유 문서를 메모리에서 뺌 (문서를 많이 차례로 읽을 때, 압축 중이면 그대로 둠)"""
+    with _documents_lock:
+        doc = _documents.get(path)
+        if doc is not None and not doc._compacting:
+            del _documents[path]
+
+
+def clear_documents():
+    """공유 문서의 메모리 상태를 버림 (다음 읽기는 디스크에서, 벤치마크용)"""
+    with _documents_lock:
+        _documents.clear()
@@ -0,0 +1,174 @@
+"""날짜별 파일 구조(web_planner.py)의 날짜 색인
+
+`planner_manifest.json` 에 날짜마다 파일 크기, 작업 수, 완료 수, 수정 시각과
+슬롯 마스크(내용, 완료, 블록이 덮은 슬롯)를 기록한다. save_tasks 가 저장할 때마다 해당 날짜 항목만 갱신하므로 (저널
+문서라 한 줄 추가) 주간 보기/통계는 날짜 파일을 열지 않고 색인 하나로
+답할 수 있고, 파일이 없는 날짜는 파일 시스템을 확인하지 않고 건너뛴다.
+
+색인이 없으면 처음 읽을 때 날짜 파일을 한 번 훑어 만든다. 다른 방법으로
+날짜 파일을 고쳤다면 다시 만든다::
+
+    python -m planner.manifest [데이터 디렉터리]
+"""
+import glob
+import os
+import re
+import sys
+import threading
+import time
+
+from planner import config
+from planner.day import BLOCKS_KEY, Day, popcount
+from planner.datefiles import pending_tasks, read_tasks_files, with_occurrences
+from planner.journal import get_document
+from planner.recurrence import date_book
+
+MANIFEST_NAME = "planner_manifest.json"
+DATE_FILE_RE = re.compile(r"^(\d{4}-\d{2}-\d{2})\.json$")
+
+
+def date_paths(data_dir):
+    """data_dir 의 날짜 파일 (저널만 있는 날짜 포함) {날짜: 경로}, 날짜 순"""
+    names = {os.path.basename(p) for p in glob.glob(os.path.join(data_dir, "*.json"))}
+    names |= {os.path.basename(p)[:-len(".journal")]
+              for p in glob.glob(os.path.join(data_dir, "*.json.journal"))}
+    paths = {}
+    for name in sorted(names):
+        match = DATE_FILE_RE.match(name)
+        if match:
+            paths[match.group(1)] = os.path.join(data_dir, name)
+    return paths
+
+
+def _files_size(path):
+    size = 0
+    for candidate in (path, f"{path}.journal"):
+        try:
+            size += os.path.getsize(candidate)
+        except OSError:
+            pass
+    return size
+
+
+def make_entry(tasks, path):
+    day = Day.from_date_tasks(tasks, with_text=False)
+    blocks = Day.from_date_tasks({BLOCKS_KEY: tasks.get(BLOCKS_KEY) or []}, with_text=False)
+    return {"size": _files_size(path), "tasks": day.entry_count, "completed": day.completed_count,
+            "modified": round(time.time(), 3), "filled": day.filled, "done": day.done, "blocks": blocks.filled}
+
+
+def occurrence_masks(entry, occurrences):
+    """색인 항목의 마스크에 반복 블록을 더한 (내용, 완료) 마스크
+
+    with_occurrences 처럼 반복 블록은 저장된 슬롯 위, 저장된 블록 아래에 놓인다.
+    저장된 블록이 덮은 슬롯의 완료 여부는 그대로이고, 나머지는 반복 블록이
+    덮은 슬롯만 반복 블록의 완료 여부로 바뀐다.
+    """
+    entry = entry or {}
+    filled, done, blocks = entry.get("filled", 0), entry.get("done", 0), entry.get("blocks", 0)
+    rule = Day.from_date_tasks({BLOCKS_KEY: occurrences}, with_text=False)
+    done = (done & blocks) | (~blocks & ((done & ~rule.filled) | rule.done))
+    return filled | rule.filled, done
+
+
+class DateManifest:
+    """{"dates": {날짜: {"size", "tasks", "completed", "modified"}}} 색인"""
+
+    def __init__(self, data_dir=None):
+        self.data_dir = config.DATA_DIR if data_dir is None else data_dir
+        self.path = os.path.join(self.data_dir, MANIFEST_NAME)
+        self._lock = threading.Lock()
+
+    def _doc(self):
+        doc = get_document(self.path)
+        if not os.path.exists(self.path) and not os.path.exists(doc.journal_path):
+            with self._lock:
+                if not os.path.exists(self.path) and not os.path.exists(doc.journal_path):
+                    self.rebuild()
+        return doc
+
+    def entries(self):
+        return self._doc().read("dates") or {}
+
+    def get(self, date_str):
+        return self._doc().read("dates", date_str)
+
+    def range(self, start, end):
+        """start..end (포함) 날짜 중 작업이 있는 날짜의 항목
+
+        쓰기 지연 중인 날짜와 반복 규칙 블록을 반영한다. 규칙 블록은 항목의
+        슬롯 마스크에 더해 세므로 날짜 파일을 읽지 않는다 (마스크가 없는 이전
+        색인 항목만 파일을 읽음, `python -m planner.manifest` 로 다시 만들면 됨).
+        """
+        start_str, end_str = start.isoformat(), end.isoformat()
+        entries = {date_str: entry for date_str, entry in self.entries().items()
+                   if start_str <= date_str <= end_str}
+        pending = {date_str: tasks for date_str, tasks in pending_tasks().items()
+                   if start_str <= date_str <= end_str}
+        occurrences = date_book(self.data_dir).for_range(start, end)
+        paths = {date_str: os.path.join(self.data_dir, f"{date_str}.json") for date_str in occurrences
+                 if date_str in entries and date_str not in pending and "filled" not in entries[date_str]}
+        loaded = read_tasks_files(paths.values())
+        for date_str in {*pending, *occurrences}:
+            if date_str in pending or date_str in paths:
+                tasks = pending[date_str] if date_str in pending else loaded[paths[date_str]]
+                tasks = with_occurrences(tasks, occurrences.get(date_str))
+                if not tasks:
+                    entries.pop(date_str, None)
+                    continue
+                day = Day.from_date_tasks(tasks, with_text=False)
+                filled, done = day.filled, day.done
+            else:
+                filled, done = occurrence_masks(entries.get(date_str), occurrences[date_str])
+            entries[date_str] = {**entries.get(date_str, {"size": 0}), "tasks": popcount(filled | done),
+                                 "completed": popcount(done), "modified": round(time.time(), 3)}
+        return dict(sorted(entries.items()))
+
+    def record(self, date_str, tasks, path):
+        """save_tasks 후 호출: 비어 있는 날짜는 항목 삭제"""
+        self.record_many([(date_str, tasks, path)])
+
+    def record_many(self, records):
+        """[(날짜, tasks, 경로)] 를 저널 기록 한 번으로 반영"""
+        doc = self._doc()
+        ops = []
+        for date_str, tasks, path in records:
+            if tasks:
+                ops.append(["set", ["dates", date_str], make_entry(tasks, path)])
+            elif doc.read("dates", date_str) is not None:
+                ops.append(["del", ["dates", date_str]])
+        if ops:
+            doc.apply(ops)
+
+    def rebuild(self):
+        """날짜 파일(및 저널)을 모두 읽어 색인을 새로 만듦"""
+        entries = {}
+        paths = date_paths(self.data_dir)
+        loaded = read_tasks_files(paths.values())
+        for date_str, path in paths.items():
+            tasks = loaded[path]
+            if tasks:
+                entry = make_entry(tasks, path)
+                entry["modified"] = round(os.path.getmtime(
+                    path if os.path.exists(path) else f"{path}.journal"), 3)
+                entries[date_str] = entry
+        doc = get_document(self.path)
+        doc.save({"dates": entries})
+        doc.compact()
+        return entries
+
+
+_manifests = {}
+
+
+def get_manifest(data_dir=None):
+    data_dir = config.DATA_DIR if data_dir is None else data_dir
+    manifest = _manifests.get(data_dir)
+    if manifest is None:
+        manifest = _manifests.setdefault(data_dir, DateManifest(data_dir))
+    return manifest
+
+
+if __name__ == "__main__":
+    manifest = DateManifest(sys.argv[1] if len(sys.argv) > 1 else None)
+    print(f"날짜 {len(manifest.rebuild())}개의 색인을 만들었습니다.")
@@ -0,0 +1,173 @@
+"""실행(rerun)별 시간 측정 (PLANNER_METRICS 를 설정한 경우에만)
+
+앱 스크립트 한 번 실행을 rerun() 으로 감싸고, 그 안의 구간은 span() 또는
+@timed 로 잰다. rerun 이 끝나면 구간 목록을 JSON Lines 파일에 한 줄로
+추가하고, 구간 이름별 최근 ROLLING_WINDOW 개 값의 p50/p95/p99 를 Prometheus
+텍스트 형식 파일(node_exporter textfile collector 등으로 수집)로 다시 쓴다.
+
+rerun() 밖에서 시작된 구간(fragment 재실행 등)은 그 구간 자체를 하나의
+실행으로 기록한다. 설정하지 않으면 span/timed 는 아무 일도 하지 않는다.
+
+    PLANNER_METRICS=metrics.jsonl streamlit run web_planner.py
+
+앱 프로세스가 여럿이면 PLANNER_METRICS_PROM 에 "{pid}" 를 넣어 프로세스마다
+다른 파일을 쓰게 한다 (JSON Lines 파일은 한 줄씩 추가하므로 공유해도 됨).
+"""
+import atexit
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+
+from planner import config
+
+ROLLING_WINDOW = 1000
+PROM_WRITE_INTERVAL = 1.0
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class Histogram:
+    """최근 값 window 개의 분위수와 누적 합계/개수"""
+
+    def __init__(self, window=ROLLING_WINDOW):
+        self.values = deque(maxlen=window)
+        self.total = 0.0
+        self.count = 0
+
+    def add(self, seconds):
+        self.values.append(seconds)
+        self.total += seconds
+        self.count += 1
+
+    def quantiles(self):
+        ordered = sorted(self.values)
+        if not ordered:
+            return {q: 0.0 for q in QUANTILES}
+        # nearest-rank
+        return {q: ordered[max(0, math.ceil(q * len(ordered)) - 1)] for q in QUANTILES}
+
+
+class Recorder:
+    def __init__(self, path, prom_path):
+        self.path = path
+        self.prom_path = prom_path
+        self.histograms = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._prom_written = 0.0
+
+    def _observe(self, name, seconds):
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.add(seconds)
+
+    @contextmanager
+    def rerun(self, script):
+        if getattr(self._local, "spans", None) is not None:
+            yield
+            return
+        self._local.spans = spans = []
+        self._local.depth = 0
+        self._local.started = started = time.perf_counter()
+        try:
+            yield
+        finally:
+            total = time.perf_counter() - started
+            self._local.spans = None
+            self._observe(f"rerun:{script}", total)
+            self._write(script, total, spans)
+
+    @contextmanager
+    def span(self, name):
+        if getattr(self._local, "spans", None) is None:
+            # rerun 밖 (fragment 재실행 등): 구간 자체를 실행 하나로 기록
+            with self.rerun(name), self.span(name):
+                yield
+            return
+        spans = self._local.spans
+        depth = self._local.depth
+        self._local.depth = depth + 1
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - started
+            self._local.depth = depth
+            spans.append({"name": name, "start_ms": round((started - self._local.started) * 1000, 3),
+                          "ms": round(seconds * 1000, 3), "depth": depth})
+            self._observe(name, seconds)
+
+    def _write(self, script, total, spans):
+        line = json.dumps({"ts": round(time.time(), 3), "script": script,
+                           "total_ms": round(total * 1000, 3), "spans": spans}, ensure_ascii=False)
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line + "\n")
+            now = time.monotonic()
+            if now - self._prom_written >= PROM_WRITE_INTERVAL:
+                self._prom_written = now
+                self._write_prom()
+
+    def prometheus_text(self):
+        lines = ["# HELP planner_span_seconds Daily Planner 구간 실행 시간 (최근 값 기준 분위수)",
+                 "# TYPE planner_span_seconds summary"]
+        for name, histogram in sorted(self.histograms.items()):
+            label = name.replace("\\", "\\\\").replace('"', '\\"')
+            for q, value in histogram.quantiles().items():
+                lines.append(f'planner_span_seconds{{name="{label}",quantile="{q}"}} {value:.6f}')
+            lines.append(f'planner_span_seconds_sum{{name="{label}"}} {histogram.total:.6f}')
+            lines.append(f'planner_span_seconds_count{{name="{label}"}} {histogram.count}')
+        return "\n".join(lines) + "\n"
+
+    def _write_prom(self):
+        tmp_path = f"{self.prom_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.prometheus_text())
+        os.replace(tmp_path, self.prom_path)
+
+    def flush(self):
+        with self._lock:
+            self._write_prom()
+
+
+recorder = None
+if config.METRICS_FILE:
+    recorder = Recorder(config.METRICS_FILE,
+                        (config.METRICS_PROM_FILE or f"{config.METRICS_FILE}.prom").replace("{pid}", str(os.getpid())))
+    atexit.register(recorder.flush)
+
+
+@contextmanager
+def _nothing():
+    yield
+
+
+def rerun(script):
+    """앱 스크립트 한 번 실행"""
+    return recorder.rerun(script) if recorder else _nothing()
+
+
+def span(name):
+    """rerun 안의 측정 구간"""
+    return recorder.span(name) if recorder else _nothing()
+
+
+def timed(name=None):
+    """함수 호출 전체를 구간으로 재는 데코레이터"""
+    def decorate(fn):
+        label = name or fn.__name__
+        if recorder is None:
+            return fn
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with recorder.span(label):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
@@ -0,0 +1,275 @@
+"""날짜별 형식(web_planner.py) <-> 사용자별 형식(streamlit_app.py) 이전, 저장소 간 이전
+
+- per-date -> per-user: 날짜 파일 전체를 한 사용자의 기록으로 ("09:00" -> "09:00-09:30")
+- per-user -> per-date: 한 사용자의 기록을 날짜 파일로
+- per-user -> per-user: 모든 (또는 지정한) 사용자를 다른 저장소/디렉터리로
+
+작업은 달(per-date 원본, per-user -> per-date) 또는 사용자 단위로 나눠 프로세스
+풀에서 실행한다. 단위마다 원본과 기록 후 다시 읽은 결과를 같은 중립 형태(슬롯
+{"HH:MM": [내용, 완료]}, 블록 [내용, 시작, 끝, 완료])로 바꿔 레코드 수와
+SHA-256 을 비교하고, 일치한 단위만 대상 디렉터리의 planner_migration.json 에
+완료로 남긴다. 중단되면 같은 명령을 다시 실행해 남은 단위만 이어 한다
+(단위는 하루를 통째로 바꾸므로 다시 실행해도 결과가 같다).
+
+    python -m planner.migration per-date per-user --user 홍길동_1234 --backend sqlite
+    python -m planner.migration per-user per-date --user 홍길동_1234 --target-dir ./dates
+    python -m planner.migration per-user per-user --source-backend json --backend sqlite --workers 8
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date
+
+from planner import config
+from planner.datefiles import collapse_block_chains, write_tasks
+from planner.day import BLOCKS_KEY, slot_index, slot_key, slot_time
+from planner.journal import JournaledDocument, get_document
+from planner.manifest import date_paths
+from planner.recurrence import date_book, user_book
+from planner.sparse import compact_date_tasks, set_slot
+from planner.storage import empty_day, open_store, split_tasks
+
+LAYOUTS = ("per-date", "per-user")
+DATE_BACKENDS = ("json", "journal")
+STATE_NAME = "planner_migration.json"
+DEFAULT_BLOCK_COLOR = "#FF6B6B"
+# 반복 규칙 블록/예외의 필드 이름 (사용자별 -> 날짜별)
+RULE_FIELDS = {"name": "text", "completed": "done"}
+
+
+def date_to_user_day(tasks):
+    """날짜별 형식 하루 -> 사용자별 형식 하루"""
+    tasks = collapse_block_chains(tasks)
+    day = empty_day()
+    for key, task in tasks.items():
+        if isinstance(task, dict):
+            set_slot(day["tasks"], slot_key(slot_index(key)), task.get("text", ""), bool(task.get("done")))
+    for block in tasks.get(BLOCKS_KEY) or []:
+        day["block_tasks"].append({"name": block.get("text", ""), "start": block["start"], "end": block["end"],
+                                   "color": DEFAULT_BLOCK_COLOR, "completed": bool(block.get("done"))})
+    return day
+
+
+def user_to_date_tasks(day):
+    """사용자별 형식 하루 -> 날짜별 형식 하루 (블록 색은 버림)"""
+    tasks = {}
+    for slot, (text, done) in split_tasks(day.get("tasks", {})).items():
+        tasks[slot_time(slot_index(slot))] = {"text": text, "done": done, "type": "normal"}
+    blocks = [{"text": block["name"], "start": block["start"], "end": block["end"],
+               "done": bool(block.get("completed"))} for block in day.get("block_tasks", [])]
+    if blocks:
+        tasks[BLOCKS_KEY] = blocks
+    return compact_date_tasks(tasks)
+
+
+def neutral_user_day(day):
+    slots = {slot_time(slot_index(slot)): value for slot, value in split_tasks(day.get("tasks", {})).items()}
+    blocks = [[block["name"], block["start"], block["end"], bool(block.get("completed"))]
+              for block in day.get("block_tasks", [])]
+    return {"slots": slots, "blocks": blocks}
+
+
+def neutral_date_day(tasks):
+    tasks = collapse_block_chains(tasks)
+    slots = {key: [task.get("text", ""), bool(task.get("done"))] for key, task in tasks.items()
+             if isinstance(task, dict) and (task.get("text") or task.get("done"))}
+    blocks = [[block.get("text", ""), block["start"], block["end"], bool(block.get("done"))]
+              for block in tasks.get(BLOCKS_KEY) or []]
+    return {"slots": slots, "blocks": blocks}
+
+
+def summarize(days):
+    """{날짜: 중립 형태 하루} -> (레코드 수, SHA-256), 빈 날짜는 제외"""
+    days = {date_str: day for date_str, day in days.items() if day["slots"] or day["blocks"]}
+    count = sum(len(day["slots"]) + len(day["blocks"]) for day in days.values())
+    text = json.dumps(days, sort_keys=True, ensure_ascii=False)
+    return count, hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def convert_rule(rule, to_layout):
+    """반복 규칙의 블록과 예외 필드를 to_layout 형식으로"""
+    fields = RULE_FIELDS if to_layout == "per-date" else {new: old for old, new in RULE_FIELDS.items()}
+
+    def rename(values):
+        return {fields.get(key, key): value for key, value in values.items()}
+
+    block = rename(rule["block"])
+    if to_layout == "per-date":
+        block.pop("color", None)
+    else:
+        block.setdefault("color", DEFAULT_BLOCK_COLOR)
+    return {**rule, "block": block,
+            "overrides": {date_str: rename(values) for date_str, values in rule.get("overrides", {}).items()}}
+
+
+def _read_date_file(path):
+    # 원본은 저장소 설정과 무관하게 (json 이든 저널이든) 읽고 공유 캐시에 남기지 않음
+    return JournaledDocument(path).load()
+
+
+_open_stores = {}
+
+
+def _store(backend, data_dir):
+    """작업 프로세스 안에서 재사용하는 저장소"""
+    key = (backend, data_dir)
+    if key not in _open_stores:
+        _open_stores[key] = open_store(backend, data_dir)
+    return _open_stores[key]
+
+
+def _init_worker(target_dir, backend):
+    # 날짜별 형식 기록(write_tasks)과 날짜 색인은 config 를 따름
+    config.DATA_DIR = target_dir
+    config.BACKEND = backend
+    config.WRITE_BEHIND_DELAY = 0
+
+
+def run_unit(job, unit):
+    """단위 하나를 이전하고 (단위, 원본 요약, 기록 후 요약) 반환"""
+    source, target = job["source"], job["target"]
+    if source == "per-date":
+        month_paths = {date_str: path for date_str, path in date_paths(job["source_dir"]).items()
+                       if date_str.startswith(unit)}
+        loaded = {date_str: _read_date_file(path) for date_str, path in month_paths.items()}
+        expected = summarize({date_str: neutral_date_day(tasks) for date_str, tasks in loaded.items()})
+        store = _store(job["backend"], job["target_dir"])
+        store.save_days(job["user"], {date_str: date_to_user_day(tasks) for date_str, tasks in loaded.items()})
+        written = store.load_user(job["user"])
+        actual = summarize({date_str: neutral_user_day(written.get(date_str, empty_day()))
+                            for date_str in loaded})
+        store.release(job["user"])
+    elif target == "per-date":
+        data = _store(job["source_backend"], job["source_dir"]).load_user(job["user"])
+        days = {date_str: day for date_str, day in data.items() if date_str.startswith(unit)}
+        expected = summarize({date_str: neutral_user_day(day) for date_str, day in days.items()})
+        for date_str, day in days.items():
+            write_tasks(date.fromisoformat(date_str), user_to_date_tasks(day))
+        actual = summarize({date_str: neutral_date_day(_read_date_file(
+            os.path.join(job["target_dir"], f"{date_str}.json"))) for date_str in days})
+    else:
+        source_store = _store(job["source_backend"], job["source_dir"])
+        target_store = _store(job["backend"], job["target_dir"])
+        data = source_store.load_user(unit)
+        expected = summarize({date_str: neutral_user_day(day) for date_str, day in data.items()})
+        target_store.save_days(unit, data)
+        written = target_store.load_user(unit)
+        actual = summarize({date_str: neutral_user_day(written.get(date_str, empty_day())) for date_str in data})
+        if job["source_dir"] != job["target_dir"]:
+            target_book = user_book(unit, job["target_dir"])
+            for rule in user_book(unit, job["source_dir"]).rules().values():
+                target_book.add(rule)
+        source_store.release(unit)
+        target_store.release(unit)
+    return unit, expected, actual
+
+
+def _units(job):
+    if job["source"] == "per-date":
+        return sorted({date_str[:7] for date_str in date_paths(job["source_dir"])})
+    store = open_store(job["source_backend"], job["source_dir"])
+    if job["target"] == "per-date":
+        return sorted({date_str[:7] for date_str in store.load_user(job["user"])})
+    return job["users"] or store.usernames()
+
+
+def _copy_rules(job):
+    """per-date <-> per-user 의 반복 규칙 (규칙 id 가 같으므로 다시 실행해도 한 번)"""
+    if job["source"] == "per-date":
+        source, target = date_book(job["source_dir"]), user_book(job["user"], job["target_dir"])
+    else:
+        source, target = user_book(job["user"], job["source_dir"]), date_book(job["target_dir"])
+    for rule in source.rules().values():
+        target.add(convert_rule(rule, job["target"]))
+
+
+def migrate(source, target, user=None, users=None, source_dir=None, source_backend=None,
+            target_dir=None, backend=None, workers=None, restart=False, progress=None):
+    """source 형식을 target 형식으로 이전하고 결과 요약 반환
+
+    progress(단위, 원본 요약, 기록 후 요약) 는 단위가 끝날 때마다 호출된다.
+    """
+    if source not in LAYOUTS or target not in LAYOUTS:
+        raise ValueError(f"형식은 {', '.join(LAYOUTS)} 중 하나입니다")
+    source_dir = config.DATA_DIR if source_dir is None else source_dir
+    target_dir = source_dir if target_dir is None else target_dir
+    source_backend = source_backend or config.BACKEND
+    backend = backend or config.BACKEND
+    if source != target and not user:
+        raise ValueError("형식을 바꿀 때는 사용자(--user)가 필요합니다")
+    if target == "per-date" and backend not in DATE_BACKENDS:
+        raise ValueError(f"날짜별 형식의 저장소는 {', '.join(DATE_BACKENDS)} 중 하나입니다")
+    if source == target == "per-user" and (source_dir, source_backend) == (target_dir, backend):
+        raise ValueError("원본과 대상 저장소가 같습니다")
+    if source == target == "per-date":
+        raise ValueError("날짜별 형식끼리는 파일을 복사하면 됩니다")
+    os.makedirs(target_dir, exist_ok=True)
+    job = {"source": source, "target": target, "user": user, "users": users, "source_dir": source_dir,
+           "source_backend": source_backend, "target_dir": target_dir, "backend": backend}
+
+    state = get_document(os.path.join(target_dir, STATE_NAME))
+    job_id = f"{source}:{source_backend}:{os.path.abspath(source_dir)}>{target}:{backend}:{user or '*'}"
+    if restart:
+        state.apply([["del", ["jobs", job_id]]])
+    done = state.read("jobs", job_id, "done") or {}
+    units = _units(job)
+    todo = [unit for unit in units if unit not in done]
+    summary = {"units": len(units), "skipped": len(units) - len(todo), "migrated": 0, "records": 0,
+               "mismatched": [], "failed": {}}
+    if source != target:
+        _copy_rules(job)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(target_dir, backend)) as pool:
+        futures = {pool.submit(run_unit, job, unit): unit for unit in todo}
+        for future in as_completed(futures):
+            unit = futures[future]
+            try:
+                _, expected, actual = future.result()
+            except Exception as e:
+                summary["failed"][unit] = str(e)
+                continue
+            if expected == actual:
+                state.apply([["set", ["jobs", job_id, "done", unit], {"records": actual[0], "sha256": actual[1]}]])
+                summary["migrated"] += 1
+                summary["records"] += actual[0]
+            else:
+                summary["mismatched"].append(unit)
+            if progress:
+                progress(unit, expected, actual)
+    summary["mismatched"].sort()
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Daily Planner 형식/저장소 이전")
+    parser.add_argument("source", choices=LAYOUTS, help="원본 형식")
+    parser.add_argument("target", choices=LAYOUTS, help="대상 형식")
+    parser.add_argument("--user", help="형식을 바꿀 때의 사용자 키 (아이디_비밀번호)")
+    parser.add_argument("--users", nargs="+", help="per-user -> per-user 에서 이 사용자만")
+    parser.add_argument("--source-dir", help="원본 데이터 디렉터리 (기본: PLANNER_DATA_DIR)")
+    parser.add_argument("--source-backend", help="원본 저장소 (기본: PLANNER_BACKEND)")
+    parser.add_argument("--target-dir", help="대상 데이터 디렉터리 (기본: 원본과 같음)")
+    parser.add_argument("--backend", help="대상 저장소 (기본: PLANNER_BACKEND)")
+    parser.add_argument("--workers", type=int, help="프로세스 수 (기본: CPU 수)")
+    parser.add_argument("--restart", action="store_true", help="완료 기록을 지우고 처음부터")
+    args = parser.parse_args(argv)
+
+    def report(unit, expected, actual):
+        mark = "" if expected == actual else f"  불일치 (원본 {expected[0]}개, 기록 {actual[0]}개)"
+        print(f"{unit}: {actual[0]}개{mark}", file=sys.stderr, flush=True)
+
+    try:
+        summary = migrate(args.source, args.target, args.user, args.users, args.source_dir, args.source_backend,
+                          args.target_dir, args.backend, args.workers, args.restart, report)
+    except ValueError as e:
+        parser.error(str(e))
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+    if summary["mismatched"] or summary["failed"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""반복 작업 규칙 (매일, 평일, 매주 X요일, N일마다, 종료일)
+
+규칙은 저널 문서 하나에 한 번만 저장하고, 하루나 기간을 읽을 때 그 날짜에
+해당하는 블록으로 펼친다. 1년 동안 매일 하는 일도 규칙 한 개이다.
+
+    {"rules": {id: {"id", "freq", "since", "until", "weekdays", "interval",
+                    "block": {블록 필드}, "overrides": {날짜: {바꿀 필드} | {"skip": true}}}}}
+
+block 은 각 저장 형식의 블록 그대로이다 (날짜별 형식 {"text", "start", "end",
+"done"}, 사용자별 형식 {"name", "start", "end", "color", "completed"}). 특정 날짜만
+다르게 하려면 overrides 에 바꿀 필드를 (완료 체크 포함), 그 날만 빼려면 skip 을
+넣는다. 펼친 블록에는 "rule" 에 규칙 id 가 붙는다.
+
+- 날짜별 형식: DATA_DIR/planner_recurring.json (date_book)
+- 사용자별 형식: DATA_DIR/recurring_{사용자}.json (user_book)
+"""
+import os
+import uuid
+from datetime import date, timedelta
+
+from planner import config
+from planner.journal import get_document
+
+FREQS = {"daily": "매일", "weekdays": "평일", "weekly": "매주", "interval": "N일마다"}
+WEEKDAY_NAMES = ["월", "화", "수", "목", "금", "토", "일"]
+RULE_KEY = "rule"
+
+
+def make_rule(block, freq, since, until=None, weekdays=(), interval=1):
+    """since/until 은 date, weekdays 는 0(월)..6(일)"""
+    if freq not in FREQS:
+        raise ValueError(f"알 수 없는 반복: {freq}")
+    if freq == "weekly" and not weekdays:
+        raise ValueError("매주 반복은 요일이 필요합니다")
+    if interval < 1:
+        raise ValueError("반복 간격은 1 이상이어야 합니다")
+    return {"id": uuid.uuid4().hex[:12], "freq": freq, "since": since.isoformat(),
+            "until": until.isoformat() if until else None, "weekdays": sorted(set(weekdays)),
+            "interval": interval, "block": dict(block), "overrides": {}}
+
+
+def _matches(rule, day):
+    freq = rule["freq"]
+    if freq == "daily":
+        return True
+    if freq == "weekdays":
+        return day.weekday() < 5
+    if freq == "weekly":
+        return day.weekday() in rule["weekdays"]
+    return (day - date.fromisoformat(rule["since"])).days % rule["interval"] == 0
+
+
+def occurrence_dates(rule, start, end):
+    """start..end (포함) 중 규칙이 해당하는 날짜 (skip 제외)"""
+    first = max(start, date.fromisoformat(rule["since"]))
+    last = min(end, date.fromisoformat(rule["until"])) if rule.get("until") else end
+    if first > last:
+        return
+    overrides = rule.get("overrides", {})
+    step = 1
+    if rule["freq"] == "interval":
+        # since 부터 interval 일 간격이므로 첫 해당 날짜로 건너뛰고 그 간격으로 진행
+        step = rule["interval"]
+        first += timedelta(days=-(first - date.fromisoformat(rule["since"])).days % step)
+    day = first
+    while day <= last:
+        if _matches(rule, day) and not overrides.get(day.isoformat(), {}).get("skip"):
+            yield day
+        day += timedelta(days=step)
+
+
+def dates_between(start, end, weekdays=()):
+    """start..end (포함) 중 weekdays 요일의 날짜 (비어 있으면 모든 날)"""
+    day = start
+    while day <= end:
+        if not weekdays or day.weekday() in weekdays:
+            yield day
+        day += timedelta(days=1)
+
+
+def occurrence(rule, day):
+    """day 에 펼친 블록 (그 날의 overrides 반영)"""
+    override = {key: value for key, value in rule.get("overrides", {}).get(day.isoformat(), {}).items()
+                if key != "skip"}
+    return {**rule["block"], **override, RULE_KEY: rule["id"]}
+
+
+def describe(rule):
+    """화면 표시용 반복 설명 ("매주 월, 수 ~2026-12-31")"""
+    if rule["freq"] == "weekly":
+        text = "매주 " + ", ".join(WEEKDAY_NAMES[i] for i in rule["weekdays"])
+    elif rule["freq"] == "interval":
+        text = f"{rule['interval']}일마다"
+    else:
+        text = FREQS[rule["freq"]]
+    return f"{text} ~{rule['until']}" if rule.get("until") else text
+
+
+class RecurrenceBook:
+    """규칙 저널 문서"""
+
+    def __init__(self, path):
+        self.path = path
+        self.doc = get_document(path)
+
+    def rules(self):
+        return self.doc.read("rules") or {}
+
+    def get(self, rule_id):
+        return self.doc.read("rules", rule_id)
+
+    def add(self, rule):
+        self.doc.apply([["set", ["rules", rule["id"]], rule]])
+        return rule
+
+    def delete(self, rule_id):
+        self.doc.apply([["del", ["rules", rule_id]]])
+
+    def override(self, rule_id, date_str, fields):
+        """date_str 하루만 fields 로 바꿈 (기존 예외에 합침)"""
+        current = self.doc.read("rules", rule_id, "overrides", date_str) or {}
+        self.doc.apply([["set", ["rules", rule_id, "overrides", date_str], {**current, **fields}]])
+
+    def skip(self, rule_id, date_str):
+        """date_str 하루만 빼기"""
+        self.doc.apply([["set", ["rules", rule_id, "overrides", date_str], {"skip": True}]])
+
+    def for_day(self, day):
+        """day 에 해당하는 블록 목록"""
+        return [occurrence(rule, day) for rule in self.rules().values()
+                if next(occurrence_dates(rule, day, day), None) is not None]
+
+    def for_range(self, start, end):
+        """start..end 중 해당하는 날짜만 {날짜 문자열: [블록]}"""
+        blocks = {}
+        for rule in self.rules().values():
+            for day in occurrence_dates(rule, start, end):
+                blocks.setdefault(day.isoformat(), []).append(occurrence(rule, day))
+        return dict(sorted(blocks.items()))
+
+
+def date_book(data_dir=None):
+    """날짜별 형식(web_planner.py)의 규칙"""
+    data_dir = config.DATA_DIR if data_dir is None else data_dir
+    return RecurrenceBook(os.path.join(data_dir, "planner_recurring.json"))
+
+
+def user_book(username, data_dir=None):
+    """사용자별 형식(streamlit_app.py)의 규칙"""
+    data_dir = config.DATA_DIR if data_dir is None else data_dir
+    return RecurrenceBook(os.path.join(data_dir, f"recurring_{username}.json"))
@@ -0,0 +1,112 @@
+"""주간 보기/통계 화면의 표 데이터 (Streamlit, pandas 없이)
+
+각 함수는 화면 표의 행(dict 목록)을 돌려주며 열 이름은 화면과 같다.
+야간 리포트 같은 배치 작업은 이 모듈만 import 하면 된다::
+
+    python -m planner.reports --user 홍길동_1234      # 사용자별 형식 월별 통계
+    python -m planner.reports --days 30              # 날짜별 형식 최근 30일
+"""
+import argparse
+import json
+from datetime import date, timedelta
+
+from planner.day import user_day_counts
+from planner.manifest import get_manifest
+from planner.storage import get_store
+
+
+def completion_rate(completed, total):
+    return (completed / total * 100) if total > 0 else 0
+
+
+def rows_version(rows):
+    """표 행의 비교용 키: 행이 같으면 표와 차트도 같으므로 다시 만들지 않아도 됨"""
+    return tuple(tuple(row.items()) for row in rows)
+
+
+def week_dates(today=None):
+    """today 가 속한 주 (월요일부터 7일)"""
+    today = today or date.today()
+    start_of_week = today - timedelta(days=today.weekday())
+    return [start_of_week + timedelta(days=i) for i in range(7)]
+
+
+def date_counts(start, end):
+    """날짜별 형식: start..end 각 날짜의 (날짜, 전체, 완료), 날짜 색인만 읽음"""
+    entries = get_manifest().range(start, end)
+    counts = []
+    for i in range((end - start).days + 1):
+        day = start + timedelta(days=i)
+        entry = entries.get(day.isoformat(), {})
+        counts.append((day, entry.get("tasks", 0), entry.get("completed", 0)))
+    return counts
+
+
+def date_week_rows(today=None):
+    """web_planner.py 주간 보기 표"""
+    dates = week_dates(today)
+    return [{
+        "날짜": day.strftime("%m/%d"),
+        "요일": day.strftime("%A"),
+        "완료": completed,
+        "전체": total,
+        "완료율": completion_rate(completed, total)
+    } for day, total, completed in date_counts(dates[0], dates[-1])]
+
+
+def date_recent_rows(today=None, days=7):
+    """web_planner.py 통계 표: 오늘부터 거꾸로 days 일"""
+    today = today or date.today()
+    counts = date_counts(today - timedelta(days=days - 1), today)
+    return [{
+        "날짜": day.strftime("%m/%d"),
+        "완료": completed,
+        "전체": total,
+        "완료율": completion_rate(completed, total)
+    } for day, total, completed in reversed(counts)]
+
+
+def user_week_rows(user_data, today=None):
+    """streamlit_app.py 주간 보기 표 (기록이 있는 날짜만)"""
+    rows = []
+    for day in week_dates(today):
+        date_str = day.strftime("%Y-%m-%d")
+        if date_str in user_data:
+            total_tasks, completed_tasks = user_day_counts(user_data[date_str])
+            rows.append({
+                "날짜": day.strftime("%m/%d"),
+                "요일": day.strftime("%A"),
+                "완료된 작업": completed_tasks,
+                "전체 작업": total_tasks,
+                "완료율": f"{completion_rate(completed_tasks, total_tasks):.1f}%" if total_tasks > 0 else "0%"
+            })
+    return rows
+
+
+def user_monthly_rows(rollup):
+    """streamlit_app.py 통계 탭 월별 표 (StatsRollup)"""
+    return [{
+        "월": month,
+        "작업 수": tasks,
+        "완료 수": completed,
+        "완료율": completion_rate(completed, tasks)
+    } for month, tasks, completed in rollup.monthly()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Daily Planner 통계 출력 (JSON)")
+    parser.add_argument("--user", help="사용자별 형식: 사용자 키 (아이디_비밀번호)")
+    parser.add_argument("--days", type=int, default=7, help="날짜별 형식: 최근 일 수")
+    args = parser.parse_args(argv)
+    if args.user:
+        rollup = get_store().load_stats(args.user)
+        report = {"total": {"tasks": rollup.total[0], "completed": rollup.total[1],
+                            "hours": rollup.total_hours},
+                  "months": user_monthly_rows(rollup)}
+    else:
+        report = {"days": date_recent_rows(days=args.days)}
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
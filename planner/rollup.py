@@ -0,0 +1,67 @@
+"""증분 통계 집계 (일별 / 월별 / 전체)
+
+저장소는 날짜가 바뀔 때마다 update_day 로 해당 날짜의 차이만 월별/전체
+합계에 반영한다. 통계 화면은 월 수만큼만 읽으면 된다.
+"""
+from planner.day import user_day_counts
+
+SLOT_HOURS = 0.5  # 30분 단위
+
+
+class StatsRollup:
+    """days: {날짜: [작업, 완료]}, months: {YYYY-MM: [작업, 완료, 날짜 수]}, total: [작업, 완료]"""
+
+    __slots__ = ("days", "months", "total")
+
+    def __init__(self, days=None, months=None, total=None):
+        self.days = {} if days is None else days
+        self.months = {} if months is None else months
+        self.total = [0, 0] if total is None else total
+
+    @classmethod
+    def build(cls, user_data):
+        rollup = cls()
+        for date_str, day_data in user_data.items():
+            rollup.update_day(date_str, day_data)
+        return rollup
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data.get("days", {}), data.get("months", {}), data.get("total", [0, 0]))
+
+    def to_dict(self):
+        return {"days": self.days, "months": self.months, "total": self.total}
+
+    def set_counts(self, date_str, counts):
+        """date_str 의 (작업, 완료) 를 counts 로 교체, counts 가 None 이면 날짜 삭제"""
+        old = self.days.pop(date_str, None)
+        month = self.months.get(date_str[:7])
+        if old is not None:
+            month[0] -= old[0]
+            month[1] -= old[1]
+            month[2] -= 1
+            self.total[0] -= old[0]
+            self.total[1] -= old[1]
+        if counts is not None:
+            tasks, completed = counts
+            self.days[date_str] = [tasks, completed]
+            month = self.months.setdefault(date_str[:7], [0, 0, 0])
+            month[0] += tasks
+            month[1] += completed
+            month[2] += 1
+            self.total[0] += tasks
+            self.total[1] += completed
+        if month is not None and month[2] == 0:
+            del self.months[date_str[:7]]
+
+    def update_day(self, date_str, day_data):
+        """사용자별 형식의 하루 데이터로 갱신 (None 이면 삭제)"""
+        self.set_counts(date_str, None if day_data is None else user_day_counts(day_data))
+
+    @property
+    def total_hours(self):
+        return self.total[0] * SLOT_HOURS
+
+    def monthly(self):
+        """[(월, 작업, 완료)] 월 순서대로"""
+        return [(month, tasks, completed) for month, (tasks, completed, _) in sorted(self.months.items())]
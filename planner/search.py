@@ -0,0 +1,264 @@
+"""슬롯 내용과 블록 이름 전문 검색
+
+날짜마다 [라벨, 내용] 목록("docs")과, 내용의 단어를 글자 1-gram/2-gram 으로 쪼갠
+역색인("grams": {gram: {날짜: 1}})을 저널 문서 하나에 둔다. 한글은 음절 단위로
+쪼개므로 "치과예약" 처럼 띄어 쓰지 않은 내용도 "예약" 으로 찾는다. 저장할 때마다
+바뀐 날짜의 차이만 저널에 추가하고, 검색은 질의 gram 의 날짜 집합 교집합을 구한
+뒤 그 날짜의 내용만 확인한다.
+
+질의 (모두 만족하는 내용만)::
+
+    치과            내용 어디든 포함
+    치*             "치" 로 시작하는 단어
+    "치과 예약"      띄어쓰기까지 그대로 포함
+
+- 날짜별 형식: DATA_DIR/planner_search.json (date_index)
+- 사용자별 형식: 저장소 디렉터리/search_{사용자}.json (user_index)
+
+색인이 없으면 처음 검색할 때 전체를 읽어 만든다. 다른 방법으로 파일을 고쳤다면
+다시 만든다::
+
+    python -m planner.search --rebuild [--user 사용자]
+    python -m planner.search 치과 --since 2024-01-01 [--user 사용자]
+"""
+import argparse
+import json
+import os
+import re
+import unicodedata
+from datetime import date
+
+from planner import config
+from planner.day import BLOCKS_KEY
+from planner.journal import get_document
+from planner.recurrence import date_book, occurrence_dates, user_book
+from planner.sparse import COMPLETED_SUFFIX
+
+WORD_RE = re.compile(r"\w+")
+PHRASE_RE = re.compile(r'"([^"]*)"')
+DEFAULT_LIMIT = 50
+
+
+def normalize(text):
+    return unicodedata.normalize("NFC", text).casefold()
+
+
+def text_grams(text):
+    """내용의 단어별 1-gram, 2-gram"""
+    grams = set()
+    for word in WORD_RE.findall(normalize(text)):
+        grams.update(word)
+        grams.update(word[i:i + 2] for i in range(len(word) - 1))
+    return grams
+
+
+def query_grams(term):
+    """질의 단어가 포함된 내용이 반드시 가진 gram (2글자 이상은 2-gram)"""
+    grams = set()
+    for word in WORD_RE.findall(normalize(term)):
+        if len(word) == 1:
+            grams.add(word)
+        else:
+            grams.update(word[i:i + 2] for i in range(len(word) - 1))
+    return grams
+
+
+def parse_query(query):
+    """질의 -> [("phrase" | "prefix" | "term", 정규화한 값)]"""
+    conditions = [("phrase", " ".join(normalize(phrase).split())) for phrase in PHRASE_RE.findall(query)]
+    for term in PHRASE_RE.sub(" ", query).split():
+        if term.endswith("*"):
+            conditions.append(("prefix", normalize(term.rstrip("*"))))
+        else:
+            conditions.append(("term", normalize(term)))
+    return [(kind, value) for kind, value in conditions if value]
+
+
+def matches(conditions, text):
+    text = normalize(text)
+    words = None
+    for kind, value in conditions:
+        if kind == "prefix":
+            words = WORD_RE.findall(text) if words is None else words
+            if not any(word.startswith(value) for word in words):
+                return False
+        elif kind == "phrase":
+            if value not in " ".join(text.split()):
+                return False
+        elif value not in text:
+            return False
+    return True
+
+
+def date_entries(tasks):
+    """날짜별 형식 하루 -> [[라벨, 내용]]"""
+    entries = [[key, task["text"]] for key, task in sorted(tasks.items())
+               if isinstance(task, dict) and task.get("text")]
+    entries += [[f"{block['start']}-{block['end']}", block["text"]]
+                for block in tasks.get(BLOCKS_KEY) or [] if block.get("text")]
+    return entries
+
+
+def user_entries(day):
+    """사용자별 형식 하루 -> [[라벨, 내용]]"""
+    if not day:
+        return []
+    entries = [[key, text] for key, text in sorted(day.get("tasks", {}).items())
+               if text and not key.endswith(COMPLETED_SUFFIX)]
+    entries += [[f"{block['start']}-{block['end']}", block["name"]]
+                for block in day.get("block_tasks", []) if block.get("name")]
+    return entries
+
+
+def _entry_grams(entries):
+    grams = set()
+    for _, text in entries:
+        grams |= text_grams(text)
+    return grams
+
+
+class SearchIndex:
+    """{"docs": {날짜: [[라벨, 내용]]}, "grams": {gram: {날짜: 1}}} 저널 문서"""
+
+    def __init__(self, path, load_all, book):
+        self.path = path
+        self._load_all = load_all
+        self.book = book
+
+    @property
+    def doc(self):
+        return get_document(self.path)
+
+    def exists(self):
+        return os.path.exists(self.path) or os.path.exists(self.doc.journal_path)
+
+    def update(self, days):
+        """{날짜: [[라벨, 내용]]} 로 바뀐 날짜의 차이만 기록 (색인이 아직 없으면 검색할 때 만듦)"""
+        if not self.exists():
+            return
+        ops = []
+        for date_str, entries in days.items():
+            old = self.doc.read("docs", date_str) or []
+            if old == entries:
+                continue
+            old_grams, new_grams = _entry_grams(old), _entry_grams(entries)
+            for gram in old_grams - new_grams:
+                if set(self.doc.read("grams", gram) or ()) <= {date_str}:
+                    ops.append(["del", ["grams", gram]])
+                else:
+                    ops.append(["del", ["grams", gram, date_str]])
+            ops += [["set", ["grams", gram, date_str], 1] for gram in sorted(new_grams - old_grams)]
+            ops.append(["set", ["docs", date_str], entries] if entries else ["del", ["docs", date_str]])
+        self.doc.apply(ops)
+
+    def rebuild(self):
+        """전체를 읽어 색인을 새로 만들고 날짜 수 반환"""
+        docs = {date_str: entries for date_str, entries in self._load_all().items() if entries}
+        grams = {}
+        for date_str, entries in docs.items():
+            for gram in _entry_grams(entries):
+                grams.setdefault(gram, {})[date_str] = 1
+        self.doc.save({"docs": docs, "grams": grams})
+        self.doc.compact()
+        return len(docs)
+
+    def search(self, query, start=None, end=None, limit=DEFAULT_LIMIT):
+        """[{"date", "label", "text"(, "rule")}] 최근 날짜부터, start/end 는 date (포함)"""
+        conditions = parse_query(query)
+        required = set()
+        for _, value in conditions:
+            required |= query_grams(value)
+        if not required:
+            return []
+        if not self.exists():
+            self.rebuild()
+        candidates = None
+        for gram in sorted(required, key=len, reverse=True):
+            dates = set(self.doc.read("grams", gram) or ())
+            candidates = dates if candidates is None else candidates & dates
+            if not candidates:
+                break
+        start_str, end_str = start.isoformat() if start else "", end.isoformat() if end else "9999"
+        hits = []
+        for date_str in sorted(candidates or (), reverse=True):
+            if not start_str <= date_str <= end_str:
+                continue
+            for label, text in self.doc.read("docs", date_str) or []:
+                if matches(conditions, text):
+                    hits.append({"date": date_str, "label": label, "text": text})
+            if len(hits) >= limit:
+                break
+        hits += self._rule_hits(conditions, start, end)
+        hits.sort(key=lambda hit: (hit["date"], hit["label"]), reverse=True)
+        return hits[:limit]
+
+    def _rule_hits(self, conditions, start, end):
+        """반복 규칙은 기간 안 (끝이 없으면 오늘까지) 마지막으로 해당하는 날짜 하나"""
+        hits = []
+        for rule in self.book.rules().values():
+            block = rule["block"]
+            text = block.get("text", block.get("name", ""))
+            if not text or not matches(conditions, text):
+                continue
+            last = None
+            for last in occurrence_dates(rule, start or date.fromisoformat(rule["since"]), end or date.today()):
+                pass
+            if last is not None:
+                hits.append({"date": last.isoformat(), "label": f"{block['start']}-{block['end']}",
+                             "text": text, "rule": rule["id"]})
+        return hits
+
+
+def _load_date_files(data_dir):
+    from planner.datefiles import read_tasks_files
+    from planner.manifest import date_paths
+
+    paths = date_paths(data_dir)
+    loaded = read_tasks_files(paths.values())
+    return {date_str: date_entries(loaded[path]) for date_str, path in paths.items()}
+
+
+_indexes = {}
+
+
+def date_index(data_dir=None):
+    """날짜별 형식(web_planner.py)의 색인"""
+    data_dir = config.DATA_DIR if data_dir is None else data_dir
+    path = os.path.join(data_dir, "planner_search.json")
+    if path not in _indexes:
+        _indexes[path] = SearchIndex(path, lambda: _load_date_files(data_dir), date_book(data_dir))
+    return _indexes[path]
+
+
+def user_index(username, store=None):
+    """사용자별 형식의 색인 (저장소와 같은 디렉터리)"""
+    if store is None:
+        from planner.storage import get_store
+        store = get_store()
+    path = os.path.join(store.data_dir, f"search_{username}.json")
+    if path not in _indexes:
+        _indexes[path] = SearchIndex(
+            path, lambda: {date_str: user_entries(day) for date_str, day in store.load_user(username).items()},
+            user_book(username, store.data_dir))
+    return _indexes[path]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Daily Planner 검색")
+    parser.add_argument("query", nargs="?", help='검색어 (치과, 치*, "치과 예약")')
+    parser.add_argument("--user", help="사용자별 형식: 사용자 키 (아이디_비밀번호)")
+    parser.add_argument("--since", type=date.fromisoformat, help="시작 날짜 (YYYY-MM-DD)")
+    parser.add_argument("--until", type=date.fromisoformat, help="끝 날짜 (YYYY-MM-DD)")
+    parser.add_argument("--limit", type=int, default=DEFAULT_LIMIT)
+    parser.add_argument("--rebuild", action="store_true", help="색인을 다시 만듦")
+    args = parser.parse_args(argv)
+    index = user_index(args.user) if args.user else date_index()
+    if args.rebuild:
+        print(f"날짜 {index.rebuild()}개의 색인을 만들었습니다.")
+    if args.query:
+        for hit in index.search(args.query, args.since, args.until, args.limit):
+            print(json.dumps(hit, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""빈 슬롯을 저장하지 않는 희소 저장 형식과 기존 파일 정리
+
+사용자별 형식은 내용이 있는 슬롯의 텍스트와 완료된 슬롯의 `_completed`
+키만 남긴다. 날짜별 형식(web_planner.py)은 기본값
+`{"text": "", "done": False, "type": "normal"}` 과 같은 슬롯을 제거한다.
+없는 키는 읽을 때 기본값("" / False)으로 취급한다.
+
+기존 파일 정리::
+
+    python -m planner.sparse [데이터 디렉터리]
+"""
+import glob
+import os
+import re
+import sys
+
+from planner import config
+from planner.journal import JournaledDocument
+
+COMPLETED_SUFFIX = "_completed"
+DATE_FILE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}\.json$")
+
+
+def read_slot(tasks, slot_key):
+    """(텍스트, 완료 여부), 저장되지 않은 슬롯은 기본값"""
+    return tasks.get(slot_key, ""), tasks.get(slot_key + COMPLETED_SUFFIX, False)
+
+
+def set_slot(tasks, slot_key, text, completed):
+    """내용/완료 표시가 있을 때만 키를 유지"""
+    if text:
+        tasks[slot_key] = text
+    else:
+        tasks.pop(slot_key, None)
+    if completed:
+        tasks[slot_key + COMPLETED_SUFFIX] = True
+    else:
+        tasks.pop(slot_key + COMPLETED_SUFFIX, None)
+
+
+def update_slot(tasks, slot_key, text=None, completed=None):
+    """주어진 값만 바꾸는 set_slot (None 은 그대로 둠)"""
+    if text is not None:
+        if text:
+            tasks[slot_key] = text
+        else:
+            tasks.pop(slot_key, None)
+    if completed is not None:
+        if completed:
+            tasks[slot_key + COMPLETED_SUFFIX] = True
+        else:
+            tasks.pop(slot_key + COMPLETED_SUFFIX, None)
+
+
+def compact_tasks(tasks):
+    return {key: value for key, value in tasks.items() if value}
+
+
+def compact_day(day):
+    compacted = dict(day)
+    compacted["tasks"] = compact_tasks(day.get("tasks", {}))
+    compacted.setdefault("block_tasks", [])
+    return compacted
+
+
+def compact_user_data(data):
+    return {date_str: compact_day(day) for date_str, day in data.items()}
+
+
+def is_empty_slot(task):
+    return (isinstance(task, dict) and not task.get("text") and not task.get("done")
+            and task.get("type", "normal") == "normal")
+
+
+def compact_date_tasks(tasks):
+    """날짜별 형식에서 기본값 슬롯(및 빈 blocks) 제거"""
+    return {time_key: task for time_key, task in tasks.items() if not is_empty_slot(task) and task != []}
+
+
+def _count_user_slots(data):
+    return sum(len(day.get("tasks", {})) for day in data.values() if isinstance(day, dict))
+
+
+def _rewrite(path, compact, count):
+    doc = JournaledDocument(path)
+    data = doc.load()
+    compacted = compact(data)
+    removed = count(data) - count(compacted)
+    if removed:
+        doc.save(compacted)
+    if removed or os.path.exists(doc.journal_path):
+        doc.compact()
+    return removed
+
+
+def migrate(data_dir=None):
+    """data_*.json / YYYY-MM-DD.json (및 저널) 과 SQLite 의 빈 슬롯 제거, 제거한 항목 수 반환"""
+    # data_dir 을 주면 그 안의 planner.db (기본값은 설정된 SQLite 경로)
+    sqlite_path = config.SQLITE_PATH if data_dir is None else os.path.join(data_dir, "planner.db")
+    data_dir = config.DATA_DIR if data_dir is None else data_dir
+    removed = 0
+    for path in sorted(glob.glob(os.path.join(data_dir, "data_*.json"))):
+        if path.endswith(".stats.json"):
+            continue
+        removed += _rewrite(path, compact_user_data, _count_user_slots)
+    for path in sorted(glob.glob(os.path.join(data_dir, "*.json"))):
+        if DATE_FILE_RE.match(os.path.basename(path)):
+            removed += _rewrite(path, compact_date_tasks, len)
+    if os.path.exists(sqlite_path):
+        from planner.storage import SqliteUserStore
+        removed += SqliteUserStore(sqlite_path).delete_empty_slots()
+    return removed
+
+
+if __name__ == "__main__":
+    data_dir = sys.argv[1] if len(sys.argv) > 1 else None
+    print(f"빈 슬롯 항목 {migrate(data_dir)}개를 제거했습니다.")
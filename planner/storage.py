@@ -0,0 +1,928 @@
+"""사용자 데이터 저장소 (JSON 파일 / SQLite)
+
+두 저장소 모두 같은 형태의 데이터를 다룬다::
+
+    {"2024-01-01": {"tasks": {"09:00-09:30": "운동",
+                              "09:00-09:30_completed": True},
+                    "block_tasks": [{"name", "start", "end", "color", "completed"}],
+                    "version": 3}}
+
+version 은 그 날짜를 기록할 때마다 1씩 늘어난다. save_day 에 편집을 시작한
+시점의 하루 데이터(base)를 주면 그 사이 다른 세션(다른 앱 프로세스 포함)이
+기록한 변경과 슬롯 단위로 병합하고, 같은 슬롯을 다르게 고쳤으면
+ConflictError 를 낸다. 파일 저장소는 사용자 파일마다 fcntl 잠금을 잡는다.
+"""
+import glob
+import os
+import sqlite3
+import threading
+
+from planner import config
+from planner.cache import UserDataCache, clone, file_stamp, user_cache
+from planner.concurrency import file_lock, merge, write_json_atomic
+from planner.journal import get_document, release_document
+from planner.rollup import StatsRollup
+from planner.sparse import COMPLETED_SUFFIX, compact_day, update_slot
+from planner.writebehind import WriteBehindBuffer
+
+
+def empty_day():
+    return {"tasks": {}, "block_tasks": []}
+
+
+def without_version(day):
+    return {key: value for key, value in (day or {}).items() if key != "version"}
+
+
+def resolve_day(current, day, base=None, prefer_mine=False):
+    """저장할 하루 데이터 (compare-and-swap)
+
+    base 의 버전이 current 와 다르면 그 사이 다른 기록이 있었던 것이므로
+    base -> day 변경을 current 위에 병합한다. 버전은 current + 1.
+    """
+    version = (current or {}).get("version", 0)
+    day = compact_day(without_version(clone(day)))
+    if base is not None and base.get("version", 0) != version:
+        day = compact_day(merge(compact_day(without_version(base)), day,
+                                compact_day(without_version(current or empty_day())), prefer_mine))
+    day["version"] = version + 1
+    return day
+
+
+def bump_version(day):
+    day["version"] = day.get("version", 0) + 1
+    return day
+
+
+def split_tasks(tasks):
+    """tasks dict -> {slot: [text, completed]}, 빈 슬롯 제외"""
+    slots = {}
+    for key, value in tasks.items():
+        if key.endswith(COMPLETED_SUFFIX):
+            slots.setdefault(key[:-len(COMPLETED_SUFFIX)], ["", False])[1] = bool(value)
+        else:
+            slots.setdefault(key, ["", False])[0] = value or ""
+    return {slot: value for slot, value in slots.items() if value != ["", False]}
+
+
+def replace_days(data, days):
+    """data 의 날짜를 days 의 하루로 바꾸고 (바뀐 날짜만 버전 + 1) 바뀐 날짜 반환"""
+    dates = []
+    for date_str, day in days.items():
+        current = data.get(date_str)
+        day = compact_day(without_version(clone(day)))
+        if current is None or without_version(current) != day:
+            day["version"] = (current or {}).get("version", 0) + 1
+            data[date_str] = day
+            dates.append(date_str)
+    return dates
+
+
+def index_days(store, username, days):
+    """기록한 날짜 {날짜: 하루 또는 None(삭제)} 를 사용자 검색 색인에 반영"""
+    from planner.search import user_entries, user_index
+
+    if days:
+        user_index(username, store).update({date_str: user_entries(day) for date_str, day in days.items()})
+
+
+def changed_dates(old, new):
+    """두 사용자 데이터에서 내용이 다른 날짜"""
+    return [d for d in set(old) | set(new) if old.get(d) != new.get(d)]
+
+
+class JsonUserStore:
+    """사용자별 data_{user}.json 한 파일에 전체 기록을 저장 (기존 방식)
+
+    통계 집계는 data_{user}.stats.json 에 저장하고, 집계를 만든 시점의
+    데이터 파일 상태(source)가 현재와 다르면 다시 계산한다.
+    """
+
+    name = "json"
+
+    def __init__(self, data_dir=None):
+        self.data_dir = config.DATA_DIR if data_dir is None else data_dir
+
+    def path(self, username):
+        return os.path.join(self.data_dir, f"data_{username}.json")
+
+    def stats_path(self, username):
+        return os.path.join(self.data_dir, f"data_{username}.stats.json")
+
+    def load_user(self, username):
+        """{날짜: 하루} (캐시와 공유하므로 읽기 전용, 고칠 때는 load_day 또는 clone)"""
+        return user_cache.load(self.path(username))
+
+    def _source(self, username):
+        stamp = file_stamp(self.path(username))
+        return list(stamp) if stamp else None
+
+    def _fresh_stats(self, username):
+        """현재 데이터와 일치하는 저장된 집계 (없거나 오래되었으면 None)"""
+        saved = user_cache.load(self.stats_path(username))
+        source = self._source(username)
+        if saved and source is not None and saved.get("source") == source:
+            # update_day 가 월별 합계를 제자리에서 고치므로 캐시와 분리
+            return StatsRollup.from_dict(clone(saved))
+        return None
+
+    def _write_stats(self, username, rollup):
+        source = self._source(username)
+        if source is None:
+            return
+        path = self.stats_path(username)
+        data = {"source": source, **rollup.to_dict()}
+        write_json_atomic(path, data, indent=None)
+        user_cache.remember(path, data)
+
+    def usernames(self):
+        """기록이 있는 사용자 (data_{user}.json 또는 그 저널)"""
+        names = set()
+        for path in glob.glob(os.path.join(self.data_dir, "data_*.json*")):
+            name = os.path.basename(path)
+            if name.endswith(".journal"):
+                name = name[:-len(".journal")]
+            if name.endswith(".json") and not name.endswith(".stats.json"):
+                names.add(name[len("data_"):-len(".json")])
+        return sorted(names)
+
+    def release(self, username):
+        """사용자를 차례로 훑는 배치 작업이 다 읽은 사용자를 메모리에서 뺄 때 호출
+
+        json 저장소의 캐시(user_cache)는 크기가 제한되어 있어 할 일 없음.
+        """
+
+    def _locked(self, username):
+        """사용자 파일 읽기-수정-쓰기 구간 (다른 프로세스와 배타)"""
+        return file_lock(self.path(username))
+
+    def load_stats(self, username):
+        """일별/월별/전체 통계 (StatsRollup)"""
+        rollup = self._fresh_stats(username)
+        if rollup is None:
+            with self._locked(username):
+                rollup = StatsRollup.build(self.load_user(username))
+                self._write_stats(username, rollup)
+        return rollup
+
+    def _commit(self, username, data, dates):
+        """_locked 안에서 호출: 전체 데이터를 쓰고 dates 날짜만 통계에 반영"""
+        filename = self.path(username)
+        rollup = self._fresh_stats(username)
+        write_json_atomic(filename, data)
+        user_cache.remember(filename, data)
+        if rollup is None:
+            rollup = StatsRollup.build(data)
+        else:
+            for date_str in dates:
+                rollup.update_day(date_str, data.get(date_str))
+        self._write_stats(username, rollup)
+        index_days(self, username, {date_str: data.get(date_str) for date_str in dates})
+
+    def save_user(self, username, data):
+        """전체 기록을 data 로 교체 (바뀐 날짜의 버전은 현재 값 + 1)"""
+        with self._locked(username):
+            previous = self.load_user(username)
+            data = {date_str: without_version(day) for date_str, day in data.items()}
+            dates = changed_dates({d: without_version(day) for d, day in previous.items()}, data)
+            for date_str, day in data.items():
+                day["version"] = previous.get(date_str, {}).get("version", 0) + (date_str in dates)
+            self._commit(username, data, dates)
+
+    def flush(self, username=None):
+        """바로 기록하므로 할 일 없음 (BufferedUserStore 와 같은 인터페이스)"""
+
+    def load_day(self, username, date_str):
+        return clone(self.load_user(username).get(date_str)) or empty_day()
+
+    def save_day(self, username, date_str, day, base=None, prefer_mine=False):
+        """하루를 저장하고 저장된 하루(병합 결과, 새 버전) 반환"""
+        with self._locked(username):
+            # 바꾸는 날짜만 새 객체이므로 바깥 dict 만 복사
+            data = dict(self.load_user(username))
+            data[date_str] = resolve_day(data.get(date_str), day, base, prefer_mine)
+            self._commit(username, data, [date_str])
+        return clone(data[date_str])
+
+    def save_days(self, username, days):
+        """days {날짜: 하루} 의 날짜를 통째로 바꿈 (파일 한 번 기록, 바뀐 날짜만 버전 증가)"""
+        with self._locked(username):
+            data = dict(self.load_user(username))
+            dates = replace_days(data, days)
+            if dates:
+                self._commit(username, data, dates)
+
+    def _update_day(self, username, date_str, change):
+        self._update_days(username, [date_str], change)
+
+    def _update_days(self, username, date_strs, change):
+        """여러 날짜를 change(day) 로 고침 (파일을 한 번 읽고 한 번 기록)"""
+        with self._locked(username):
+            data = dict(self.load_user(username))
+            for date_str in date_strs:
+                day = data[date_str] = clone(data.get(date_str)) or empty_day()
+                change(day)
+                bump_version(day)
+            self._commit(username, data, date_strs)
+
+    def set_slot(self, username, date_str, slot, text=None, completed=None):
+        # 빈 값은 키를 제거 (희소 저장)
+        self._update_day(username, date_str,
+                         lambda day: update_slot(day.setdefault("tasks", {}), slot, text, completed))
+
+    def add_block(self, username, date_str, block):
+        self._update_day(username, date_str,
+                         lambda day: day.setdefault("block_tasks", []).append(dict(block)))
+
+    def add_blocks(self, username, date_strs, block):
+        """같은 블록을 여러 날짜에 추가 (중복 날짜는 한 번)"""
+        self._update_days(username, list(dict.fromkeys(date_strs)),
+                          lambda day: day.setdefault("block_tasks", []).append(dict(block)))
+
+    def update_block(self, username, date_str, index, **fields):
+        self._update_day(username, date_str, lambda day: day["block_tasks"][index].update(fields))
+
+    def delete_block(self, username, date_str, index):
+        self._update_day(username, date_str, lambda day: day["block_tasks"].pop(index))
+
+
+class JournalUserStore(JsonUserStore):
+    """data_{user}.json 을 스냅샷으로, 변경은 data_{user}.json.journal 에 추가 기록
+
+    슬롯 하나를 바꾸면 저널에 한 줄만 쓰므로 기록 비용이 전체 기록 크기와
+    무관하다. 스냅샷 형식은 json 저장소와 같다 (저널 압축 후에는 json 저장소로
+    그대로 되돌릴 수 있음). 통계 집계도 저널 문서로 저장한다.
+    """
+
+    name = "journal"
+
+    def _doc(self, username):
+        return get_document(self.path(username))
+
+    def _stats_doc(self, username):
+        return get_document(self.stats_path(username))
+
+    def _source(self, username):
+        stamp = self._doc(username).stamp()
+        return stamp if stamp[0] or stamp[1] else None
+
+    def _fresh_stats(self, username):
+        saved = self._stats_doc(username).load()
+        source = self._source(username)
+        if saved and source is not None and saved.get("source") == source:
+            return StatsRollup.from_dict(saved)
+        return None
+
+    def _write_stats(self, username, rollup):
+        source = self._source(username)
+        if source is not None:
+            self._stats_doc(username).save({"source": source, **rollup.to_dict()})
+
+    def _apply(self, username, write):
+        """잠금 안에서 write(doc) 실행, 기록한 연산의 날짜만 통계에 반영"""
+        doc = self._doc(username)
+        with self._locked(username):
+            rollup = self._fresh_stats(username)
+            ops = write(doc)
+            dates = {op[1][0] for op in ops}
+            if rollup is None:
+                rollup = StatsRollup.build(doc.view())
+            else:
+                for date_str in dates:
+                    rollup.update_day(date_str, doc.read(date_str))
+            self._write_stats(username, rollup)
+            index_days(self, username, {date_str: doc.read(date_str) for date_str in dates})
+        return ops
+
+    def load_user(self, username):
+        """{날짜: 하루} (문서의 메모리 상태를 공유하므로 읽기 전용, json 저장소와 같음)"""
+        return self._doc(username).view()
+
+    def release(self, username):
+        release_document(self.path(username))
+        release_document(self.stats_path(username))
+
+    def save_user(self, username, data):
+        def write(doc):
+            previous = doc.view()
+            new = {date_str: without_version(day) for date_str, day in data.items()}
+            dates = changed_dates({d: without_version(day) for d, day in previous.items()}, new)
+            for date_str, day in new.items():
+                day["version"] = previous.get(date_str, {}).get("version", 0) + (date_str in dates)
+            return doc.save(new)
+        self._apply(username, write)
+
+    def load_day(self, username, date_str):
+        return self._doc(username).read(date_str) or empty_day()
+
+    def save_day(self, username, date_str, day, base=None, prefer_mine=False):
+        """하루를 저장하고 저장된 하루(병합 결과, 새 버전) 반환"""
+        saved = {}
+
+        def write(doc):
+            saved.update(resolve_day(doc.read(date_str), day, base, prefer_mine))
+            return doc.save(saved, keys=(date_str,))
+        self._apply(username, write)
+        return clone(saved)
+
+    def save_days(self, username, days):
+        def write(doc):
+            current = {date_str: doc.read(date_str) for date_str in days}
+            current = {date_str: day for date_str, day in current.items() if day is not None}
+            dates = replace_days(current, days)
+            return doc.apply([["set", [date_str], current[date_str]] for date_str in dates])
+        self._apply(username, write)
+
+    @staticmethod
+    def _version_op(doc, date_str):
+        return ["set", [date_str, "version"], (doc.read(date_str, "version") or 0) + 1]
+
+    def set_slot(self, username, date_str, slot, text=None, completed=None):
+        def write(doc):
+            ops = []
+            if doc.read(date_str) is None:
+                ops.append(["set", [date_str], empty_day()])
+            if text is not None:
+                ops.append(["set", [date_str, "tasks", slot], text] if text else ["del", [date_str, "tasks", slot]])
+            if completed is not None:
+                key = slot + COMPLETED_SUFFIX
+                ops.append(["set", [date_str, "tasks", key], True] if completed else ["del", [date_str, "tasks", key]])
+            ops.append(self._version_op(doc, date_str))
+            return doc.apply(ops)
+        self._apply(username, write)
+
+    def _set_blocks(self, username, date_strs, change):
+        """date_strs 날짜의 block_tasks 를 change(blocks) 로 고침 (저널 기록 한 번)"""
+        def write(doc):
+            ops = []
+            for date_str in date_strs:
+                existing = doc.read(date_str)
+                day = existing or empty_day()
+                blocks = day.setdefault("block_tasks", [])
+                change(blocks)
+                if existing is None:
+                    ops.append(["set", [date_str], day])
+                else:
+                    ops.append(["set", [date_str, "block_tasks"], blocks])
+                ops.append(self._version_op(doc, date_str))
+            return doc.apply(ops)
+        self._apply(username, write)
+
+    def add_block(self, username, date_str, block):
+        self._set_blocks(username, [date_str], lambda blocks: blocks.append(dict(block)))
+
+    def add_blocks(self, username, date_strs, block):
+        self._set_blocks(username, list(dict.fromkeys(date_strs)), lambda blocks: blocks.append(dict(block)))
+
+    def update_block(self, username, date_str, index, **fields):
+        self._set_blocks(username, [date_str], lambda blocks: blocks[index].update(fields))
+
+    def delete_block(self, username, date_str, index):
+        self._set_blocks(username, [date_str], lambda blocks: blocks.pop(index))
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS days (
+    user_id INTEGER NOT NULL REFERENCES users(id),
+    date TEXT NOT NULL,
+    version INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, date)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS slots (
+    user_id INTEGER NOT NULL,
+    date TEXT NOT NULL,
+    slot TEXT NOT NULL,
+    text TEXT NOT NULL DEFAULT '',
+    completed INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, date, slot)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS block_tasks (
+    id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    date TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    start TEXT NOT NULL,
+    "end" TEXT NOT NULL,
+    color TEXT,
+    completed INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_block_tasks_user_date ON block_tasks (user_id, date, position);
+CREATE TABLE IF NOT EXISTS day_stats (
+    user_id INTEGER NOT NULL,
+    date TEXT NOT NULL,
+    tasks INTEGER NOT NULL,
+    completed INTEGER NOT NULL,
+    PRIMARY KEY (user_id, date)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS month_stats (
+    user_id INTEGER NOT NULL,
+    month TEXT NOT NULL,
+    tasks INTEGER NOT NULL,
+    completed INTEGER NOT NULL,
+    days INTEGER NOT NULL,
+    PRIMARY KEY (user_id, month)
+) WITHOUT ROWID;
+"""
+
+REBUILD_STATS = """
+DELETE FROM day_stats;
+DELETE FROM month_stats;
+INSERT INTO day_stats (user_id, date, tasks, completed)
+    SELECT d.user_id, d.date, COALESCE(SUM(s.text != ''), 0), COALESCE(SUM(s.completed != 0), 0)
+    FROM days d LEFT JOIN slots s ON s.user_id = d.user_id AND s.date = d.date
+    GROUP BY d.user_id, d.date;
+INSERT INTO month_stats (user_id, month, tasks, completed, days)
+    SELECT user_id, substr(date, 1, 7), SUM(tasks), SUM(completed), COUNT(*)
+    FROM day_stats GROUP BY user_id, substr(date, 1, 7);
+"""
+
+BLOCK_FIELDS = ("name", "start", "end", "color", "completed")
+
+
+class SqliteUserStore:
+    """SQLite(WAL) 저장소: 슬롯 하나가 한 행이므로 변경된 부분만 기록한다
+
+    (user, date) 가 모든 테이블 인덱스의 앞부분이라 하루치 로드/저장은
+    해당 날짜 행만 읽고 쓴다. day_stats / month_stats 는 같은 트랜잭션에서
+    바뀐 날짜의 차이만큼 갱신된다. days.version 이 하루 단위 버전이며,
+    base 를 준 save_day 는 BEGIN IMMEDIATE 로 쓰기 잠금을 먼저 잡고 비교한다.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path=None):
+        self.path = config.SQLITE_PATH if path is None else path
+        # 반복 규칙/검색 색인 문서를 두는 곳
+        self.data_dir = config.DATA_DIR if path is None else os.path.dirname(path) or "."
+        self._local = threading.local()
+        self._user_ids = {}
+        with self._conn() as conn:
+            conn.executescript(SCHEMA)
+            # version 열 추가 이전에 만든 DB
+            if "version" not in {row[1] for row in conn.execute("PRAGMA table_info(days)")}:
+                try:
+                    conn.execute("ALTER TABLE days ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+                except sqlite3.OperationalError:
+                    pass  # 다른 프로세스가 먼저 추가함
+            # 통계 테이블 추가 이전에 만든 DB 는 한 번 전체 계산
+            if (conn.execute("SELECT 1 FROM days LIMIT 1").fetchone()
+                    and not conn.execute("SELECT 1 FROM day_stats LIMIT 1").fetchone()):
+                conn.executescript(REBUILD_STATS)
+
+    def _conn(self):
+        # sqlite3 연결은 스레드 간 공유하지 않음 (Streamlit 세션은 스레드별 실행)
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _user_id(self, conn, username):
+        user_id = self._user_ids.get(username)
+        if user_id is None:
+            conn.execute("INSERT OR IGNORE INTO users (name) VALUES (?)", (username,))
+            user_id = conn.execute("SELECT id FROM users WHERE name = ?", (username,)).fetchone()[0]
+            self._user_ids[username] = user_id
+        return user_id
+
+    def _find_user_id(self, conn, username):
+        """읽기 전용 조회 (없는 사용자를 만들지 않음)"""
+        user_id = self._user_ids.get(username)
+        if user_id is None:
+            row = conn.execute("SELECT id FROM users WHERE name = ?", (username,)).fetchone()
+            if row is None:
+                return None
+            user_id = self._user_ids[username] = row[0]
+        return user_id
+
+    def usernames(self):
+        return [name for (name,) in self._conn().execute("SELECT name FROM users ORDER BY name")]
+
+    def release(self, username):
+        """이 스레드의 load_user 캐시에서 사용자를 뺌"""
+        cache = getattr(self._local, "cache", None)
+        if cache is not None:
+            cache.invalidate(username)
+
+    def _index(self, username, date_strs):
+        """트랜잭션이 끝난 뒤 date_strs 를 다시 읽어 검색 색인에 반영"""
+        index_days(self, username, {date_str: self.load_day(username, date_str) for date_str in date_strs})
+
+    def _touch_day(self, conn, user_id, date_str):
+        conn.execute("INSERT OR IGNORE INTO days (user_id, date) VALUES (?, ?)", (user_id, date_str))
+
+    def _bump_version(self, conn, user_id, date_str):
+        conn.execute("UPDATE days SET version = version + 1 WHERE user_id = ? AND date = ?",
+                     (user_id, date_str))
+
+    def _refresh_day_stats(self, conn, user_id, date_str, deleted=False):
+        """date_str 의 작업/완료 수를 다시 세어 일별/월별 집계에 차이만 반영"""
+        old = conn.execute("SELECT tasks, completed FROM day_stats WHERE user_id = ? AND date = ?",
+                           (user_id, date_str)).fetchone()
+        if deleted:
+            if old is None:
+                return
+            new = None
+            conn.execute("DELETE FROM day_stats WHERE user_id = ? AND date = ?", (user_id, date_str))
+        else:
+            new = conn.execute(
+                "SELECT COALESCE(SUM(text != ''), 0), COALESCE(SUM(completed != 0), 0) "
+                "FROM slots WHERE user_id = ? AND date = ?", (user_id, date_str)).fetchone()
+            if old == new:
+                return
+            conn.execute(
+                "INSERT INTO day_stats (user_id, date, tasks, completed) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (user_id, date) DO UPDATE SET tasks = excluded.tasks, completed = excluded.completed",
+                (user_id, date_str, *new))
+        old_tasks, old_completed = old or (0, 0)
+        new_tasks, new_completed = new or (0, 0)
+        conn.execute(
+            "INSERT INTO month_stats (user_id, month, tasks, completed, days) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (user_id, month) DO UPDATE SET tasks = tasks + excluded.tasks, "
+            "completed = completed + excluded.completed, days = days + excluded.days",
+            (user_id, date_str[:7], new_tasks - old_tasks, new_completed - old_completed,
+             (old is None) - (new is None)))
+        if new is None:
+            conn.execute("DELETE FROM month_stats WHERE user_id = ? AND month = ? AND days <= 0",
+                         (user_id, date_str[:7]))
+
+    def load_stats(self, username):
+        """월별/전체 통계 (월 수만큼만 읽으며 일별 값은 채우지 않음)"""
+        conn = self._conn()
+        user_id = self._find_user_id(conn, username)
+        rollup = StatsRollup()
+        if user_id is None:
+            return rollup
+        for month, tasks, completed, days in conn.execute(
+                "SELECT month, tasks, completed, days FROM month_stats WHERE user_id = ? ORDER BY month",
+                (user_id,)):
+            rollup.months[month] = [tasks, completed, days]
+            rollup.total[0] += tasks
+            rollup.total[1] += completed
+        return rollup
+
+    @staticmethod
+    def _block_row(row):
+        name, start, end, color, completed = row
+        return {"name": name, "start": start, "end": end, "color": color, "completed": bool(completed)}
+
+    @staticmethod
+    def _put_slot(tasks, slot, text, completed):
+        if text:
+            tasks[slot] = text
+        if completed:
+            tasks[slot + COMPLETED_SUFFIX] = True
+
+    def load_user(self, username):
+        """{날짜: 하루} (스레드별 캐시와 공유하므로 읽기 전용)
+
+        캐시 항목은 연결의 PRAGMA data_version (다른 연결/프로세스가 커밋하면
+        바뀜) 과 total_changes (이 연결이 바꾼 행 수) 로 검증하므로 쓰기
+        메서드마다 무효화할 필요가 없다. 연결처럼 캐시도 스레드마다 둔다.
+        """
+        conn = self._conn()
+        stamp = (conn.execute("PRAGMA data_version").fetchone()[0], conn.total_changes)
+        cache = getattr(self._local, "cache", None)
+        if cache is None:
+            cache = self._local.cache = UserDataCache()
+        data = cache.get(username, stamp)
+        if data is None:
+            data = self._query_user(conn, username)
+            # 크기 대신 항목 수로만 제한
+            cache.put(username, stamp, data, 0)
+        return data
+
+    def _query_user(self, conn, username):
+        user_id = self._find_user_id(conn, username)
+        data = {}
+        if user_id is None:
+            return data
+        for date_str, version in conn.execute(
+                "SELECT date, version FROM days WHERE user_id = ? ORDER BY date", (user_id,)):
+            data[date_str] = {**empty_day(), "version": version}
+        for date_str, slot, text, completed in conn.execute(
+                "SELECT date, slot, text, completed FROM slots WHERE user_id = ?", (user_id,)):
+            self._put_slot(data.setdefault(date_str, empty_day())["tasks"], slot, text, completed)
+        for row in conn.execute(
+                'SELECT date, name, start, "end", color, completed FROM block_tasks '
+                'WHERE user_id = ? ORDER BY date, position', (user_id,)):
+            data.setdefault(row[0], empty_day())["block_tasks"].append(self._block_row(row[1:]))
+        return data
+
+    def load_day(self, username, date_str):
+        conn = self._conn()
+        user_id = self._find_user_id(conn, username)
+        day = empty_day()
+        if user_id is None:
+            return day
+        row = conn.execute("SELECT version FROM days WHERE user_id = ? AND date = ?",
+                           (user_id, date_str)).fetchone()
+        if row:
+            day["version"] = row[0]
+        for slot, text, completed in conn.execute(
+                "SELECT slot, text, completed FROM slots WHERE user_id = ? AND date = ?",
+                (user_id, date_str)):
+            self._put_slot(day["tasks"], slot, text, completed)
+        for row in conn.execute(
+                'SELECT name, start, "end", color, completed FROM block_tasks '
+                'WHERE user_id = ? AND date = ? ORDER BY position', (user_id, date_str)):
+            day["block_tasks"].append(self._block_row(row))
+        return day
+
+    def _write_day(self, conn, user_id, date_str, day):
+        """기존 행과 비교해 바뀐 슬롯만 UPSERT/DELETE, 바뀐 것이 있으면 버전 증가"""
+        changed = conn.execute("INSERT OR IGNORE INTO days (user_id, date) VALUES (?, ?)",
+                               (user_id, date_str)).rowcount
+        new_slots = split_tasks(day.get("tasks", {}))
+        old_slots = {
+            slot: [text, bool(completed)]
+            for slot, text, completed in conn.execute(
+                "SELECT slot, text, completed FROM slots WHERE user_id = ? AND date = ?",
+                (user_id, date_str))
+        }
+        upserts = [(user_id, date_str, slot, text, int(completed))
+                   for slot, (text, completed) in new_slots.items()
+                   if old_slots.get(slot) != [text, completed]]
+        deletes = [(user_id, date_str, slot) for slot in old_slots if slot not in new_slots]
+        conn.executemany(
+            "INSERT INTO slots (user_id, date, slot, text, completed) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (user_id, date, slot) DO UPDATE SET text = excluded.text, completed = excluded.completed",
+            upserts)
+        conn.executemany("DELETE FROM slots WHERE user_id = ? AND date = ? AND slot = ?", deletes)
+        changed = changed or upserts or deletes
+
+        blocks = [{field: block.get(field) for field in BLOCK_FIELDS} for block in day.get("block_tasks", [])]
+        old_blocks = [
+            self._block_row(row) for row in conn.execute(
+                'SELECT name, start, "end", color, completed FROM block_tasks '
+                'WHERE user_id = ? AND date = ? ORDER BY position', (user_id, date_str))
+        ]
+        for block in blocks:
+            block["completed"] = bool(block["completed"])
+        if blocks != old_blocks:
+            conn.execute("DELETE FROM block_tasks WHERE user_id = ? AND date = ?", (user_id, date_str))
+            conn.executemany(
+                'INSERT INTO block_tasks (user_id, date, position, name, start, "end", color, completed) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                [(user_id, date_str, i, b["name"], b["start"], b["end"], b["color"], int(b["completed"]))
+                 for i, b in enumerate(blocks)])
+            changed = True
+        if changed:
+            self._bump_version(conn, user_id, date_str)
+        self._refresh_day_stats(conn, user_id, date_str)
+
+    def save_user(self, username, data):
+        conn = self._conn()
+        with conn:
+            user_id = self._user_id(conn, username)
+            for date_str, day in data.items():
+                self._write_day(conn, user_id, date_str, day)
+            known = [d for (d,) in conn.execute("SELECT date FROM days WHERE user_id = ?", (user_id,))]
+            removed = [date_str for date_str in known if date_str not in data]
+            for date_str in removed:
+                self._refresh_day_stats(conn, user_id, date_str, deleted=True)
+                for table in ("slots", "block_tasks", "days"):
+                    conn.execute(f"DELETE FROM {table} WHERE user_id = ? AND date = ?", (user_id, date_str))
+        index_days(self, username, {**dict.fromkeys(removed), **data})
+
+    def save_day(self, username, date_str, day, base=None, prefer_mine=False):
+        """하루를 저장하고 저장된 하루(병합 결과, 새 버전) 반환"""
+        conn = self._conn()
+        with conn:
+            if base is not None:
+                # 비교와 기록 사이에 다른 프로세스가 끼어들지 않도록 쓰기 잠금부터
+                conn.execute("BEGIN IMMEDIATE")
+                day = resolve_day(self.load_day(username, date_str), day, base, prefer_mine)
+            self._write_day(conn, self._user_id(conn, username), date_str, day)
+        saved = self.load_day(username, date_str)
+        index_days(self, username, {date_str: saved})
+        return saved
+
+    def save_days(self, username, days):
+        """days {날짜: 하루} 의 날짜를 통째로 바꿈 (트랜잭션 하나)"""
+        conn = self._conn()
+        with conn:
+            user_id = self._user_id(conn, username)
+            for date_str, day in days.items():
+                self._write_day(conn, user_id, date_str, compact_day(without_version(day)))
+        index_days(self, username, days)
+
+    def set_slot(self, username, date_str, slot, text=None, completed=None):
+        conn = self._conn()
+        with conn:
+            user_id = self._user_id(conn, username)
+            self._touch_day(conn, user_id, date_str)
+            self._bump_version(conn, user_id, date_str)
+            if text is not None and completed is not None:
+                conn.execute(
+                    "INSERT INTO slots (user_id, date, slot, text, completed) VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT (user_id, date, slot) DO UPDATE SET text = excluded.text, completed = excluded.completed",
+                    (user_id, date_str, slot, text, int(completed)))
+            elif text is not None:
+                conn.execute(
+                    "INSERT INTO slots (user_id, date, slot, text) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT (user_id, date, slot) DO UPDATE SET text = excluded.text",
+                    (user_id, date_str, slot, text))
+            elif completed is not None:
+                conn.execute(
+                    "INSERT INTO slots (user_id, date, slot, completed) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT (user_id, date, slot) DO UPDATE SET completed = excluded.completed",
+                    (user_id, date_str, slot, int(completed)))
+            # 내용도 완료 표시도 없는 슬롯은 행을 남기지 않음
+            conn.execute("DELETE FROM slots WHERE user_id = ? AND date = ? AND slot = ? "
+                         "AND text = '' AND completed = 0", (user_id, date_str, slot))
+            self._refresh_day_stats(conn, user_id, date_str)
+        if text is not None:
+            self._index(username, [date_str])
+
+    def flush(self, username=None):
+        """바로 기록하므로 할 일 없음 (BufferedUserStore 와 같은 인터페이스)"""
+
+    def delete_empty_slots(self):
+        """희소 저장 이전에 기록된 빈 슬롯 행 삭제, 삭제한 행 수 반환"""
+        conn = self._conn()
+        with conn:
+            return conn.execute("DELETE FROM slots WHERE text = '' AND completed = 0").rowcount
+
+    def add_block(self, username, date_str, block):
+        self.add_blocks(username, [date_str], block)
+
+    def add_blocks(self, username, date_strs, block):
+        """같은 블록을 여러 날짜에 추가 (트랜잭션 하나)"""
+        conn = self._conn()
+        with conn:
+            user_id = self._user_id(conn, username)
+            rows = []
+            for date_str in dict.fromkeys(date_strs):
+                self._touch_day(conn, user_id, date_str)
+                self._bump_version(conn, user_id, date_str)
+                self._refresh_day_stats(conn, user_id, date_str)
+                position = conn.execute(
+                    "SELECT COALESCE(MAX(position) + 1, 0) FROM block_tasks WHERE user_id = ? AND date = ?",
+                    (user_id, date_str)).fetchone()[0]
+                rows.append((user_id, date_str, position, block["name"], block["start"], block["end"],
+                             block.get("color"), int(bool(block.get("completed", False)))))
+            conn.executemany(
+                'INSERT INTO block_tasks (user_id, date, position, name, start, "end", color, completed) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)', rows)
+        self._index(username, dict.fromkeys(date_strs))
+
+    def update_block(self, username, date_str, index, **fields):
+        unknown = set(fields) - set(BLOCK_FIELDS)
+        if unknown:
+            raise ValueError(f"알 수 없는 블록 필드: {', '.join(sorted(unknown))}")
+        if "completed" in fields:
+            fields["completed"] = int(bool(fields["completed"]))
+        conn = self._conn()
+        with conn:
+            user_id = self._user_id(conn, username)
+            assignments = ", ".join(f'"{field}" = ?' for field in fields)
+            conn.execute(
+                f"UPDATE block_tasks SET {assignments} WHERE user_id = ? AND date = ? AND position = ?",
+                (*fields.values(), user_id, date_str, index))
+            self._bump_version(conn, user_id, date_str)
+        if "name" in fields or "start" in fields or "end" in fields:
+            self._index(username, [date_str])
+
+    def delete_block(self, username, date_str, index):
+        conn = self._conn()
+        with conn:
+            user_id = self._user_id(conn, username)
+            conn.execute("DELETE FROM block_tasks WHERE user_id = ? AND date = ? AND position = ?",
+                         (user_id, date_str, index))
+            conn.execute("UPDATE block_tasks SET position = position - 1 "
+                         "WHERE user_id = ? AND date = ? AND position > ?", (user_id, date_str, index))
+            self._bump_version(conn, user_id, date_str)
+        self._index(username, [date_str])
+
+
+class BufferedUserStore:
+    """다른 저장소 앞에 두는 쓰기 지연 계층
+
+    save_day / set_slot 은 (사용자, 날짜) 별 최신 하루 데이터만 메모리에
+    남기고, 버퍼가 기록할 때 내부 저장소의 save_day 한 번으로 반영한다.
+    읽기는 미기록 데이터를 우선한다. 블록 작업 변경과 통계 조회 전에는
+    해당 사용자/날짜를 먼저 기록한다.
+
+    버퍼에는 처음 고치기 시작한 시점의 하루(base)도 함께 두어, 기록할 때
+    그 사이 다른 프로세스가 남긴 변경과 병합한다. 기록 시점에는 사용자에게
+    알릴 수 없으므로 같은 슬롯 충돌은 이 세션의 값으로 정한다.
+    """
+
+    def __init__(self, store, max_delay, max_dirty):
+        self.store = store
+        self.name = store.name
+        self.buffer = WriteBehindBuffer(
+            lambda key, value: store.save_day(key[0], key[1], value[0], base=value[1], prefer_mine=True),
+            max_delay=max_delay, max_dirty=max_dirty)
+
+    def __getattr__(self, attr):
+        return getattr(self.store, attr)
+
+    def _user_keys(self, username):
+        return [key for key in self.buffer.pending() if key[0] == username]
+
+    def _put(self, username, date_str, day, base=None):
+        key = (username, date_str)
+        pending = self.buffer.get(key)
+        if pending is not None:
+            base = pending[1]
+        elif base is None:
+            base = self.store.load_day(username, date_str)
+        self.buffer.put(key, (compact_day(clone(day)), clone(base)))
+
+    def flush(self, username=None):
+        return self.buffer.flush(None if username is None else self._user_keys(username))
+
+    def load_user(self, username):
+        data = self.store.load_user(username)
+        keys = self._user_keys(username)
+        if keys:
+            data = dict(data)
+        for key in keys:
+            data[key[1]] = clone(self.buffer.get(key)[0])
+        return data
+
+    def load_day(self, username, date_str):
+        pending = self.buffer.get((username, date_str))
+        return clone(pending[0]) if pending is not None else self.store.load_day(username, date_str)
+
+    def save_user(self, username, data):
+        # 전체 저장이 미기록 날짜보다 새로움
+        self.buffer.discard(self._user_keys(username))
+        self.store.save_user(username, data)
+
+    def save_day(self, username, date_str, day, base=None, prefer_mine=False):
+        self._put(username, date_str, day, base)
+        return self.load_day(username, date_str)
+
+    def save_days(self, username, days):
+        self.buffer.flush([(username, date_str) for date_str in days])
+        self.store.save_days(username, days)
+
+    def set_slot(self, username, date_str, slot, text=None, completed=None):
+        day = self.load_day(username, date_str)
+        update_slot(day.setdefault("tasks", {}), slot, text, completed)
+        self._put(username, date_str, day)
+
+    def load_stats(self, username):
+        self.flush(username)
+        return self.store.load_stats(username)
+
+    def add_block(self, username, date_str, block):
+        self.buffer.flush([(username, date_str)])
+        self.store.add_block(username, date_str, block)
+
+    def add_blocks(self, username, date_strs, block):
+        date_strs = list(date_strs)
+        self.buffer.flush([(username, date_str) for date_str in date_strs])
+        self.store.add_blocks(username, date_strs, block)
+
+    def update_block(self, username, date_str, index, **fields):
+        self.buffer.flush([(username, date_str)])
+        self.store.update_block(username, date_str, index, **fields)
+
+    def delete_block(self, username, date_str, index):
+        self.buffer.flush([(username, date_str)])
+        self.store.delete_block(username, date_str, index)
+
+
+BACKENDS = {
+    "json": JsonUserStore,
+    "journal": JournalUserStore,
+    "sqlite": SqliteUserStore,
+}
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def open_store(backend, data_dir):
+    """data_dir 안의 사용자별 저장소 (설정과 무관하게, 공유하지 않음)"""
+    if backend == "sqlite":
+        return SqliteUserStore(os.path.join(data_dir, "planner.db"))
+    if backend not in BACKENDS:
+        raise ValueError(f"지원하지 않는 저장소: {backend} (가능: {', '.join(BACKENDS)})")
+    return BACKENDS[backend](data_dir)
+
+
+def get_store(backend=None):
+    """설정된 (또는 지정한) 저장소 인스턴스, 프로세스 내에서 공유"""
+    backend = backend or config.BACKEND
+    with _stores_lock:
+        store = _stores.get(backend)
+        if store is None:
+            if backend not in BACKENDS:
+                raise ValueError(f"지원하지 않는 저장소: {backend} (가능: {', '.join(BACKENDS)})")
+            store = BACKENDS[backend]()
+            if config.WRITE_BEHIND_DELAY > 0:
+                store = BufferedUserStore(store, config.WRITE_BEHIND_DELAY, config.WRITE_BEHIND_MAX_DIRTY)
+            _stores[backend] = store
+        return store
@@ -0,0 +1,248 @@
+"""플래너 데이터 내보내기/가져오기 (NDJSON 또는 CSV)
+
+레코드 한 줄이 하루/슬롯/블록/반복 규칙 하나이다. 사용자별 형식 레코드에는
+"user" 가 있고 날짜별 형식(web_planner.py) 레코드에는 없다::
+
+    {"kind": "day", "user", "date", "version"}                     빈 날짜도 남김
+    {"kind": "slot", "user", "date", "key", "text", "done"}        날짜별 형식은 "type" 도
+    {"kind": "block", "user", "date", "text", "start", "end", "color", "done"}
+    {"kind": "rule", "user", "rule": {반복 규칙}}
+
+블록의 "text" 는 사용자별 형식의 name 이다. 내보내기는 사용자 한 명(또는 날짜
+파일 하나)씩 읽어 바로 쓰고, 가져오기는 batch 개 레코드마다 모인 사용자/날짜를
+한 번씩 읽고 한 번씩 기록하므로 사용자 수와 무관하게 메모리가 일정하다.
+가져온 하루는 저장된 같은 날짜를 통째로 바꾸며 버전은 저장소가 새로 매긴다.
+
+    python -m planner.transfer export --out backup.ndjson
+    python -m planner.transfer export --layout per-user --format csv --out users.csv
+    python -m planner.transfer import backup.ndjson --backend sqlite --batch 5000
+"""
+import argparse
+import csv
+import json
+import sys
+from contextlib import nullcontext
+from datetime import date
+
+from planner import config
+from planner.datefiles import flush as flush_dates
+from planner.datefiles import read_tasks_file, save_tasks
+from planner.day import BLOCKS_KEY
+from planner.journal import release_document
+from planner.manifest import date_paths
+from planner.recurrence import date_book, user_book
+from planner.sparse import update_slot
+from planner.storage import get_store, split_tasks
+
+FORMATS = ("ndjson", "csv")
+LAYOUTS = ("per-user", "per-date")
+CSV_FIELDS = ("kind", "user", "date", "key", "text", "done", "type", "start", "end", "color", "version", "rule")
+DEFAULT_BATCH = 1000
+PROGRESS_EVERY = 10000
+
+
+def user_records(store, username):
+    """사용자 한 명의 레코드"""
+    for date_str, day in sorted(store.load_user(username).items()):
+        yield {"kind": "day", "user": username, "date": date_str, "version": day.get("version", 0)}
+        for slot, (text, done) in sorted(split_tasks(day.get("tasks", {})).items()):
+            yield {"kind": "slot", "user": username, "date": date_str, "key": slot, "text": text, "done": done}
+        for block in day.get("block_tasks", []):
+            yield {"kind": "block", "user": username, "date": date_str, "text": block["name"],
+                   "start": block["start"], "end": block["end"], "color": block.get("color"),
+                   "done": bool(block.get("completed"))}
+    for rule in user_book(username, store.data_dir).rules().values():
+        yield {"kind": "rule", "user": username, "rule": rule}
+    store.release(username)
+
+
+def date_records(data_dir=None):
+    """날짜별 형식의 레코드 (날짜 파일 하나씩)"""
+    data_dir = config.DATA_DIR if data_dir is None else data_dir
+    flush_dates()
+    for date_str, path in date_paths(data_dir).items():
+        tasks = read_tasks_file(path)
+        release_document(path)
+        for key, task in sorted(tasks.items()):
+            if isinstance(task, dict):
+                yield {"kind": "slot", "date": date_str, "key": key, "text": task.get("text", ""),
+                       "done": bool(task.get("done")), "type": task.get("type", "normal")}
+        for block in tasks.get(BLOCKS_KEY) or []:
+            yield {"kind": "block", "date": date_str, "text": block["text"], "start": block["start"],
+                   "end": block["end"], "done": bool(block.get("done"))}
+    for rule in date_book(data_dir).rules().values():
+        yield {"kind": "rule", "rule": rule}
+
+
+def export_records(store=None, layouts=LAYOUTS, usernames=None):
+    """layouts 의 모든 레코드 (usernames 를 주면 그 사용자만)"""
+    if "per-user" in layouts:
+        store = store or get_store()
+        store.flush()
+        for username in usernames or store.usernames():
+            yield from user_records(store, username)
+    if "per-date" in layouts and not usernames:
+        yield from date_records()
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, dict):
+        return json.dumps(value, ensure_ascii=False)
+    return value
+
+
+def _from_csv_row(row):
+    record = {key: value for key, value in row.items() if value != ""}
+    if "done" in record:
+        record["done"] = record["done"] == "1"
+    if "version" in record:
+        record["version"] = int(record["version"])
+    if "rule" in record:
+        record["rule"] = json.loads(record["rule"])
+    return record
+
+
+def write_records(records, out, fmt="ndjson", progress=None):
+    """레코드를 out 에 한 줄씩 쓰고 개수 반환, PROGRESS_EVERY 개마다 progress(개수)"""
+    writer = csv.DictWriter(out, CSV_FIELDS) if fmt == "csv" else None
+    if writer:
+        writer.writeheader()
+    count = 0
+    for record in records:
+        if writer:
+            writer.writerow({key: _csv_value(record.get(key)) for key in CSV_FIELDS})
+        else:
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+        count += 1
+        if progress and count % PROGRESS_EVERY == 0:
+            progress(count)
+    return count
+
+
+def read_records(source, fmt="ndjson"):
+    """source (파일 객체) 의 레코드를 한 줄씩"""
+    if fmt == "csv":
+        for row in csv.DictReader(source):
+            yield _from_csv_row(row)
+        return
+    for line in source:
+        if line.strip():
+            yield json.loads(line)
+
+
+class _Batch:
+    """가져올 레코드를 사용자/날짜별 하루로 모음"""
+
+    def __init__(self, store):
+        self.store = store
+        self.users = {}
+        self.dates = {}
+        self.size = 0
+
+    def add(self, record):
+        kind, username, date_str = record.get("kind"), record.get("user"), record.get("date")
+        if kind == "rule":
+            (user_book(username, self.store.data_dir) if username else date_book()).add(record["rule"])
+        elif username:
+            day = self.users.setdefault(username, {}).setdefault(date_str, {"tasks": {}, "block_tasks": []})
+            if kind == "slot":
+                update_slot(day["tasks"], record["key"], record.get("text", ""), record.get("done", False))
+            elif kind == "block":
+                day["block_tasks"].append({"name": record.get("text", ""), "start": record["start"],
+                                           "end": record["end"], "color": record.get("color"),
+                                           "completed": record.get("done", False)})
+            elif kind != "day":
+                raise ValueError(f"알 수 없는 레코드: {kind}")
+        else:
+            tasks = self.dates.setdefault(date_str, {})
+            if kind == "slot":
+                tasks[record["key"]] = {"text": record.get("text", ""), "done": record.get("done", False),
+                                        "type": record.get("type", "normal")}
+            elif kind == "block":
+                tasks.setdefault(BLOCKS_KEY, []).append({"text": record.get("text", ""), "start": record["start"],
+                                                         "end": record["end"], "done": record.get("done", False)})
+            else:
+                raise ValueError(f"알 수 없는 레코드: {kind}")
+        self.size += 1
+
+    def write(self):
+        """사용자마다 한 번 기록 (save_days), 날짜 파일마다 한 번 기록"""
+        for username, days in self.users.items():
+            self.store.save_days(username, days)
+            self.store.release(username)
+        for date_str, tasks in self.dates.items():
+            save_tasks(date.fromisoformat(date_str), tasks)
+        self.users, self.dates, self.size = {}, {}, 0
+
+
+def import_records(records, store=None, batch_size=DEFAULT_BATCH, progress=None):
+    """레코드를 약 batch_size 개씩 저장하고 개수 반환, 배치마다 progress(개수)
+
+    하루가 두 배치에 나뉘면 뒤 배치가 앞 배치를 덮으므로 배치는 (사용자, 날짜)가
+    바뀌는 곳에서만 나눈다. 같은 하루의 레코드는 내보낸 순서처럼 이어져 있어야 한다.
+    """
+    batch = _Batch(store or get_store())
+    count = 0
+    last_key = None
+    for record in records:
+        key = (record.get("user"), record.get("date"))
+        if batch.size >= batch_size and key != last_key:
+            batch.write()
+            if progress:
+                progress(count)
+        batch.add(record)
+        count += 1
+        last_key = key
+    batch.write()
+    batch.store.flush()
+    flush_dates()
+    return count
+
+
+def _format(path, fmt):
+    return fmt or ("csv" if path and path.endswith(".csv") else "ndjson")
+
+
+def _open(path, mode):
+    if path in (None, "-"):
+        return nullcontext(sys.stdout if "w" in mode else sys.stdin)
+    return open(path, mode, encoding="utf-8", newline="")
+
+
+def _report(label):
+    return lambda count: print(f"{label} {count}개", file=sys.stderr, flush=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Daily Planner 데이터 내보내기/가져오기")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export = commands.add_parser("export", help="레코드를 NDJSON/CSV 로 내보냄")
+    export.add_argument("--out", default="-", help="출력 파일 (기본: 표준 출력, .csv 면 CSV)")
+    export.add_argument("--layout", nargs="+", choices=LAYOUTS, default=list(LAYOUTS))
+    export.add_argument("--user", nargs="+", help="이 사용자만 (사용자별 형식)")
+    load = commands.add_parser("import", help="NDJSON/CSV 레코드를 가져옴")
+    load.add_argument("source", help="입력 파일 (- 는 표준 입력, .csv 면 CSV)")
+    load.add_argument("--batch", type=int, default=DEFAULT_BATCH, help="한 번에 기록할 레코드 수")
+    for command in (export, load):
+        command.add_argument("--format", choices=FORMATS, help="기본: 파일 확장자로 판단")
+        command.add_argument("--backend", help="사용자별 형식 저장소 (기본: PLANNER_BACKEND)")
+    args = parser.parse_args(argv)
+    store = get_store(args.backend)
+    if args.command == "export":
+        with _open(args.out, "w") as out:
+            count = write_records(export_records(store, args.layout, args.user), out,
+                                  _format(args.out, args.format), _report("내보냄:"))
+        print(f"레코드 {count}개를 내보냈습니다.", file=sys.stderr)
+    else:
+        with _open(args.source, "r") as source:
+            count = import_records(read_records(source, _format(args.source, args.format)), store,
+                                   args.batch, _report("가져옴:"))
+        print(f"레코드 {count}개를 가져왔습니다.", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""주간 보기/통계 화면의 표(DataFrame)와 차트(Figure) 캐시
+
+키는 (보기 이름, 사용자 또는 데이터 디렉터리, 기간) 이고 버전은 화면에 그릴
+표 행(planner.reports.rows_version)이다. 버전이 같으면 pandas/plotly 로 다시
+만들지 않고 이전 결과를 돌려주며, 다른 슬롯을 고쳐도 그 보기의 행이 그대로면
+차트도 그대로 쓴다. 키마다 최신 버전 하나만 두고, 전체는 항목 수와 대략적인
+크기(표 메모리 + 차트 JSON 길이)로 제한한다.
+
+저장한 값은 모든 세션이 공유하므로 호출자는 읽기 전용으로만 쓴다.
+"""
+import sys
+import threading
+from collections import OrderedDict
+
+DEFAULT_MAX_ENTRIES = 256
+DEFAULT_MAX_BYTES = 16 * 1024 * 1024
+
+
+def approx_size(value):
+    """DataFrame(memory_usage) / Figure(to_json) / 튜플의 대략적인 바이트 수"""
+    if isinstance(value, (tuple, list)):
+        return sum(approx_size(item) for item in value)
+    if hasattr(value, "memory_usage"):
+        return int(value.memory_usage(deep=True).sum())
+    if hasattr(value, "to_json"):
+        return len(value.to_json())
+    return sys.getsizeof(value)
+
+
+class ViewCache:
+    """key -> (version, value, nbytes) LRU"""
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, version):
+        """version 이 일치하는 값 (없으면 None)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, version, value, nbytes):
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.total_bytes -= old[2]
+            if nbytes > self.max_bytes:
+                return
+            self._entries[key] = (version, value, nbytes)
+            self.total_bytes += nbytes
+            while self._entries and (len(self._entries) > self.max_entries
+                                     or self.total_bytes > self.max_bytes):
+                _, (_, _, size) = self._entries.popitem(last=False)
+                self.total_bytes -= size
+
+    def get_or_build(self, key, version, build, size=approx_size):
+        """캐시에 없거나 버전이 다르면 build() 로 만들어 저장"""
+        value = self.get(key, version)
+        if value is None:
+            # 잠금 밖에서 만듦: 같은 키를 동시에 만들면 나중 것이 남음
+            value = build()
+            self.put(key, version, value, size(value))
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+
+
+# 모든 세션이 공유하는 캐시
+view_cache = ViewCache()
@@ -0,0 +1,117 @@
+"""쓰기 지연(write-behind) 버퍼
+
+저장 요청을 바로 파일/DB 에 쓰지 않고 키(날짜 등)별 최신 값만 메모리에
+모아 둔다. 같은 날짜를 여러 번 고쳐도 마지막 값 한 번만 기록된다.
+
+다음 중 하나가 되면 기록한다.
+
+- 가장 오래된 미기록 변경이 max_delay 초를 넘었을 때 (백그라운드 타이머)
+- 미기록 키가 max_dirty 개 이상일 때
+- flush() 를 호출했을 때 (로그아웃, 프로세스 종료 시 atexit)
+
+따라서 프로세스가 비정상 종료되어도 잃는 변경은 최대 max_delay 초 분량이다.
+"""
+import atexit
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindBuffer:
+    """키별 최신 값을 모았다가 write(key, value) 로 기록"""
+
+    def __init__(self, write, max_delay=2.0, max_dirty=32):
+        self.max_delay = max_delay
+        self.max_dirty = max_dirty
+        self._write = write
+        self._dirty = {}
+        self._writing = {}
+        self._since = None
+        self._closed = False
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def put(self, key, value):
+        with self._cond:
+            self._dirty[key] = value
+            if self._since is None:
+                self._since = time.monotonic()
+                self._cond.notify()
+            full = len(self._dirty) >= self.max_dirty
+        if full:
+            self.flush()
+
+    def get(self, key, default=None):
+        """아직 기록되지 않은 값 (기록 중인 값 포함)"""
+        with self._cond:
+            if key in self._dirty:
+                return self._dirty[key]
+            return self._writing.get(key, default)
+
+    def pending(self):
+        with self._cond:
+            return {**self._writing, **self._dirty}
+
+    def discard(self, keys):
+        """기록하지 않고 버림 (더 새로운 전체 저장으로 대체될 때)"""
+        with self._cond:
+            for key in keys:
+                self._dirty.pop(key, None)
+            if not self._dirty:
+                self._since = None
+
+    def flush(self, keys=None):
+        """미기록 값을 기록 (keys 를 주면 해당 키만), 기록한 개수 반환"""
+        with self._flush_lock:
+            with self._cond:
+                if keys is None:
+                    batch, self._dirty = self._dirty, {}
+                else:
+                    batch = {key: self._dirty.pop(key) for key in keys if key in self._dirty}
+                if not self._dirty:
+                    self._since = None
+                self._writing = dict(batch)
+            written = 0
+            try:
+                for key in list(batch):
+                    self._write(key, batch[key])
+                    del batch[key]
+                    written += 1
+            finally:
+                with self._cond:
+                    # 실패한 값은 다시 대기열로 (그 사이 들어온 더 새 값이 우선)
+                    for key, value in batch.items():
+                        self._dirty.setdefault(key, value)
+                    if self._dirty and self._since is None:
+                        self._since = time.monotonic()
+                    self._writing = {}
+        return written
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._since is None and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                remaining = self._since + self.max_delay - time.monotonic()
+                if remaining > 0:
+                    self._cond.wait(remaining)
+                    continue
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("쓰기 지연 버퍼 기록 실패, 다음 주기에 다시 시도")
+                time.sleep(self.max_delay)
+
+    def close(self):
+        """남은 값을 모두 기록하고 타이머 종료"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self.flush()
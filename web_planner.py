@@ -1,10 +1,15 @@
 import streamlit as st
-import datetime
-import json
-import os
-import pandas as pd
-import plotly.express as px
-from datetime import datetime, date, timedelta
+from datetime import date, timedelta
+from planner import config
+from planner.datefiles import (add_block_task, add_block_tasks, expand_blocks, get_section_name, get_time_slots,
+                               load_tasks, make_block, overlapping_blocks, patch_slot, patch_slots)
+from planner.datefiles import flush as flush_dates
+from planner.grid import TIME_COLUMN, TYPE_COLUMN, date_grid_rows, diff_date_grid
+from planner.metrics import rerun, span, timed
+from planner.recurrence import FREQS, WEEKDAY_NAMES, date_book, dates_between, describe, make_rule
+from planner.search import date_index
+from planner.reports import date_recent_rows, date_week_rows, rows_version, week_dates
+from planner.viewcache import view_cache
 
 # 페이지 설정
 st.set_page_config(
@@ -133,47 +138,10 @@ if 'tasks' not in st.session_state:
 if 'show_date_picker' not in st.session_state:
     st.session_state.show_date_picker = False
 
-def load_tasks(date_obj):
-    """특정 날짜의 작업을 로드"""
-    filename = f"{date_obj.isoformat()}.json"
-    if os.path.exists(filename):
-        try:
-            with open(filename, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except:
-            return {}
-    return {}
-
-def save_tasks(date_obj, tasks):
-    """작업을 저장"""
-    filename = f"{date_obj.isoformat()}.json"
-    if tasks:
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(tasks, f, ensure_ascii=False, indent=2)
-    elif os.path.exists(filename):
-        os.remove(filename)
-
-def get_time_slots():
-    """30분 단위 시간 슬롯 생성"""
-    slots = []
-    for hour in range(24):
-        for minute in [0, 30]:
-            time_str = f"{hour:02d}:{minute:02d}"
-            slots.append(time_str)
-    return slots
-
-def get_section_name(hour):
-    """시간대별 섹션 이름"""
-    if 6 <= hour < 12:
-        return "오전"
-    elif 12 <= hour < 18:
-        return "오후"
-    elif 18 <= hour < 24:
-        return "밤"
-    else:
-        return "새벽"
+VIEWS = ["📝 일일 플래너", "📊 주간 보기", "📈 통계"]
 
 def main():
+    selected_date = st.session_state.selected_date
     st.markdown('<h1 class="main-header">📅 Daily Planner</h1>', unsafe_allow_html=True)
     
     # 사이드바 - 날짜 선택 및 블록 작업
@@ -234,54 +202,130 @@ def main():
         with col2:
             end_time = st.selectbox("종료 시간", get_time_slots(), index=20)    # 10:00
         
+        # 겹치는 기존 블록 (나중에 추가한 블록이 위에 표시됨)
+        overlaps = overlapping_blocks(load_tasks(selected_date), start_time, end_time)
+        if overlaps:
+            st.warning("기존 블록과 겹칩니다: " + ", ".join(
+                f"{text} ({start}-{end})" for text, start, end in overlaps))
+        
+        repeat = repeat_input("block_repeat")
+        dates = None if repeat else dates_input("block_dates")
+        
         if st.button("블록 작업 추가", type="primary"):
-            if block_text:
+            if block_text and end_time < start_time:
+                st.error("종료 시간이 시작 시간보다 빠릅니다.")
+            elif block_text and repeat:
+                # 반복 블록은 규칙 하나로 저장 (날짜를 읽을 때 펼침)
+                try:
+                    date_book().add(make_rule(make_block(block_text, start_time, end_time),
+                                              since=selected_date, **repeat))
+                    st.rerun()
+                except ValueError as e:
+                    st.error(str(e))
+            elif block_text and dates is not None and not dates:
+                st.error("추가할 날짜가 없습니다.")
+            elif block_text and dates is not None:
+                # 날짜 파일마다 한 번씩 기록하고 날짜 색인은 한 번에 갱신
+                added, overlapped = add_block_tasks(dates, block_text, start_time, end_time)
+                if overlapped:
+                    st.warning(f"{len(overlapped)}일은 기존 블록과 겹칩니다: {', '.join(overlapped)}")
+                st.success(f"블록 작업을 {len(added)}일에 추가했습니다!")
+            elif block_text:
                 add_block_task(selected_date, block_text, start_time, end_time)
                 st.success("블록 작업이 추가되었습니다!")
                 st.rerun()
+        
+        # 반복 규칙 목록
+        rules = date_book().rules()
+        if rules:
+            with st.expander(f"🔁 반복 작업 ({len(rules)})"):
+                for rule_id, rule in rules.items():
+                    block = rule["block"]
+                    st.write(f"**{block['text']}** {block['start']}-{block['end']}")
+                    st.caption(f"{describe(rule)} (시작 {rule['since']})")
+                    if st.button("규칙 삭제", key=f"delete_rule_{rule_id}"):
+                        date_book().delete(rule_id)
+                        st.rerun()
+        
+        st.divider()
+        search_sidebar()
     
-    # 메인 컨텐츠
-    tasks = load_tasks(selected_date)
-    
-    # 탭 생성
-    tab1, tab2, tab3 = st.tabs(["📝 일일 플래너", "📊 주간 보기", "📈 통계"])
+    # 보기 선택 (st.tabs 는 모든 탭을 매번 실행하므로 선택한 보기만 실행)
+    view = st.radio("보기", VIEWS, horizontal=True, key="view", label_visibility="collapsed")
     
-    with tab1:
+    if view == "📝 일일 플래너":
+        tasks = load_tasks(selected_date)
         show_daily_planner(selected_date, tasks)
-    
-    with tab2:
+    elif view == "📊 주간 보기":
         show_weekly_view()
-    
-    with tab3:
+    else:
         show_statistics()
 
-def add_block_task(date_obj, text, start_time, end_time):
-    """블록 작업 추가"""
-    tasks = load_tasks(date_obj)
-    
-    # 시간 슬롯 생성
-    start_h, start_m = map(int, start_time.split(':'))
-    end_h, end_m = map(int, end_time.split(':'))
-    
-    current_time = datetime.combine(date_obj, datetime.min.time().replace(hour=start_h, minute=start_m))
-    end_datetime = datetime.combine(date_obj, datetime.min.time().replace(hour=end_h, minute=end_m))
-    
-    time_slots = []
-    while current_time <= end_datetime:
-        time_slots.append(current_time.strftime("%H:%M"))
-        current_time += timedelta(minutes=30)
-    
-    # 작업 추가
-    for i, time_key in enumerate(time_slots):
-        if i == 0:
-            tasks[time_key] = {"text": text, "done": False, "type": "block_start"}
-        elif i == len(time_slots) - 1:
-            tasks[time_key] = {"text": "끝", "done": False, "type": "block_end"}
-        else:
-            tasks[time_key] = {"text": "→", "done": False, "type": "block_middle"}
-    
-    save_tasks(date_obj, tasks)
+def cached_view(key, rows, build):
+    """build(rows) 결과 (DataFrame, 차트), 같은 key 의 행이 바뀌었을 때만 다시 만듦 (세션 간 공유)"""
+    return view_cache.get_or_build(key, rows_version(rows), lambda: build(rows))
+
+@timed()
+def search_sidebar():
+    """사이드바 검색, 결과를 누르면 그 날짜의 일일 플래너로 이동"""
+    st.header("🔍 검색")
+    query = st.text_input("검색어", key="search_query", placeholder='치과, 치*, "치과 예약"')
+    start = end = None
+    if st.checkbox("기간 지정", key="search_range"):
+        start = st.date_input("시작일", value=date.today() - timedelta(days=30), key="search_start")
+        end = st.date_input("종료일", key="search_end")
+    if not query:
+        return
+    # 쓰기 지연 중인 날짜를 먼저 기록 (색인은 기록할 때 갱신됨)
+    flush_dates()
+    hits = date_index().search(query, start, end)
+    if not hits:
+        st.caption("검색 결과가 없습니다.")
+    for i, hit in enumerate(hits):
+        repeat = " 🔁" if "rule" in hit else ""
+        if st.button(f"{hit['date']} {hit['label']} {hit['text']}{repeat}", key=f"search_hit_{i}"):
+            st.session_state.selected_date = date.fromisoformat(hit["date"])
+            st.session_state.show_date_picker = False
+            st.session_state.view = "📝 일일 플래너"
+            st.rerun()
+
+def repeat_input(key):
+    """반복 설정 입력 -> make_rule 인자 (반복 안 함이면 None)"""
+    labels = {"none": "반복 안 함", **FREQS}
+    freq = st.selectbox("반복", list(labels), format_func=labels.get, key=f"{key}_freq")
+    if freq == "none":
+        return None
+    repeat = {"freq": freq}
+    if freq == "weekly":
+        repeat["weekdays"] = st.multiselect("요일", list(range(7)), format_func=WEEKDAY_NAMES.__getitem__,
+                                            key=f"{key}_weekdays")
+    elif freq == "interval":
+        repeat["interval"] = int(st.number_input("간격 (일)", min_value=1, value=2, key=f"{key}_interval"))
+    if st.checkbox("종료일 지정", key=f"{key}_has_until"):
+        repeat["until"] = st.date_input("종료일", key=f"{key}_until")
+    return repeat
 
+def dates_input(key):
+    """여러 날짜에 추가 입력 -> 날짜 목록 (체크하지 않으면 None)"""
+    if not st.checkbox("여러 날짜에 추가", key=f"{key}_on"):
+        return None
+    col1, col2 = st.columns(2)
+    with col1:
+        start = st.date_input("시작일", key=f"{key}_start")
+    with col2:
+        end = st.date_input("종료일", value=date.today() + timedelta(days=6), key=f"{key}_end")
+    weekdays = st.multiselect("요일 (비우면 매일)", list(range(7)), format_func=WEEKDAY_NAMES.__getitem__,
+                              key=f"{key}_weekdays")
+    dates = list(dates_between(start, end, weekdays))
+    st.caption(f"{len(dates)}일에 추가합니다.")
+    return dates
+
+def sync_tasks(tasks, saved):
+    """저장 후 화면의 tasks 를 저장된 하루(다른 탭의 변경 포함)로 맞춤"""
+    tasks.clear()
+    tasks.update(saved)
+
+@timed()
 def show_daily_planner(date_obj, tasks):
     """일일 플래너 표시"""
     # 클릭 가능한 날짜 헤더
@@ -308,153 +352,178 @@ def show_daily_planner(date_obj, tasks):
                 st.session_state.show_date_picker = False
                 st.rerun()
     
-    # 시간대별로 그룹화
-    sections = {"새벽": [], "오전": [], "오후": [], "밤": []}
+    # 표 편집 모드: 48슬롯을 표 하나로 편집하고 제출할 때 한 번만 저장
+    if st.toggle("📋 표 편집 모드", key="grid_mode"):
+        show_grid_editor(date_obj, tasks)
+        return
+    
+    # 시간대별 섹션은 각각 fragment 로 표시 (슬롯을 고치면 해당 섹션만 다시 실행·저장)
+    for section_name in ["새벽", "오전", "오후", "밤"]:
+        show_time_section(date_obj, tasks, section_name)
+
+@timed()
+def show_grid_editor(date_obj, tasks):
+    """표 편집 모드 (바뀐 슬롯만 모아 한 번에 저장)"""
+    import pandas as pd
+    
+    # 블록은 슬롯으로 펼쳐 표시 (블록 슬롯을 고치면 patch_slots 가 블록에 적용)
+    view = expand_blocks(tasks)
+    
+    with st.form(f"grid_form_{date_obj.isoformat()}"):
+        edited = st.data_editor(
+            pd.DataFrame(date_grid_rows(view)),
+            disabled=[TIME_COLUMN, TYPE_COLUMN],
+            hide_index=True,
+            use_container_width=True,
+            key=f"grid_{date_obj.isoformat()}"
+        )
+        submitted = st.form_submit_button("💾 저장", type="primary")
+    
+    if submitted:
+        changed = diff_date_grid(view, edited.to_dict("records"))
+        if changed:
+            # 바뀐 슬롯만 현재 저장된 하루에 반영
+            sync_tasks(tasks, patch_slots(date_obj, changed))
+            st.success(f"{len(changed)}개 슬롯을 저장했습니다!")
+        else:
+            st.info("변경된 슬롯이 없습니다.")
+
+@st.fragment
+@timed()
+def show_time_section(date_obj, tasks, section_name):
+    """시간대 섹션 하나의 슬롯 입력"""
+    section_tasks = []
+    # 블록 구간을 슬롯으로 펼친 보기
+    view = expand_blocks(tasks)
     
     for time_slot in get_time_slots():
         hour = int(time_slot.split(':')[0])
-        section = get_section_name(hour)
+        if get_section_name(hour) != section_name:
+            continue
         
-        task_data = tasks.get(time_slot, {"text": "", "done": False, "type": "normal"})
+        task_data = view.get(time_slot, {"text": "", "done": False, "type": "normal"})
         
-        sections[section].append({
+        section_tasks.append({
             "time": time_slot,
             "task": task_data.get("text", ""),
             "done": task_data.get("done", False),
             "type": task_data.get("type", "normal")
         })
     
-    # 각 섹션별로 표시
-    for section_name, section_tasks in sections.items():
-        st.subheader(f"🌅 {section_name}")
+    st.subheader(f"🌅 {section_name}")
+    
+    for task_info in section_tasks:
+        col1, col2, col3 = st.columns([1, 3, 1])
         
-        for task_info in section_tasks:
-            col1, col2, col3 = st.columns([1, 3, 1])
-            
-            with col1:
-                st.write(f"**{task_info['time']}**")
-            
-            with col2:
-                # 작업 텍스트 입력
-                new_text = st.text_input(
-                    f"작업 {task_info['time']}",
-                    value=task_info['task'],
-                    key=f"task_{task_info['time']}",
-                    label_visibility="collapsed"
-                )
-                
-                # 텍스트가 변경되면 저장
-                if new_text != task_info['task']:
-                    tasks[task_info['time']] = {
-                        "text": new_text,
-                        "done": task_info['done'],
-                        "type": task_info['type']
-                    }
-                    save_tasks(date_obj, tasks)
-            
-            with col3:
-                # 완료 체크박스
-                done = st.checkbox(
-                    "완료",
-                    value=task_info['done'],
-                    key=f"done_{task_info['time']}"
-                )
-                
-                # 완료 상태가 변경되면 저장
-                if done != task_info['done']:
-                    tasks[task_info['time']] = {
-                        "text": task_info['task'],
-                        "done": done,
-                        "type": task_info['type']
-                    }
-                    save_tasks(date_obj, tasks)
+        with col1:
+            st.write(f"**{task_info['time']}**")
+        
+        with col2:
+            # 작업 텍스트 입력 (블록 내용은 시작 슬롯에서만 수정, 비우면 블록 삭제)
+            new_text = st.text_input(
+                f"작업 {task_info['time']}",
+                value=task_info['task'],
+                key=f"task_{task_info['time']}",
+                label_visibility="collapsed",
+                disabled=task_info['type'] in ['block_middle', 'block_end']
+            )
             
-            # 블록 작업 스타일 적용
-            if task_info['type'] in ['block_start', 'block_middle', 'block_end']:
-                st.markdown('<div class="block-task"></div>', unsafe_allow_html=True)
+            # 텍스트가 변경되면 저장
+            if new_text != task_info['task']:
+                # 이 슬롯의 텍스트만 기록 (다른 탭이 고친 슬롯은 그대로)
+                sync_tasks(tasks, patch_slot(date_obj, task_info['time'], {"text": new_text}))
+                if task_info['type'] != 'normal':
+                    # 블록 전체가 바뀌므로 새 값으로 다시 표시
+                    st.rerun()
+        
+        with col3:
+            # 완료 체크박스
+            done = st.checkbox(
+                "완료",
+                value=task_info['done'],
+                key=f"done_{task_info['time']}"
+            )
             
-            if task_info['done']:
-                st.markdown('<div class="completed"></div>', unsafe_allow_html=True)
+            # 완료 상태가 변경되면 저장
+            if done != task_info['done']:
+                sync_tasks(tasks, patch_slot(date_obj, task_info['time'], {"done": done}))
+                if task_info['type'] != 'normal':
+                    st.rerun()
+        
+        # 블록 작업 스타일 적용
+        if task_info['type'] in ['block_start', 'block_middle', 'block_end']:
+            st.markdown('<div class="block-task"></div>', unsafe_allow_html=True)
+        
+        if task_info['done']:
+            st.markdown('<div class="completed"></div>', unsafe_allow_html=True)
 
+@timed()
 def show_weekly_view():
     """주간 보기"""
     st.header("📊 주간 보기")
     
-    # 이번 주 날짜들
-    today = date.today()
-    start_of_week = today - timedelta(days=today.weekday())
-    week_dates = [start_of_week + timedelta(days=i) for i in range(7)]
-    
-    # 주간 데이터 수집
-    weekly_data = []
-    for week_date in week_dates:
-        tasks = load_tasks(week_date)
-        completed = sum(1 for task in tasks.values() if isinstance(task, dict) and task.get('done', False))
-        total = len(tasks)
-        
-        weekly_data.append({
-            "날짜": week_date.strftime("%m/%d"),
-            "요일": week_date.strftime("%A"),
-            "완료": completed,
-            "전체": total,
-            "완료율": (completed / total * 100) if total > 0 else 0
-        })
+    # 이번 주 데이터 (날짜 색인 한 번 읽기, 파일이 없는 날짜는 0)
+    weekly_data = date_week_rows()
+    df, fig = cached_view(("weekly", config.DATA_DIR, week_dates()[0]), weekly_data, weekly_figure)
     
     # 데이터프레임으로 표시
-    df = pd.DataFrame(weekly_data)
     st.dataframe(df, use_container_width=True)
     
     # 완료율 차트
-    fig = px.bar(df, x="날짜", y="완료율", 
-                 title="주간 완료율",
-                 color="완료율",
-                 color_continuous_scale="viridis")
     st.plotly_chart(fig, use_container_width=True)
 
+def weekly_figure(weekly_data):
+    # 표/차트를 그릴 때만 pandas, plotly 로드
+    import pandas as pd
+    import plotly.express as px
+    
+    df = pd.DataFrame(weekly_data)
+    with span("plotly.figure"):
+        fig = px.bar(df, x="날짜", y="완료율", 
+                     title="주간 완료율",
+                     color="완료율",
+                     color_continuous_scale="viridis")
+    return df, fig
+
+@timed()
 def show_statistics():
     """통계 보기"""
     st.header("📈 통계")
     
     # 최근 7일 통계
-    today = date.today()
-    stats_data = []
-    
-    for i in range(7):
-        check_date = today - timedelta(days=i)
-        tasks = load_tasks(check_date)
-        
-        completed = sum(1 for task in tasks.values() if isinstance(task, dict) and task.get('done', False))
-        total = len(tasks)
-        
-        stats_data.append({
-            "날짜": check_date.strftime("%m/%d"),
-            "완료": completed,
-            "전체": total,
-            "완료율": (completed / total * 100) if total > 0 else 0
-        })
-    
-    stats_df = pd.DataFrame(stats_data)
+    stats_data = date_recent_rows(days=7)
     
     # 통계 카드들
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        total_tasks = stats_df['전체'].sum()
+        total_tasks = sum(row['전체'] for row in stats_data)
         st.metric("총 작업 수", total_tasks)
     
     with col2:
-        completed_tasks = stats_df['완료'].sum()
+        completed_tasks = sum(row['완료'] for row in stats_data)
         st.metric("완료된 작업", completed_tasks)
     
     with col3:
-        avg_completion = stats_df['완료율'].mean()
+        avg_completion = sum(row['완료율'] for row in stats_data) / len(stats_data)
         st.metric("평균 완료율", f"{avg_completion:.1f}%")
     
     # 완료율 트렌드 차트
-    fig = px.line(stats_df, x="날짜", y="완료율", 
-                  title="최근 7일 완료율 트렌드",
-                  markers=True)
+    _, fig = cached_view(("statistics", config.DATA_DIR, date.today(), 7), stats_data, statistics_figure)
     st.plotly_chart(fig, use_container_width=True)
 
+def statistics_figure(stats_data):
+    # 그릴 때만 pandas, plotly 로드
+    import pandas as pd
+    import plotly.express as px
+    
+    stats_df = pd.DataFrame(stats_data)
+    with span("plotly.figure"):
+        fig = px.line(stats_df, x="날짜", y="완료율", 
+                      title="최근 7일 완료율 트렌드",
+                      markers=True)
+    return stats_df, fig
+
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    with rerun("web_planner"):
+        main() 
\ No newline at end of file
@@ -1,9 +1,17 @@
 import streamlit as st
-import json
-import os
-from datetime import datetime, timedelta
-import pandas as pd
-import plotly.express as px
+from datetime import datetime, date, timedelta
+from planner.cache import clone
+from planner.concurrency import ConflictError
+from planner.grid import BLOCK_COLUMN, TIME_COLUMN, diff_user_grid, user_grid_rows
+from planner.intervals import (block_index, calendar_index, format_minutes, overlapping_dates, slot_blocks,
+                               to_minutes)
+from planner.metrics import rerun, span, timed
+from planner.recurrence import FREQS, WEEKDAY_NAMES, dates_between, describe, make_rule, user_book
+from planner.search import user_index
+from planner.reports import rows_version, user_monthly_rows, user_week_rows, week_dates
+from planner.sparse import read_slot, set_slot
+from planner.storage import get_store
+from planner.viewcache import view_cache
 
 # 페이지 설정
 st.set_page_config(
@@ -20,23 +28,10 @@ if 'current_user' not in st.session_state:
 if 'user_password' not in st.session_state:
     st.session_state.user_password = None
 
-def get_user_data_file(username):
-    return f"data_{username}.json"
-
+# 저장소는 PLANNER_BACKEND 환경 변수로 선택 (json: data_{user}.json, sqlite: planner.db)
+@timed()
 def load_user_data(username):
-    filename = get_user_data_file(username)
-    if os.path.exists(filename):
-        try:
-            with open(filename, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except:
-            return {}
-    return {}
-
-def save_user_data(username, data):
-    filename = get_user_data_file(username)
-    with open(filename, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    return get_store().load_user(username)
 
 def login_page():
     """로그인 페이지"""
@@ -63,6 +58,8 @@ def login_page():
     st.markdown("---")
     st.info("💡 **사용법**: 아이디와 비밀번호 조합으로 계정이 구분됩니다. 같은 아이디라도 비밀번호가 다르면 새로운 계정입니다.")
 
+VIEWS = ["📝 일일 계획", "📊 통계", "🔧 블록 작업", "📅 주간 보기"]
+
 def main_planner():
     """메인 플래너 화면"""
     st.title("📅 시간 관리 플래너")
@@ -74,39 +71,56 @@ def main_planner():
         user_id = st.session_state.current_user.split('_')[0] if '_' in st.session_state.current_user else st.session_state.current_user
         st.write(f"**사용자**: {user_id}")
         if st.button("로그아웃", type="secondary"):
+            # 쓰기 지연 중인 변경을 먼저 기록
+            get_store().flush(st.session_state.current_user)
             st.session_state.logged_in = False
             st.session_state.current_user = None
             st.session_state.password_verified = False
             st.rerun()
-    
-    # 사용자 데이터 로드
-    user_data = load_user_data(st.session_state.current_user)
-    
-    # 탭 생성
-    tab1, tab2, tab3, tab4 = st.tabs(["📝 일일 계획", "📊 통계", "🔧 블록 작업", "📅 주간 보기"])
-    
-    with tab1:
-        # 날짜 선택
-        selected_date = st.date_input("날짜 선택", value=datetime.now())
-        daily_planner_tab(selected_date, user_data)
-    
-    with tab2:
-        statistics_tab(user_data)
-    
-    with tab3:
-        block_tasks_tab(user_data)
-    
-    with tab4:
-        weekly_view_tab(user_data)
+        st.divider()
+        search_sidebar(st.session_state.current_user)
+    
+    # 보기 선택 (st.tabs 는 모든 탭을 매번 실행하므로 선택한 보기만 실행)
+    view = st.radio("보기", VIEWS, horizontal=True, key="view", label_visibility="collapsed")
+    
+    if view == "📝 일일 계획":
+        # 날짜 선택 (다른 보기에 다녀와도 고른 날짜 유지)
+        selected_date = st.date_input("날짜 선택", value=st.session_state.get("selected_date", datetime.now()))
+        st.session_state.selected_date = selected_date
+        # 선택한 날짜만 읽음 (sqlite 는 그 날짜의 행만 조회)
+        daily_planner_tab(selected_date, get_store().load_day(st.session_state.current_user,
+                                                              selected_date.strftime("%Y-%m-%d")))
+    elif view == "📊 통계":
+        statistics_tab()
+    elif view == "🔧 블록 작업":
+        block_tasks_tab(load_user_data(st.session_state.current_user))
+    else:
+        weekly_view_tab(load_user_data(st.session_state.current_user))
+
+def cached_view(key, rows, build):
+    """build(rows) 결과 (DataFrame, 차트), 같은 key 의 행이 바뀌었을 때만 다시 만듦 (세션 간 공유)"""
+    return view_cache.get_or_build(key, rows_version(rows), lambda: build(rows))
 
-def daily_planner_tab(selected_date, user_data):
-    """일일 계획 탭"""
+@timed()
+def daily_planner_tab(selected_date, day):
+    """일일 계획 탭 (day: 선택한 날짜의 하루, 호출자 소유)"""
     st.header(f"📝 {selected_date.strftime('%Y년 %m월 %d일')} 일일 계획")
     
     date_str = selected_date.strftime("%Y-%m-%d")
     
-    if date_str not in user_data:
-        user_data[date_str] = {"tasks": {}, "block_tasks": []}
+    # 이 날짜의 반복 블록 (규칙에서 펼침, 저장하지 않음)
+    book = user_book(st.session_state.current_user)
+    occurrences = book.for_day(selected_date)
+    
+    # 블록 구간 색인 (슬롯별 블록 표시, 겹침 확인)
+    blocks = day["block_tasks"] + occurrences
+    blocks_by_time = block_index(blocks)
+    block_names = slot_blocks(blocks_by_time, blocks)
+    
+    # 편집을 시작한 시점의 하루 (저장할 때 다른 세션의 변경과 병합하는 기준)
+    base_key = f"base_{st.session_state.current_user}_{date_str}"
+    if base_key not in st.session_state:
+        st.session_state[base_key] = clone(day)
     
     # 두 개의 컬럼으로 나누기
     col_left, col_right = st.columns([2, 1])
@@ -121,43 +135,13 @@ def daily_planner_tab(selected_date, user_data):
             ("새벽", "00:00", "06:00")
         ]
         
-        for period, start_time, end_time in time_slots:
-            st.write(f"**🌅 {period} ({start_time}-{end_time})**")
-            
-            # 30분 단위 시간 슬롯
-            current_time = datetime.strptime(start_time, "%H:%M")
-            end_time_obj = datetime.strptime(end_time, "%H:%M")
-            
-            while current_time < end_time_obj:
-                time_slot = current_time.strftime("%H:%M")
-                next_time = (current_time + timedelta(minutes=30)).strftime("%H:%M")
-                slot_key = f"{time_slot}-{next_time}"
-                
-                task_col1, task_col2, task_col3 = st.columns([1, 3, 1])
-                
-                with task_col1:
-                    st.write(f"**{time_slot}**")
-                
-                with task_col2:
-                    task_key = f"{date_str}_{slot_key}"
-                    task = st.text_input(
-                        "작업 내용",
-                        value=user_data[date_str]["tasks"].get(slot_key, ""),
-                        key=f"task_{task_key}",
-                        label_visibility="collapsed"
-                    )
-                    user_data[date_str]["tasks"][slot_key] = task
-                
-                with task_col3:
-                    completed_key = f"completed_{task_key}"
-                    completed = st.checkbox(
-                        "완료",
-                        value=user_data[date_str]["tasks"].get(f"{slot_key}_completed", False),
-                        key=completed_key
-                    )
-                    user_data[date_str]["tasks"][f"{slot_key}_completed"] = completed
-                
-                current_time += timedelta(minutes=30)
+        # 표 편집 모드: 48슬롯을 표 하나로 편집하고 제출할 때 한 번만 저장
+        if st.toggle("📋 표 편집 모드", key="grid_mode"):
+            slot_grid_editor(date_str, day, block_names, base_key)
+        else:
+            # 시간대별 fragment: 슬롯을 고치면 해당 시간대만 다시 실행
+            for period, start_time, end_time in time_slots:
+                time_slot_section(date_str, day["tasks"], period, start_time, end_time, block_names)
     
     with col_right:
         st.subheader("🔧 블록 작업")
@@ -168,6 +152,7 @@ def daily_planner_tab(selected_date, user_data):
         block_start_time = st.time_input("시작 시간", key=f"block_start_time_{date_str}")
         block_end_time = st.time_input("종료 시간", key=f"block_end_time_{date_str}")
         block_color = st.color_picker("색상", "#FF6B6B", key=f"block_color_{date_str}")
+        overlap_warning(blocks_by_time, blocks, block_start_time, block_end_time)
         
         if st.button("추가", key=f"add_block_{date_str}", type="primary"):
             if block_task_name and block_start_time < block_end_time:
@@ -178,8 +163,10 @@ def daily_planner_tab(selected_date, user_data):
                     "color": block_color,
                     "completed": False
                 }
-                user_data[date_str]["block_tasks"].append(new_block)
-                save_user_data(st.session_state.current_user, user_data)
+                day["block_tasks"].append(new_block)
+                get_store().add_block(st.session_state.current_user, date_str, new_block)
+                # 이 세션의 기록이므로 병합 기준도 저장된 하루로
+                st.session_state[base_key] = get_store().load_day(st.session_state.current_user, date_str)
                 st.success("추가됨!")
                 st.rerun()
             else:
@@ -187,8 +174,8 @@ def daily_planner_tab(selected_date, user_data):
         
         # 블록 작업 목록
         st.write("**현재 블록 작업**")
-        if user_data[date_str]["block_tasks"]:
-            for i, block in enumerate(user_data[date_str]["block_tasks"]):
+        if day["block_tasks"]:
+            for i, block in enumerate(day["block_tasks"]):
                 with st.container():
                     st.write(f"**{block['name']}**")
                     st.write(f"⏰ {block['start']} - {block['end']}")
@@ -202,82 +189,172 @@ def daily_planner_tab(selected_date, user_data):
                             value=block['completed'],
                             key=f"block_completed_{date_str}_{i}"
                         )
-                        user_data[date_str]["block_tasks"][i]['completed'] = completed
+                        day["block_tasks"][i]['completed'] = completed
                     with block_col3:
                         if st.button("삭제", key=f"delete_block_{date_str}_{i}"):
-                            user_data[date_str]["block_tasks"].pop(i)
-                            save_user_data(st.session_state.current_user, user_data)
+                            day["block_tasks"].pop(i)
+                            get_store().delete_block(st.session_state.current_user, date_str, i)
+                            st.session_state[base_key] = get_store().load_day(st.session_state.current_user, date_str)
                             st.rerun()
                     st.markdown("---")
-        else:
+        
+        # 반복 블록 (완료/삭제는 이 날짜에만 적용)
+        for block in occurrences:
+            with st.container():
+                st.write(f"🔁 **{block['name']}**")
+                st.write(f"⏰ {block['start']} - {block['end']}")
+                block_col1, block_col2 = st.columns(2)
+                with block_col1:
+                    completed = st.checkbox(
+                        "완료",
+                        value=block['completed'],
+                        key=f"rule_completed_{date_str}_{block['rule']}"
+                    )
+                    if completed != block['completed']:
+                        book.override(block['rule'], date_str, {"completed": completed})
+                with block_col2:
+                    if st.button("이 날 빼기", key=f"skip_rule_{date_str}_{block['rule']}"):
+                        book.skip(block['rule'], date_str)
+                        st.rerun()
+                st.markdown("---")
+        
+        if not blocks:
             st.info("블록 작업이 없습니다")
     
     # 저장 버튼 (전체 너비)
     st.markdown("---")
     if st.button("💾 저장", type="primary"):
-        save_user_data(st.session_state.current_user, user_data)
-        st.success("저장되었습니다!")
+        # 선택한 날짜만 저장 (sqlite 는 바뀐 슬롯 행만 기록)
+        try:
+            st.session_state[base_key] = get_store().save_day(
+                st.session_state.current_user, date_str, day,
+                base=st.session_state[base_key])
+            st.success("저장되었습니다!")
+        except ConflictError:
+            del st.session_state[base_key]
+            st.error("다른 창에서 같은 시간을 먼저 수정했습니다. 새로고침 후 다시 입력하세요.")
+
+@timed()
+def slot_grid_editor(date_str, day, block_names, base_key):
+    """표 편집 모드 (바뀐 슬롯만 모아 한 번에 저장, base_key: 일일 계획 탭의 병합 기준)"""
+    import pandas as pd
+    
+    with st.form(f"grid_form_{date_str}"):
+        edited = st.data_editor(
+            pd.DataFrame(user_grid_rows(day["tasks"], block_names)),
+            disabled=[TIME_COLUMN, BLOCK_COLUMN],
+            hide_index=True,
+            use_container_width=True,
+            key=f"grid_{date_str}"
+        )
+        submitted = st.form_submit_button("💾 표 저장", type="primary")
+    
+    if submitted:
+        changed = diff_user_grid(day["tasks"], edited.to_dict("records"))
+        if changed:
+            for slot_key, task, completed in changed:
+                set_slot(day["tasks"], slot_key, task, completed)
+            try:
+                st.session_state[base_key] = get_store().save_day(
+                    st.session_state.current_user, date_str, day, base=st.session_state[base_key])
+                st.success(f"{len(changed)}개 슬롯을 저장했습니다!")
+            except ConflictError:
+                del st.session_state[base_key]
+                st.error("다른 창에서 같은 시간을 먼저 수정했습니다. 새로고침 후 다시 입력하세요.")
+        else:
+            st.info("변경된 슬롯이 없습니다.")
+
+@st.fragment
+@timed()
+def time_slot_section(date_str, day_tasks, period, start_time, end_time, block_names):
+    """시간대 하나의 30분 단위 슬롯 입력 (block_names: 슬롯에 걸친 블록, intervals.slot_blocks)"""
+    st.write(f"**🌅 {period} ({start_time}-{end_time})**")
+    
+    # 30분 단위 시간 슬롯
+    current_time = datetime.strptime(start_time, "%H:%M")
+    end_time_obj = datetime.strptime(end_time, "%H:%M")
+    
+    while current_time < end_time_obj:
+        time_slot = current_time.strftime("%H:%M")
+        next_time = (current_time + timedelta(minutes=30)).strftime("%H:%M")
+        slot_key = f"{time_slot}-{next_time}"
+        
+        task_col1, task_col2, task_col3 = st.columns([1, 3, 1])
+        
+        with task_col1:
+            st.write(f"**{time_slot}**")
+            if slot_key in block_names:
+                st.caption("🔧 " + ", ".join(block_names[slot_key]))
+        
+        saved_task, saved_completed = read_slot(day_tasks, slot_key)
+        
+        with task_col2:
+            task_key = f"{date_str}_{slot_key}"
+            task = st.text_input(
+                "작업 내용",
+                value=saved_task,
+                key=f"task_{task_key}",
+                label_visibility="collapsed"
+            )
+        
+        with task_col3:
+            completed_key = f"completed_{task_key}"
+            completed = st.checkbox(
+                "완료",
+                value=saved_completed,
+                key=completed_key
+            )
+        
+        # 내용이 있거나 완료된 슬롯만 보관 (빈 슬롯은 키를 만들지 않음)
+        set_slot(day_tasks, slot_key, task, completed)
+        
+        current_time += timedelta(minutes=30)
 
+@timed()
 def weekly_view_tab(user_data):
     """주간 보기 탭"""
     st.header("📊 주간 보기")
     
-    # 이번 주 날짜들
-    today = datetime.now().date()
-    start_of_week = today - timedelta(days=today.weekday())
-    week_dates = [start_of_week + timedelta(days=i) for i in range(7)]
-    
-    # 주간 데이터 표시
-    weekly_data = []
-    for date in week_dates:
-        date_str = date.strftime("%Y-%m-%d")
-        if date_str in user_data:
-            tasks = user_data[date_str].get("tasks", {})
-            completed_tasks = sum(1 for k, v in tasks.items() if k.endswith("_completed") and v)
-            total_tasks = len([k for k in tasks.keys() if not k.endswith("_completed")])
-            
-            weekly_data.append({
-                "날짜": date.strftime("%m/%d"),
-                "요일": date.strftime("%A"),
-                "완료된 작업": completed_tasks,
-                "전체 작업": total_tasks,
-                "완료율": f"{(completed_tasks/total_tasks*100):.1f}%" if total_tasks > 0 else "0%"
-            })
+    # 이번 주 데이터 표시 (기록이 있는 날짜만)
+    weekly_data = user_week_rows(user_data)
     
     if weekly_data:
-        df = pd.DataFrame(weekly_data)
+        df, fig = cached_view(("weekly", st.session_state.current_user, week_dates()[0]), weekly_data, weekly_figure)
         st.dataframe(df, use_container_width=True)
         
         # 완료율 차트
+        st.plotly_chart(fig, use_container_width=True)
+    else:
+        st.info("이번 주 데이터가 없습니다.")
+
+def weekly_figure(weekly_data):
+    # 표/차트를 그릴 때만 pandas, plotly 로드
+    import pandas as pd
+    import plotly.express as px
+    
+    df = pd.DataFrame(weekly_data)
+    with span("plotly.figure"):
         fig = px.bar(df, x="날짜", y="완료된 작업", 
                     title="주간 작업 완료 현황",
                     color="완료된 작업",
                     color_continuous_scale="viridis")
-        st.plotly_chart(fig, use_container_width=True)
-    else:
-        st.info("이번 주 데이터가 없습니다.")
+    return df, fig
 
-def statistics_tab(user_data):
+@timed()
+def statistics_tab():
     """통계 탭"""
     st.header("📈 통계 분석")
     
-    if not user_data:
+    # 저장할 때마다 갱신되는 일별/월별 집계 사용 (전체 슬롯을 다시 세지 않음)
+    stats = get_store().load_stats(st.session_state.current_user)
+    
+    if not stats.months:
         st.info("데이터가 없습니다.")
         return
     
-    # 전체 통계 계산
-    total_tasks = 0
-    completed_tasks = 0
-    total_hours = 0
-    
-    for date_str, day_data in user_data.items():
-        tasks = day_data.get("tasks", {})
-        for key, value in tasks.items():
-            if not key.endswith("_completed"):
-                total_tasks += 1
-                total_hours += 0.5  # 30분 단위
-            elif value:  # 완료된 작업
-                completed_tasks += 1
+    # 전체 통계
+    total_tasks, completed_tasks = stats.total
+    total_hours = stats.total_hours
     
     # 통계 표시
     col1, col2, col3, col4 = st.columns(4)
@@ -295,43 +372,32 @@ def statistics_tab(user_data):
     with col4:
         st.metric("총 계획 시간", f"{total_hours:.1f}시간")
     
-    # 월별 통계
-    monthly_stats = {}
-    for date_str, day_data in user_data.items():
-        month = date_str[:7]  # YYYY-MM
-        if month not in monthly_stats:
-            monthly_stats[month] = {"tasks": 0, "completed": 0}
-        
-        tasks = day_data.get("tasks", {})
-        for key, value in tasks.items():
-            if not key.endswith("_completed"):
-                monthly_stats[month]["tasks"] += 1
-            elif value:
-                monthly_stats[month]["completed"] += 1
-    
-    if monthly_stats:
-        monthly_data = []
-        for month, stats in monthly_stats.items():
-            completion_rate = (stats["completed"] / stats["tasks"] * 100) if stats["tasks"] > 0 else 0
-            monthly_data.append({
-                "월": month,
-                "작업 수": stats["tasks"],
-                "완료 수": stats["completed"],
-                "완료율": completion_rate
-            })
-        
-        df_monthly = pd.DataFrame(monthly_data)
-        
-        # 월별 완료율 차트
+    # 월별 완료율 차트
+    _, fig = cached_view(("monthly", st.session_state.current_user), user_monthly_rows(stats), monthly_figure)
+    st.plotly_chart(fig, use_container_width=True)
+
+def monthly_figure(monthly_rows):
+    # 월별 통계 (차트를 그릴 때만 pandas, plotly 로드)
+    import pandas as pd
+    import plotly.express as px
+    
+    df_monthly = pd.DataFrame(monthly_rows)
+    with span("plotly.figure"):
         fig = px.line(df_monthly, x="월", y="완료율", 
                      title="월별 완료율 추이",
                      markers=True)
-        st.plotly_chart(fig, use_container_width=True)
+    return df_monthly, fig
 
+@timed()
 def block_tasks_tab(user_data):
     """블록 작업 탭"""
     st.header("🔧 블록 작업 관리")
     
+    # 오늘 기록이 없으면 빈 하루 (일일 계획 보기를 거치지 않고 바로 열 수 있음)
+    # 저장소 캐시와 공유하는 기록이므로 오늘만 복사해서 고침
+    today_str = datetime.now().strftime("%Y-%m-%d")
+    user_data = {**user_data, today_str: clone(user_data.get(today_str)) or {"tasks": {}, "block_tasks": []}}
+    
     # 새 블록 작업 추가
     st.subheader("새 블록 작업 추가")
     
@@ -349,6 +415,13 @@ def block_tasks_tab(user_data):
     with col4:
         color = st.color_picker("색상", "#FF6B6B", key="block_color")
     
+    book = user_book(st.session_state.current_user)
+    today_blocks = user_data[datetime.now().strftime("%Y-%m-%d")]["block_tasks"] + book.for_day(date.today())
+    today_index = block_index(today_blocks)
+    overlap_warning(today_index, today_blocks, start_time, end_time)
+    repeat = repeat_input("block_repeat")
+    dates = None if repeat else dates_input("block_dates")
+    
     if st.button("블록 작업 추가", type="primary"):
         if task_name and start_time < end_time:
             new_block = {
@@ -358,10 +431,31 @@ def block_tasks_tab(user_data):
                 "color": color,
                 "completed": False
             }
-            user_data[datetime.now().strftime("%Y-%m-%d")]["block_tasks"].append(new_block)
-            save_user_data(st.session_state.current_user, user_data)
-            st.success("블록 작업이 추가되었습니다!")
-            st.rerun()
+            if repeat:
+                # 반복 블록은 규칙 하나로 저장 (날짜를 볼 때 펼침)
+                try:
+                    book.add(make_rule(new_block, since=date.today(), **repeat))
+                    st.rerun()
+                except ValueError as e:
+                    st.error(str(e))
+            elif dates is not None and not dates:
+                st.error("추가할 날짜가 없습니다.")
+            elif dates is not None:
+                # 여러 날짜를 저장소 기록 한 번으로 추가
+                date_strs = [day.isoformat() for day in dates]
+                overlapped = overlapping_dates(calendar_index(user_data), date_strs,
+                                               new_block["start"], new_block["end"])
+                get_store().add_blocks(st.session_state.current_user, date_strs, new_block)
+                if today_str in date_strs:
+                    user_data[today_str]["block_tasks"].append(dict(new_block))
+                if overlapped:
+                    st.warning(f"{len(overlapped)}일은 기존 블록과 겹칩니다: {', '.join(overlapped)}")
+                st.success(f"블록 작업을 {len(date_strs)}일에 추가했습니다!")
+            else:
+                user_data[today_str]["block_tasks"].append(new_block)
+                get_store().add_block(st.session_state.current_user, today_str, new_block)
+                st.success("블록 작업이 추가되었습니다!")
+                st.rerun()
         else:
             st.error("작업명을 입력하고 시작 시간이 종료 시간보다 빨라야 합니다.")
     
@@ -387,15 +481,101 @@ def block_tasks_tab(user_data):
                     value=block['completed'],
                     key=f"block_completed_{i}"
                 )
-                user_data[datetime.now().strftime("%Y-%m-%d")]["block_tasks"][i]['completed'] = completed
+                if completed != block['completed']:
+                    get_store().update_block(st.session_state.current_user, datetime.now().strftime("%Y-%m-%d"),
+                                             i, completed=completed)
+                    block['completed'] = completed
             
             with col5:
                 if st.button("삭제", key=f"delete_block_{i}"):
                     user_data[datetime.now().strftime("%Y-%m-%d")]["block_tasks"].pop(i)
-                    save_user_data(st.session_state.current_user, user_data)
+                    get_store().delete_block(st.session_state.current_user, datetime.now().strftime("%Y-%m-%d"), i)
                     st.rerun()
     else:
         st.info("블록 작업이 없습니다.")
+    
+    # 반복 규칙
+    rules = book.rules()
+    if rules:
+        st.subheader("🔁 반복 작업")
+        for rule_id, rule in rules.items():
+            col1, col2, col3 = st.columns([3, 3, 1])
+            with col1:
+                st.write(f"**{rule['block']['name']}** {rule['block']['start']} - {rule['block']['end']}")
+            with col2:
+                st.write(f"{describe(rule)} (시작 {rule['since']})")
+            with col3:
+                if st.button("삭제", key=f"delete_rule_{rule_id}"):
+                    book.delete(rule_id)
+                    st.rerun()
+    
+    # 오늘 1시간 이상 빈 시간
+    gaps = today_index.free_gaps(0, 24 * 60, min_length=60)
+    if gaps:
+        st.caption("1시간 이상 빈 시간: " + ", ".join(f"{format_minutes(start)}-{format_minutes(end)}" for start, end in gaps))
+
+@timed()
+def search_sidebar(username):
+    """사이드바 검색, 결과를 누르면 그 날짜의 일일 계획으로 이동"""
+    st.header("🔍 검색")
+    query = st.text_input("검색어", key="search_query", placeholder='치과, 치*, "치과 예약"')
+    start = end = None
+    if st.checkbox("기간 지정", key="search_range"):
+        start = st.date_input("시작일", value=date.today() - timedelta(days=30), key="search_start")
+        end = st.date_input("종료일", key="search_end")
+    if not query:
+        return
+    # 쓰기 지연 중인 변경을 먼저 기록 (색인은 기록할 때 갱신됨)
+    get_store().flush(username)
+    hits = user_index(username).search(query, start, end)
+    if not hits:
+        st.caption("검색 결과가 없습니다.")
+    for i, hit in enumerate(hits):
+        repeat = " 🔁" if "rule" in hit else ""
+        if st.button(f"{hit['date']} {hit['label']} {hit['text']}{repeat}", key=f"search_hit_{i}"):
+            st.session_state.selected_date = date.fromisoformat(hit["date"])
+            st.session_state.view = "📝 일일 계획"
+            st.rerun()
+
+def repeat_input(key):
+    """반복 설정 입력 -> make_rule 인자 (반복 안 함이면 None)"""
+    labels = {"none": "반복 안 함", **FREQS}
+    freq = st.selectbox("반복", list(labels), format_func=labels.get, key=f"{key}_freq")
+    if freq == "none":
+        return None
+    repeat = {"freq": freq}
+    if freq == "weekly":
+        repeat["weekdays"] = st.multiselect("요일", list(range(7)), format_func=WEEKDAY_NAMES.__getitem__,
+                                            key=f"{key}_weekdays")
+    elif freq == "interval":
+        repeat["interval"] = int(st.number_input("간격 (일)", min_value=1, value=2, key=f"{key}_interval"))
+    if st.checkbox("종료일 지정", key=f"{key}_has_until"):
+        repeat["until"] = st.date_input("종료일", key=f"{key}_until")
+    return repeat
+
+def dates_input(key):
+    """여러 날짜에 추가 입력 -> 날짜 목록 (체크하지 않으면 None)"""
+    if not st.checkbox("여러 날짜에 추가", key=f"{key}_on"):
+        return None
+    col1, col2 = st.columns(2)
+    with col1:
+        start = st.date_input("시작일", key=f"{key}_start")
+    with col2:
+        end = st.date_input("종료일", value=date.today() + timedelta(days=6), key=f"{key}_end")
+    weekdays = st.multiselect("요일 (비우면 매일)", list(range(7)), format_func=WEEKDAY_NAMES.__getitem__,
+                              key=f"{key}_weekdays")
+    dates = list(dates_between(start, end, weekdays))
+    st.caption(f"{len(dates)}일에 추가합니다.")
+    return dates
+
+def overlap_warning(index, blocks, start_time, end_time):
+    """새 블록 (time_input 값) 과 겹치는 기존 블록이 있으면 경고"""
+    if start_time >= end_time:
+        return
+    overlaps = index.overlapping(to_minutes(start_time.strftime("%H:%M")), to_minutes(end_time.strftime("%H:%M")))
+    if overlaps:
+        st.warning("기존 블록과 겹칩니다: " + ", ".join(
+            f"{blocks[i]['name']} ({blocks[i]['start']}-{blocks[i]['end']})" for i in overlaps))
 
 # 메인 앱 실행
 def main():
@@ -421,4 +601,5 @@ def main():
         # 로그인된 경우 바로 메인 플래너 표시
         main_planner()
 
-main() 
\ No newline at end of file
+with rerun("web_planner_simple"):
+    main()